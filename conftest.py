@@ -0,0 +1,7 @@
+import pytest
+
+@pytest.fixture(autouse=True)
+def log_dir(tmp_path, monkeypatch):
+    # Managers write their log to logs/ in the working directory, keep it out of the repository
+    monkeypatch.chdir(tmp_path)
+    return tmp_path / "logs"
@@ -0,0 +1,79 @@
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Benchmark of the single stream and segmented save downloads against a local FTP server.
+# Needs pyftpdlib (pip install pyftpdlib), which is only used here.
+try:
+    from pyftpdlib.authorizers import DummyAuthorizer
+    from pyftpdlib.handlers import FTPHandler, ThrottledDTPHandler
+    from pyftpdlib.servers import ThreadedFTPServer
+except ImportError:
+    print("pyftpdlib is needed for the local FTP server: pip install pyftpdlib")
+    sys.exit(1)
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from arkparse.enums import ArkMap
+from arkparse.ftp.ark_ftp_client import SAVE_FILES_LOCATION
+from submanagers.ftp_pool import FtpPool
+from submanagers.save_transfer import SaveTransfer
+
+argparser = argparse.ArgumentParser()
+argparser.add_argument("--size", type=int, default=200, help="Size of the dummy save in MB")
+argparser.add_argument("--limit", type=float, default=20, help="Bandwidth per FTP connection in MB/s, 0 for unlimited")
+argparser.add_argument("--segments", type=int, nargs="+", default=[1, 2, 4, 8])
+argparser.add_argument("--no-rest", action="store_true", help="Let the server refuse REST to test the fallback")
+args = argparser.parse_args()
+
+PORT = 2121
+root = Path(tempfile.mkdtemp())
+save_dir = root.joinpath(*SAVE_FILES_LOCATION) / "Ragnarok_WP"
+save_dir.mkdir(parents=True)
+with open(save_dir / "Ragnarok_WP.ark", "wb") as f:
+    for _ in range(args.size):
+        f.write(os.urandom(1024 * 1024))
+
+authorizer = DummyAuthorizer()
+authorizer.add_user("ark", "ark", str(root), perm="elradfmwMT")
+
+handler = FTPHandler
+handler.authorizer = authorizer
+if args.limit:
+    dtp_handler = ThrottledDTPHandler
+    dtp_handler.write_limit = int(args.limit * 1024 * 1024)
+    handler.dtp_handler = dtp_handler
+if args.no_rest:
+    handler.proto_cmds = {k: v for k, v in handler.proto_cmds.items() if k != "REST"}
+
+logging.basicConfig(level=logging.WARNING)
+server = ThreadedFTPServer(("127.0.0.1", PORT), handler)
+threading.Thread(target=server.serve_forever, daemon=True).start()
+
+config = root / "ftp_config.json"
+config.write_text(f'{{"host": "127.0.0.1", "port": {PORT}, "user": "ark", "password": "ark"}}')
+
+pool = FtpPool(str(config), ArkMap.RAGNAROK, max_idle=max(args.segments))
+transfer = SaveTransfer(pool, ArkMap.RAGNAROK, work_dir=root / "downloads")
+
+results = {}
+for segments in args.segments:
+    start = time.monotonic()
+    local_file, digest = transfer.download(segments=segments)
+    results[segments] = (time.monotonic() - start, digest)
+    local_file.unlink()
+
+print(f"\n{args.size} MB save, {args.limit or 'unlimited'} MB/s per connection")
+for segments, (elapsed, digest) in results.items():
+    print(f"{segments:>2} connection(s): {elapsed:6.2f}s  {args.size / elapsed:7.1f} MB/s  hash={digest}")
+
+if len(set(digest for _, digest in results.values())) != 1:
+    print("Hashes differ between runs!")
+
+pool.close()
+server.close_all()
@@ -0,0 +1,31 @@
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from submanagers.save_index import SaveIndex
+
+argparser = argparse.ArgumentParser(description="Query the save index written by the scheduler with --save-index")
+argparser.add_argument("--index", type=Path, default=Path(__file__).resolve().parent.parent / "save_index.db")
+argparser.add_argument("--generation", type=int, default=None, help="Index generation to query (default latest)")
+argparser.add_argument("--player", metavar="NAME", help="Show the history of the player with this platform name")
+argparser.add_argument("--dinos", nargs="+", metavar="CLASS", help="Count the dinos of these classes")
+argparser.add_argument("--structures", nargs="+", metavar="CLASS", help="List the structures of these classes")
+args = argparser.parse_args()
+
+index = SaveIndex(args.index)
+
+if args.player:
+    for row in index.player_history(args.player):
+        print(f"generation {row['generation']}: {row['char_name']} level {row['level']}, tribe {row['tribe_id']}, {row['deaths']} deaths")
+if args.dinos:
+    print(f"{index.count_dinos(args.dinos, tamed=False, generation=args.generation)} wild, "
+          f"{index.count_dinos(args.dinos, tamed=True, generation=args.generation)} tamed")
+if args.structures:
+    for row in index.structures_by_class(args.structures, args.generation):
+        print(f"{row['class']} of team {row['team']} at ({row['x']}, {row['y']}, {row['z']})")
+if not (args.player or args.dinos or args.structures):
+    print(f"Latest generation: {index.latest_generation()}")
+    for row in index.query("SELECT * FROM generations ORDER BY id"):
+        print(f"{row['id']}: {row['content_hash']} game time {row['game_time']}")
@@ -0,0 +1,21 @@
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from submanagers.snapshot_store import SnapshotStore
+
+argparser = argparse.ArgumentParser(description="List or extract the locally stored save snapshots")
+argparser.add_argument("--directory", type=Path, default=Path(__file__).resolve().parent.parent / "snapshots")
+argparser.add_argument("--extract", metavar="HASH", help="Decompress the snapshot with this hash")
+argparser.add_argument("--output", type=Path, default=Path.cwd() / "Ragnarok_WP.ark")
+args = argparser.parse_args()
+
+store = SnapshotStore(args.directory)
+
+if args.extract:
+    print(f"Extracted to {store.extract(args.extract, args.output)}")
+else:
+    for snapshot in store.list():
+        print(snapshot)
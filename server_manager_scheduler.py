@@ -1,4 +1,6 @@
 from pathlib import Path
+import argparse
+import asyncio
 import datetime
 import time
 
@@ -19,10 +21,21 @@ from submanagers.loot_house_manager import LootHouseManager
 from submanagers.dino_boss_manager import DinoBossManager
 from submanagers.command_manager import CommandManager
 from submanagers.platform_dino_finder import PlatformDinoExposer
+from submanagers.manager_pool import ManagerPool
+from submanagers.maintenance_window import MaintenanceWindow
+from submanagers.deadline_queue import DeadlineQueue
+from submanagers.generation_trigger import GenerationTrigger
+from submanagers.save_index import SaveIndex, SaveIndexExporter
+from submanagers.ftp_pool import FtpPool
+from submanagers.readiness import Readiness
+from submanagers.player_presence import PlayerPresence
+from submanagers.game_log import GameLogReader
+from submanagers.__manager import Manager, AsyncManager
 
 FTP_CONF = "ftp_config.json"
 PlayerDataFiles.set_files(players_files_path=Path("players.json"))
 MAP = ArkMap.RAGNAROK
+ALIVE_INTERVAL = 10 * 60
 
 class ServerManagerScheduler:
     """
@@ -30,62 +43,229 @@ class ServerManagerScheduler:
     including player activity, save tracking, and various submanagers.
     """
 
-    def __init__(self):
+    def __init__(self, memory_limit: int = None, download_segments: int = 1, save_index: Path = None):
         self.start_time = datetime.datetime.now()
+        self.queue = DeadlineQueue()
         self.rcon = RconApi.from_config("rcon_config.json")
-        self.save_tracker = SaveTracker(ftp_config=FTP_CONF, map=MAP)
-        self.activity_manager = PlayerActivityManager(self.rcon)
-        self.dino_finder = DinoFinder(self.save_tracker, self.rcon, MAP)
-        self.restart_manager = RestartManager(self.rcon, FTP_CONF)
-        # self.vote_manager = VoteManager(SAVE_TRACKER, RCON)
+        self.ftp_pool = FtpPool(FTP_CONF, MAP)
+        self.readiness = Readiness(self.ftp_pool, MAP, self.rcon)
+        self.save_tracker = SaveTracker(ftp_config=FTP_CONF, map=MAP, memory_limit=memory_limit, ftp_pool=self.ftp_pool, download_segments=download_segments, readiness=self.readiness)
+        # One listplayers poll shared by every manager that needs the online players
+        self.player_presence = PlayerPresence(self.rcon)
+        self.activity_manager = PlayerActivityManager(self.rcon, presence=self.player_presence)
+        self.dino_finder = DinoFinder(self.save_tracker, self.rcon, MAP, self.player_presence)
+        self.restart_manager = RestartManager(self.rcon, FTP_CONF, self.ftp_pool, self.readiness)
         self.random_stat_manager = RandomStatManager(self.save_tracker, self.rcon)
-        self.raid_base_manager = RaidBaseManager(self.rcon, self.save_tracker, Path.cwd() / "bases")
+        self.raid_base_manager = RaidBaseManager(self.rcon, self.save_tracker, Path.cwd() / "bases", self.player_presence)
         self.main_base_reporter = MainBaseReporter(self.save_tracker, self.rcon)
-        self.loot_house_manager = LootHouseManager(self.save_tracker, self.rcon)
-        self.dino_boss_manager = DinoBossManager(self.rcon, self.save_tracker)
-        self.chat_logger = ChatLogger(self.rcon)
-        self.command_manager = CommandManager(self.rcon, self.save_tracker, self.raid_base_manager, self.dino_boss_manager)
+        self.loot_house_manager = LootHouseManager(self.save_tracker, self.rcon, self.player_presence)
+        self.dino_boss_manager = DinoBossManager(self.rcon, self.save_tracker, self.player_presence)
+        # One game log poll, the entries are queued for every consumer and wake it up
+        self.game_log = GameLogReader(self.rcon, self.submit)
+        # self.vote_manager = VoteManager(self.rcon, FTP_CONF, self.game_log)
+        self.chat_logger = ChatLogger(self.rcon, self.game_log)
+        self.command_manager = CommandManager(self.rcon, self.save_tracker, self.raid_base_manager, self.dino_boss_manager, self.game_log, self.player_presence)
         self.platform_dino_exposer = PlatformDinoExposer(self.rcon, self.save_tracker)
 
+        # All save changes are applied in one stop/download/upload/start cycle at 05:00
+        self.maintenance_window = MaintenanceWindow(self.save_tracker, hour=5)
+        self.maintenance_window.register("raid bases", self.raid_base_manager.maintain)
+        self.maintenance_window.register("loot house", self.loot_house_manager.maintain, self.loot_house_manager.needs_maintenance)
+        self.maintenance_window.register("dread menagerie", self.dino_boss_manager.maintain, self.dino_boss_manager.needs_maintenance)
+
+        # Save consumers run once per new save generation instead of on their own timer
+        self.generation_trigger = GenerationTrigger(self.save_tracker, self.submit)
+        self.generation_trigger.register(self.dino_finder, min_interval=25 * 60)
+        self.generation_trigger.register(self.main_base_reporter, min_interval=55 * 60)
+        self.generation_trigger.register(self.random_stat_manager, min_interval=15 * 60)
+        self.generation_trigger.register(self.platform_dino_exposer, min_interval=15 * 60)
+
+        # Optional history of every save generation for offline queries
+        self.save_index_exporter = None
+        if save_index is not None:
+            self.save_index_exporter = SaveIndexExporter(self.save_tracker, SaveIndex(save_index))
+            self.generation_trigger.register(self.save_index_exporter)
+
+        # Order in which the managers are run every tick
+        self.managers = [
+            self.save_tracker,
+            self.player_presence,
+            self.maintenance_window,
+            self.raid_base_manager,
+            self.game_log,
+            self.chat_logger,
+            self.main_base_reporter,
+            self.activity_manager,
+            self.dino_finder,
+            self.restart_manager,
+            self.loot_house_manager,
+            self.random_stat_manager,
+            self.dino_boss_manager,
+            self.command_manager,
+            self.platform_dino_exposer,
+        ]
+        if self.save_index_exporter is not None:
+            self.managers.append(self.save_index_exporter)
+
     def _print(self, message):
         current_time = time.strftime("%H:%M:%S", time.localtime())
         print(f"[{current_time}][scheduler] {message}")
 
-    def is_10_minute_interval(self):
-        cur_time = datetime.datetime.now()
-        return (cur_time.minute % 10 == 0) and (cur_time.second == 0)
+    def _next_alive_time(self) -> float:
+        return (time.time() // ALIVE_INTERVAL + 1) * ALIVE_INTERVAL
+
+    def submit(self, manager: Manager, at: float = None):
+        """
+        Run a manager as soon as possible (or at the absolute time at), wakes the scheduler up if it is sleeping.
+        """
+        self.queue.submit(manager, at)
 
     def run(self):
         """
         Run the server manager scheduler.
-        This function initializes and starts all submanagers.
+        The scheduler sleeps until the next manager is due and then runs all due managers.
         """
+        for manager in self.managers:
+            self.queue.push(manager)
+
+        next_alive = self._next_alive_time()
         while True:
             try:
-                if self.is_10_minute_interval():
+                due = self.queue.pop_due(until=next_alive)
+                if time.time() >= next_alive:
                     self._print("Schedule alive, running submanagers...")
-                self.save_tracker.process()
-                self.raid_base_manager.process()
-                self.chat_logger.process()
-                self.main_base_reporter.process()
-                self.activity_manager.process()
-                self.dino_finder.process()
-                self.restart_manager.process()
-                self.loot_house_manager.process()
-                self.random_stat_manager.process()
-                self.dino_boss_manager.process()
-                self.command_manager.process()
-                self.platform_dino_exposer.process()
+                    self._print(f"FTP pool: {self.ftp_pool.report()}")
+                    next_alive = self._next_alive_time()
+
+                for manager in due:
+                    try:
+                        manager.process()
+                    finally:
+                        self.queue.push(manager)
 
             except Exception as e:
                 self._print(f"Error in server manager scheduler: {e}")
                 if not ErrorCatch.CATCH_ERRORS:
                     raise e
 
-            time.sleep(1)  # Sleep to prevent busy waiting
+    def run_concurrent(self, max_workers: int = 4):
+        """
+        Run the submanagers on a bounded worker pool.
+        Due managers are handed to the pool, a manager that is still running is not queued again,
+        so a long save update or restart no longer blocks the chat logger and command manager.
+        A manager is put back on the deadline queue once its run finished.
+        """
+        pool = ManagerPool(max_workers=max_workers)
+        for manager in self.managers:
+            self.queue.push(manager)
+
+        next_alive = self._next_alive_time()
+        try:
+            while True:
+                try:
+                    due = self.queue.pop_due(until=next_alive)
+                    if time.time() >= next_alive:
+                        self._print("Schedule alive, running submanagers...")
+                        self._print(f"Queue delays:\n{pool.report()}")
+                        self._print(f"FTP pool: {self.ftp_pool.report()}")
+                        next_alive = self._next_alive_time()
+
+                    pool.raise_errors()
+                    for manager in due:
+                        # A manager that is still running gets re-queued when that run finishes
+                        pool.submit(manager, on_done=self.queue.push)
+
+                except Exception as e:
+                    self._print(f"Error in server manager scheduler: {e}")
+                    if not ErrorCatch.CATCH_ERRORS:
+                        raise e
+        finally:
+            pool.shutdown(wait=False)
+
+class AsyncServerManagerScheduler(ServerManagerScheduler):
+    """
+    Runs all submanagers on one asyncio event loop.
+    Async managers are awaited directly, the blocking managers run in a worker thread,
+    so the network waits of all managers overlap instead of adding up.
+    """
+
+    def __init__(self, memory_limit: int = None, download_segments: int = 1, save_index: Path = None):
+        super().__init__(memory_limit, download_segments, save_index)
+        self.loop: asyncio.AbstractEventLoop = None
+        self.wake: asyncio.Event = None
+        self.tasks = {}
+
+    def submit(self, manager: Manager, at: float = None):
+        """
+        Run a manager as soon as possible (or at the absolute time at), wakes the event loop up if it is sleeping.
+        """
+        if at is None:
+            manager.run_now()
+        else:
+            manager.run_at(at)
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.wake.set)
+
+    async def __run_manager(self, manager: Manager):
+        try:
+            if isinstance(manager, AsyncManager):
+                await manager.process_async()
+            else:
+                await asyncio.to_thread(manager.process)
+        except Exception as e:
+            self._print(f"Error in {manager.name}: {e}")
+            if not ErrorCatch.CATCH_ERRORS:
+                raise e
+        finally:
+            self.wake.set()
+
+    async def run_async(self):
+        self.loop = asyncio.get_running_loop()
+        self.wake = asyncio.Event()
+        next_alive = self._next_alive_time()
+
+        while True:
+            for manager, task in list(self.tasks.items()):
+                if task.done():
+                    del self.tasks[manager]
+                    task.result()
+
+            if time.time() >= next_alive:
+                self._print(f"Schedule alive, {len(self.tasks)} submanagers running...")
+                self._print(f"FTP pool: {self.ftp_pool.report()}")
+                next_alive = self._next_alive_time()
+
+            for manager in self.managers:
+                if manager not in self.tasks and manager.is_due():
+                    self.tasks[manager] = asyncio.create_task(self.__run_manager(manager))
+
+            # Sleep until the next idle manager is due, a finished task or submit wakes us early
+            idle = [manager.deadline() for manager in self.managers if manager not in self.tasks]
+            wake_at = min(idle + [next_alive])
+            self.wake.clear()
+            try:
+                await asyncio.wait_for(self.wake.wait(), timeout=max(0.0, wake_at - time.time()))
+            except asyncio.TimeoutError:
+                pass
+
+    def run(self):
+        asyncio.run(self.run_async())
 
 if __name__ == "__main__":
-    scheduler = ServerManagerScheduler()
+    parser = argparse.ArgumentParser(description="ARK server manager scheduler")
+    # The asyncio scheduler runs its own loop, it cannot be combined with the worker pool
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--concurrent", action="store_true", help="Run the submanagers on a worker pool instead of one after another")
+    mode.add_argument("--asyncio", action="store_true", help="Run the submanagers on an asyncio event loop")
+    parser.add_argument("--workers", type=int, default=4, help="Number of workers for the save-heavy submanagers (default 4)")
+    parser.add_argument("--memory-limit", type=int, default=None, help="Memory budget in MB for keeping two saves loaded while refreshing")
+    parser.add_argument("--download-segments", type=int, default=1, help="Download the save over this many parallel FTP connections (default 1)")
+    parser.add_argument("--save-index", type=Path, default=None, metavar="PATH", help="Export every save generation to this SQLite index database")
+    args = parser.parse_args()
+
+    memory_limit = args.memory_limit * 1024 * 1024 if args.memory_limit is not None else None
+    scheduler_type = AsyncServerManagerScheduler if args.asyncio else ServerManagerScheduler
+    scheduler = scheduler_type(memory_limit, args.download_segments, args.save_index)
     scheduler._print("Starting server manager scheduler...")
     ErrorCatch.set_catch_errors(True)
 
@@ -95,7 +275,10 @@ if __name__ == "__main__":
     # scheduler.raid_base_manager.test_full()
     
     try:
-        scheduler.run()
+        if args.concurrent:
+            scheduler.run_concurrent(args.workers)
+        else:
+            scheduler.run()
     # except KeyboardInterrupt:
     #     scheduler._print("Server manager scheduler stopped by user.")
     except Exception as e:
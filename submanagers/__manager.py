@@ -1,6 +1,10 @@
+import asyncio
+import functools
 import os
 import shutil
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from .errorcatch import ErrorCatch
 from pathlib import Path
 
@@ -8,15 +12,19 @@ OLD_LOG_DIR = Path("logs") / "_old"
 LOG_FILE_NAME = Path("logs") / f"{time.strftime('%Y-%m-%d_%H-%M-%S')}.log"
 
 class Manager:
+    # Managers that answer players (RCON pollers, chat and command handlers) run on the fast
+    # workers of a ManagerPool, whatever their interval, so save jobs cannot hold them up
+    latency_sensitive: bool = False
+
     def __init__(self, process, name: str = "", interval: int = 60):
-        self.thread = None
-        self.stop_event = None
         self.name = name
         self._process = process
         self.save_tracker = None
         self.start_time = time.time()
         self.next_run = 0
+        self.last_run: float = None
         self.interval = interval
+        self.lock = threading.Lock()
         self._stash_old_logs()
         with open(LOG_FILE_NAME, "w") as f:
             f.write(f"Log started at {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.start_time))}\n")
@@ -35,7 +43,7 @@ class Manager:
             log_file.write(f"{message}\n")
 
     def __current_time(self):
-        return int(time.time() - self.start_time)
+        return time.time() - self.start_time
 
     def _print(self, message, log=True):
         if isinstance(message, str):
@@ -53,47 +61,97 @@ class Manager:
         self.interval = interval
         self.next_run = self.__current_time() + interval
 
-    def process(self):
-        if self.__current_time() < self.next_run:
-            return
-        
+    def is_due(self) -> bool:
+        return self.__current_time() >= self.next_run
+
+    def deadline(self) -> float:
+        """
+        Absolute time (time.time()) of the next run.
+        """
+        return self.start_time + self.next_run
+
+    def run_now(self):
+        """
+        Make the manager due immediately.
+        """
+        self.next_run = self.__current_time()
+
+    def run_at(self, when: float):
+        """
+        Make the manager due at the absolute time when (time.time()).
+        """
+        self.next_run = when - self.start_time
+
+    def _claim_run(self) -> bool:
+        """
+        Returns False if the manager is not due, otherwise schedules the next run and returns True.
+        """
+        if not self.is_due():
+            return False
+
         self._print(f"Processing {self.name}...", False)
+        self.last_run = time.time()
         self.next_run = self.__current_time() + self.interval
+        return True
+
+    def process(self):
+        # Serialize runs of the same manager, a worker pool may call process from several threads
+        with self.lock:
+            if not self._claim_run():
+                return
+
+            try:
+                self._process(self.interval)
+            except Exception as e:
+                self._print(f"Error during process: {e}")
+                if not ErrorCatch.CATCH_ERRORS:
+                    raise e
+
+class AsyncManager(Manager):
+    """
+    Manager with an 'async def' process function.
 
-        try:
-            self._process(self.interval)
-        except Exception as e:
-            self._print(f"Error during process: {e}")
-            if not ErrorCatch.CATCH_ERRORS:
-                raise e
-
-    # def start(self, interval: int):
-    #     self._print(f"Starting {self.name}")
-    #     def run():
-    #         while not self.stop_event.is_set():
-    #             try:
-    #                 self.process(interval)
-    #                 for _ in range(interval):
-    #                     if self.stop_event.is_set():
-    #                         break
-    #                     time.sleep(1)
-    #             except Exception as e:
-    #                 self._print(f"Error, stopping thread: {e}")
-    #                 self.stop_event.set()
-
-    #     self.stop_event = threading.Event()
-    #     self.thread = threading.Thread(target=run)
-    #     self.thread.start()
-
-    # def dispose(self):
-    #     self.stop()
-    #     self._print(f"Disposed {self.name}")
-
-    # def stop(self):
-    #     if self.thread is not None:
-    #         self.stop_event.set()
-    #         self.thread.join()
-    #         self.thread = None
-
-    # def is_alive(self):
-    #     return self.thread is not None and self.thread.is_alive()
\ No newline at end of file
+    Blocking calls (RCON, FTP, Nitrado) should be awaited through run_blocking so the waits
+    of all managers overlap on the event loop. CPU heavy save analysis goes through run_cpu,
+    which uses a separate small executor so it does not hold up the I/O threads.
+    """
+    _cpu_executor: ThreadPoolExecutor = None
+
+    def __init__(self, process, name: str = "", interval: int = 60):
+        super().__init__(process, name, interval)
+        self.async_lock: asyncio.Lock = None
+
+    @staticmethod
+    def _get_cpu_executor() -> ThreadPoolExecutor:
+        if AsyncManager._cpu_executor is None:
+            AsyncManager._cpu_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="save-analysis")
+        return AsyncManager._cpu_executor
+
+    async def run_blocking(self, func, *args, **kwargs):
+        return await asyncio.to_thread(func, *args, **kwargs)
+
+    async def run_cpu(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_cpu_executor(), functools.partial(func, *args, **kwargs))
+
+    async def process_async(self):
+        if self.async_lock is None:
+            self.async_lock = asyncio.Lock()
+
+        async with self.async_lock:
+            if not self._claim_run():
+                return
+
+            try:
+                await self._process(self.interval)
+            except Exception as e:
+                self._print(f"Error during process: {e}")
+                if not ErrorCatch.CATCH_ERRORS:
+                    raise e
+
+    def process(self):
+        # Lets the sequential and worker pool schedulers run async managers as well
+        with self.lock:
+            if not self.is_due():
+                return
+            asyncio.run(self.process_async())
@@ -1,16 +1,18 @@
 from arkparse.api.rcon_api import RconApi
-from .__manager import Manager
+from .__manager import AsyncManager
+from .game_log import GameLogReader, drain
 
-class ChatLogger(Manager):
+class ChatLogger(AsyncManager):
+    latency_sensitive = True
 
-    def __init__(self, rconapi: RconApi):
-        super().__init__(self.__process, "chat logger", 0.5)
+    def __init__(self, rconapi: RconApi, game_log: GameLogReader):
+        super().__init__(self.__process, "chat logger", 60)
         self.rcon : RconApi = rconapi
-        self.log_handle = self.rcon.subscribe()
+        self.log_entries = game_log.subscribe(self)
 
-    def __process(self, interval: int):
-        """Periodically fetch new log entries and process them."""
-        response = self.rcon.get_new_entries(self.log_handle)
+    async def __process(self, interval: int):
+        """Print the log entries the game log reader queued, runs as soon as there are new ones."""
+        response = drain(self.log_entries)
 
         if response and len(response):
             self._print("New log messages:")
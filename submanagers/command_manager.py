@@ -10,30 +10,32 @@ from .save_tracker import SaveTracker
 from arkparse import Classes
 from .raid_base_manager import RaidBaseManager
 from .dino_boss_manager import DinoBossManager
+from .player_presence import PlayerPresence
+from .game_log import GameLogReader, drain
 
 class CommandManager(Manager):
+    latency_sensitive = True
 
-    def __init__(self, rconapi: RconApi, save_tracker: SaveTracker, rbm: RaidBaseManager, dbm: DinoBossManager):
+    def __init__(self, rconapi: RconApi, save_tracker: SaveTracker, rbm: RaidBaseManager, dbm: DinoBossManager, game_log: GameLogReader, presence: PlayerPresence = None):
         super().__init__(self.__process, "command manager", interval=5)
         self.rcon : RconApi = rconapi
-        self.log_handle = self.rcon.subscribe()
+        self.log_entries = game_log.subscribe(self)
         self.save_tracker = save_tracker
         self.rbm = rbm
         self.dbm = dbm
+        self.presence: PlayerPresence = presence if presence is not None else PlayerPresence(rconapi)
 
     @property
     def nr_of_players(self):
-        """Return the number of players currently online."""
-        return len(self.rcon.get_active_players())
+        """Return the number of players currently online, from the shared player presence."""
+        return self.presence.count()
 
     def retrieve_nr_of_dinos(self, bps: list):     
-        d_api = self.save_tracker.dino_api
-        entities = d_api.get_all_filtered(tamed=False, class_names=bps)
-        return len(entities)
+        return self.save_tracker.dino_table.count_classes(bps, tamed=False)
 
     def __process(self, interval: int):
-        """Periodically fetch new log entries and process them."""
-        response = self.rcon.get_new_entries(self.log_handle)
+        """Process the log entries the game log reader queued, runs as soon as there are new ones."""
+        response = drain(self.log_entries)
 
         if response and len(response):
             self._print("New log messages:")
@@ -0,0 +1,92 @@
+import heapq
+import itertools
+import threading
+import time
+from typing import Dict, List
+
+from .__manager import Manager
+
+class DeadlineQueue:
+    """
+    Priority queue of managers ordered on the absolute time of their next run.
+
+    The scheduler sleeps in pop_due until the earliest manager is due, pushing or
+    submitting a manager wakes it up early.
+    """
+
+    def __init__(self):
+        self.__heap = []
+        self.__scheduled: Dict[Manager, float] = {}
+        self.__counter = itertools.count()
+        self.__condition = threading.Condition()
+
+    def __len__(self):
+        with self.__condition:
+            return len(self.__scheduled)
+
+    def push(self, manager: Manager, deadline: float = None):
+        """
+        Schedule the manager at the given deadline, or at its own next run when omitted.
+        A manager is only queued once, the earliest deadline wins.
+        """
+        if deadline is None:
+            deadline = manager.deadline()
+
+        with self.__condition:
+            current = self.__scheduled.get(manager)
+            if current is not None and current <= deadline:
+                return
+            self.__scheduled[manager] = deadline
+            heapq.heappush(self.__heap, (deadline, next(self.__counter), manager))
+            self.__condition.notify()
+
+    def submit(self, manager: Manager, at: float = None):
+        """
+        Run the manager as soon as possible, or at the absolute time at, even if its interval has not passed yet.
+        """
+        if at is None:
+            manager.run_now()
+        else:
+            manager.run_at(at)
+        self.push(manager)
+
+    def next_deadline(self) -> float:
+        with self.__condition:
+            self.__drop_stale()
+            return self.__heap[0][0] if self.__heap else None
+
+    def __drop_stale(self):
+        # Entries that were rescheduled to an earlier deadline are left in the heap, skip them here
+        while self.__heap:
+            deadline, _, manager = self.__heap[0]
+            if self.__scheduled.get(manager) == deadline:
+                return
+            heapq.heappop(self.__heap)
+
+    def pop_due(self, until: float = None) -> List[Manager]:
+        """
+        Block until at least one manager is due or until the absolute time 'until' passes.
+        Returns all due managers in deadline order, possibly an empty list.
+        """
+        with self.__condition:
+            while True:
+                self.__drop_stale()
+                now = time.time()
+                if self.__heap and self.__heap[0][0] <= now:
+                    break
+                if until is not None and now >= until:
+                    return []
+
+                wake_at = self.__heap[0][0] if self.__heap else until
+                if until is not None:
+                    wake_at = min(wake_at, until)
+                self.__condition.wait(None if wake_at is None else max(0.0, wake_at - now))
+
+            due = []
+            now = time.time()
+            while self.__heap and self.__heap[0][0] <= now:
+                deadline, _, manager = heapq.heappop(self.__heap)
+                if self.__scheduled.get(manager) == deadline:
+                    del self.__scheduled[manager]
+                    due.append(manager)
+            return due
@@ -16,9 +16,11 @@ from arkparse.object_model.misc.dino_owner import DinoOwner
 from arkparse.object_model.dinos.tamed_dino import TamedDino
 from arkparse.object_model.structures.structure_with_inventory import StructureWithInventory
 from .__manager import Manager
+from .player_presence import PlayerPresence
 from .time_handler import TimeHandler, PreviousDate
 from .loot_configuration import add_loot
 from .save_tracker import SaveTracker
+from .save_diff import DeltaWatch, SaveDelta, DINO
 
 CONFIG = [
     { "enabled": True,  "type": "land",  "path": "skippy",   "added_levels": 68,  "base_levels": 255, "difficulty_level": 7,  "mixed": False , "blueprint": Classes.dinos.non_tameable.alpha.alpha_raptor       },
@@ -36,9 +38,10 @@ CONFIG = [
 ]
 
 class DinoBossManager(Manager):
-    def __init__(self, rconapi: RconApi, save_tracker: SaveTracker):
+    def __init__(self, rconapi: RconApi, save_tracker: SaveTracker, presence: PlayerPresence = None):
         super().__init__(self.__process, "dino boss manager", 3456)
         self.rcon: RconApi = rconapi
+        self.presence: PlayerPresence = presence if presence is not None else PlayerPresence(rconapi)
 
         self.save_tracker: SaveTracker = save_tracker
         self.time_handler: TimeHandler = TimeHandler()
@@ -46,6 +49,10 @@ class DinoBossManager(Manager):
 
         self.menagerie_state = MenagerieState()
 
+        # A member can only have been killed if a dino of its class was removed or changed
+        self.member_watch = DeltaWatch(self.__members_changed)
+        self.save_tracker.subscribe_deltas(self.member_watch.on_delta)
+
     def get_nr_of_dinos(self) -> int:
         return self.menagerie_state.number_active
 
@@ -66,6 +73,10 @@ class DinoBossManager(Manager):
 
         return None
 
+    def __members_changed(self, delta: SaveDelta) -> bool:
+        blueprints = set(member.blueprint for member in self.menagerie_state.members)
+        return any(c.blueprint in blueprints for c in delta.removed_of(DINO) + delta.changed_of(DINO))
+
     def __is_dino_killed(self, menagerie_state: MenagerieMemberState) -> bool:
         dino = self.__get_dino(menagerie_state)
         if dino is None:
@@ -135,14 +146,19 @@ class DinoBossManager(Manager):
     def main(self):
         self._print(f"Evaluating the dread menagerie, there are {self.menagerie_state.number_active} active members")
 
+        generation_id = self.save_tracker.generation_id
+        check_killed = self.member_watch.needs_check(generation_id)
+        if not check_killed:
+            self._print("No menagerie dinos were removed or changed since the last check")
+
         to_remove = []
         for member in self.menagerie_state.members:
-            if self.__is_dino_killed(member):
+            if check_killed and self.__is_dino_killed(member):
                 self._print(f"Marking monster from menagerie state for removal, it was killed")
                 self.rcon.send_message(f"A dread monster has been slain at {member.mapcoords}")
                 to_remove.append(member)
             else:
-                active_players = len(self.rcon.get_active_players())
+                active_players = self.presence.count()
                 message = ""
                 if active_players > 3:
                     dino: TamedDino = self.__get_dino(member)
@@ -158,31 +174,31 @@ class DinoBossManager(Manager):
         for member in to_remove:
             self.menagerie_state.remove_member(member)
             self._print(f"Removed member {member} from menagerie state")
+        if check_killed:
+            self.member_watch.checked(generation_id)
 
         self._print(f"After evaluation, there are {self.menagerie_state.number_active} active members")
 
-        if self.menagerie_state.number_active == 0 and time.localtime().tm_hour == 5 and self.time_handler._get_current_day() == "Saturday":
-            self.save_tracker.stop_and_update()
-            
-            self._print("All dread monsters have been slain, spawning new ones...")
-            while self.menagerie_state.number_active < 2:
-                mem = self.spawn_new()
-                self._print_tp_command(mem)
-
-            self._print(f"Resetting location of all members in the menagerie")
-            for member in self.menagerie_state.members:
-                dino: TamedDino = self.__get_dino(member)
-                if dino is None:
-                    raise ValueError(f"Could not find dino for member {member}")
-                dino.set_location(member.location)
-                member.mapcoords = member.location.as_map_coords(ArkMap.RAGNAROK)
-
-            self.__put_save()
-
-    def __put_save(self):
-        self.save_tracker.put_save()
-        # store_path = Path("D:\\SteamLibrary\\steamapps\\common\\ARK Survival Ascended\\ShooterGame\\Saved\\SavedArksLocal\\Ragnarok_WP\\Ragnarok_WP.ark")
-        # self.save_tracker.save.store_db(store_path)
+    def needs_maintenance(self) -> bool:
+        return self.menagerie_state.number_active == 0 and self.time_handler._get_current_day() == "Saturday"
+
+    def maintain(self):
+        """
+        Spawns a new menagerie once all members are slain. Called from the maintenance window.
+        """
+        self._print("All dread monsters have been slain, spawning new ones...")
+        self.member_watch.invalidate()
+        while self.menagerie_state.number_active < 2:
+            mem = self.spawn_new()
+            self._print_tp_command(mem)
+
+        self._print(f"Resetting location of all members in the menagerie")
+        for member in self.menagerie_state.members:
+            dino: TamedDino = self.__get_dino(member)
+            if dino is None:
+                raise ValueError(f"Could not find dino for member {member}")
+            dino.set_location(member.location)
+            member.mapcoords = member.location.as_map_coords(ArkMap.RAGNAROK)
 
     def _print_tp_command(self, member: MenagerieMemberState):
         loc = member.location
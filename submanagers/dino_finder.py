@@ -3,17 +3,22 @@ from uuid import UUID
 
 from arkparse.enums import ArkStat
 from .__manager import Manager
+from .player_presence import PlayerPresence
 from .save_tracker import SaveTracker
-from arkparse.api import RconApi, DinoApi
+from .entity_tables import DinoTable
+from arkparse.api import RconApi
 from arkparse.object_model.dinos.dino import Dino
 from arkparse.enums import ArkMap
 from arkparse import Classes
 import random
 
+import numpy as np
+
 class DinoFinder(Manager):
-    def __init__(self, save_tracker: SaveTracker, rconapi: RconApi, map: ArkMap):
+    def __init__(self, save_tracker: SaveTracker, rconapi: RconApi, map: ArkMap, presence: PlayerPresence = None):
         super().__init__(self.__process, "Dino finder", 1654)
         self.rcon_api: RconApi = rconapi
+        self.presence: PlayerPresence = presence if presence is not None else PlayerPresence(rconapi)
         self.map: ArkMap = map
         self.save_tracker: SaveTracker = save_tracker
         self.level_limits: List[int] = [0, 150]
@@ -27,26 +32,21 @@ class DinoFinder(Manager):
 
     def __process(self, _: int = 0):        
         # self._print("Starting dino finder process")
-        dino_api: DinoApi = self.save_tracker.get_api(DinoApi)
-        dino_api.get_all()
+        table: DinoTable = self.save_tracker.dino_table
         # self._print("Retrieved dinos...")        
 
-        online_players = len(self.rcon_api.get_active_players())
+        online_players = self.presence.count()
         stat_search = 20 + online_players * 5
 
-        candidates = {}
-        while len(candidates) == 0:
-            candidates: Dict[UUID: Dino] = dino_api.get_all_filtered(
-                level_lower_bound= self.level_limits[0],
-                level_upper_bound= self.level_limits[1],
-                tamed=False,
-                stats=self.wanted_stats,
-                stat_minimum=stat_search,
-                class_names=self.wanted
-            )
-
-            if len(candidates) == 0:
-                stat_search -= 1
+        # Highest wanted stat of every eligible dino, the threshold is lowered from stat_search
+        # until a dino reaches it, which is the highest value found if that is below stat_search
+        eligible = self.__eligible(table)
+        if not eligible.any():
+            self._print("No wild dinos to choose from")
+            return
+        best = table.stat_values(mutated=True)[:, [stat.value for stat in self.wanted_stats]].max(axis=1)
+        stat_search = min(stat_search, int(best[eligible].max()))
+        candidates: Dict[UUID, Dino] = table.select(eligible & (best >= stat_search))
 
         self._print(f"Found {len(candidates)} candidates with stats >= {stat_search}")
 
@@ -55,4 +55,12 @@ class DinoFinder(Manager):
         self._print(f"Randomly selected dino: {random_choice.get_short_name()} (lvl {random_choice.stats.current_level})")
         self._print(f"Stats: {random_choice.stats.base_stat_points}")
 
-        self.rcon_api.send_message(f"There is a creature with a core stat of {stat_search}+ running around at {random_choice.location.as_map_coords(self.map)}! Go get it!")
\ No newline at end of file
+        self.rcon_api.send_message(f"There is a creature with a core stat of {stat_search}+ running around at {random_choice.location.as_map_coords(self.map)}! Go get it!")
+
+    def __eligible(self, table: DinoTable) -> np.ndarray:
+        return table.mask(
+            level_lower_bound= self.level_limits[0],
+            level_upper_bound= self.level_limits[1],
+            tamed=False,
+            class_names=self.wanted
+        )
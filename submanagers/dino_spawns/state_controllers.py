@@ -1,11 +1,12 @@
 import random
+import numpy as np
 from arkparse.parsing.struct.actor_transform import ActorTransform, MapCoords
 from arkparse.enums import ArkMap
 from arkparse.api import StructureApi
 from pathlib import Path
 
 import json
-from typing import List
+from typing import Dict, List, Tuple
 from uuid import UUID, uuid4
 
 class MenagerieMemberState:
@@ -218,6 +219,22 @@ class MenagerieState:
 class LocationController:
     _LAND_PATH = Path(__file__).parent / "land_dino_spawns.json"
     _WATER_PATH = Path(__file__).parent / "water_dino_spawns.json"
+    _MIN_DISTANCE_TO_USED = 100
+    _MAX_STRUCTURES = 15
+
+    # Spawn points per file as loaded from json and as an n x 3 coordinate array, reloaded when the file changes
+    _spawns: Dict[Path, Tuple[float, list, np.ndarray]] = {}
+
+    @staticmethod
+    def _get_spawns(path: Path) -> Tuple[list, np.ndarray]:
+        mtime = path.stat().st_mtime
+        cached = LocationController._spawns.get(path)
+        if cached is None or cached[0] != mtime:
+            with open(path, 'r') as file:
+                locations = json.load(file)
+            coordinates = np.array([(at.x, at.y, at.z) for at in (ActorTransform.from_json(loc) for loc in locations)], dtype=np.float64).reshape(-1, 3)
+            cached = LocationController._spawns[path] = (mtime, locations, coordinates)
+        return cached[1], cached[2]
 
     @staticmethod
     def get_random_free_location(loc_type: str, structure_api: StructureApi, dont_use: List[ActorTransform] = [], map: ArkMap = ArkMap.RAGNAROK) -> ActorTransform:
@@ -225,33 +242,27 @@ class LocationController:
             loc_type = random.choice(["land", "water"])
         
         if loc_type == "land":
-            with open(LocationController._LAND_PATH, 'r') as file:
-                locations = json.load(file)
+            locations, coordinates = LocationController._get_spawns(LocationController._LAND_PATH)
         elif loc_type == "water":
-            with open(LocationController._WATER_PATH, 'r') as file:
-                locations = json.load(file)
+            locations, coordinates = LocationController._get_spawns(LocationController._WATER_PATH)
         else:
             raise ValueError(f"Unknown location type: {loc_type}")
 
-        actor_transforms = [ActorTransform.from_json(loc) for loc in locations]
-
-        filtered = []
-        for loc in actor_transforms:
-            no_use = False
-            too_many_structures = False
-            for dont in dont_use:
-                if loc.get_distance_to(dont) < 100:
-                    no_use = True
-
+        # Spawn points too close to a used location, checked against all used locations at once
+        free = np.ones(len(locations), dtype=bool)
+        used = np.array([(at.x, at.y, at.z) for at in dont_use if not at.in_cryopod], dtype=np.float64).reshape(-1, 3)
+        if len(used) > 0:
+            distances = np.linalg.norm(coordinates[:, None, :] - used[None, :, :], axis=2)
+            free &= ~(distances < LocationController._MIN_DISTANCE_TO_USED).any(axis=1)
+
+        # The first free candidate in random order is a uniform pick among all valid locations,
+        # so the structures only need to be counted until one is found
+        candidates = np.flatnonzero(free).tolist()
+        random.shuffle(candidates)
+        for i in candidates:
+            loc = ActorTransform.from_json(locations[i])
             structures_at_loc = structure_api.get_at_location(map, loc.as_map_coords(map), radius=2)
+            if len(structures_at_loc) <= LocationController._MAX_STRUCTURES:
+                return loc
 
-            if len(structures_at_loc) > 15:
-                too_many_structures = True
-
-            if not no_use and not too_many_structures:
-                filtered.append(loc)
-
-        if len(filtered) == 0:
-            raise ValueError("No valid locations found")
-        
-        return random.choice(filtered)
+        raise ValueError("No valid locations found")
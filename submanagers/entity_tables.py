@@ -0,0 +1,265 @@
+from typing import Dict, List, Tuple
+from uuid import UUID
+
+import numpy as np
+
+from arkparse.api import DinoApi, StructureApi
+from arkparse.enums import ArkStat
+from arkparse.object_model.dinos.baby import Baby
+from arkparse.object_model.dinos.dino import Dino
+from arkparse.object_model.dinos.stats import STAT_POSITION_MAP
+from arkparse.object_model.dinos.tamed_dino import TamedDino
+from arkparse.object_model.structures.structure import Structure
+
+NO_TEAM = -1
+STAT_COUNT = len(ArkStat)
+
+class _ClassColumn:
+    """
+    Blueprints stored as small integer ids, filtering on a list of classes compares ids only.
+    """
+
+    def __init__(self, blueprints: List[str]):
+        self.classes: List[str] = []
+        self.ids: Dict[str, int] = {}
+        column = np.empty(len(blueprints), dtype=np.int32)
+        for i, blueprint in enumerate(blueprints):
+            id_ = self.ids.get(blueprint)
+            if id_ is None:
+                id_ = self.ids[blueprint] = len(self.classes)
+                self.classes.append(blueprint)
+            column[i] = id_
+        self.column = column
+
+    def mask(self, class_names: List[str]) -> np.ndarray:
+        ids = [self.ids[name] for name in class_names if name in self.ids]
+        return np.isin(self.column, ids)
+
+    def counts(self, mask: np.ndarray = None) -> Dict[str, int]:
+        column = self.column if mask is None else self.column[mask]
+        ids, counts = np.unique(column, return_counts=True)
+        return {self.classes[i]: int(c) for i, c in zip(ids, counts)}
+
+def _location(transform) -> Tuple[float, float, float]:
+    if transform is None:
+        return (np.nan, np.nan, np.nan)
+    return (transform.x, transform.y, transform.z)
+
+class DinoTable:
+    """
+    Columnar snapshot of every dino in a save, cryopodded ones included.
+
+    Built once per save generation from the parsed dinos. Filters, counts and top-k queries
+    work on NumPy arrays and follow the semantics of the DinoApi method they stand in for.
+    Location columns are NaN for dinos without a known location.
+    """
+
+    def __init__(self, dinos: Dict[UUID, Dino]):
+        self.dinos = dinos
+        self.uuids: List[UUID] = list(dinos.keys())
+        values = list(dinos.values())
+        n = len(values)
+
+        self.classes = _ClassColumn([d.object.blueprint for d in values])
+        self.location = np.empty((n, 3), dtype=np.float64)
+        self.level = np.empty(n, dtype=np.int32)
+        self.base = np.zeros((n, STAT_COUNT), dtype=np.int32)
+        self.mutated = np.zeros((n, STAT_COUNT), dtype=np.int32)
+        self.added = np.zeros((n, STAT_COUNT), dtype=np.int32)
+        self.tamed = np.empty(n, dtype=bool)
+        self.cryopodded = np.empty(n, dtype=bool)
+        self.baby = np.empty(n, dtype=bool)
+        self.team = np.full(n, NO_TEAM, dtype=np.int64)
+        self.__class_counts: Dict[bool, Dict[str, int]] = {}
+
+        for i, dino in enumerate(values):
+            stats = dino.stats
+            self.level[i] = stats.current_level
+            for position, name in STAT_POSITION_MAP.items():
+                self.base[i, position] = getattr(stats.base_stat_points, name)
+                self.mutated[i, position] = getattr(stats.mutated_stat_points, name)
+                self.added[i, position] = getattr(stats.added_stat_points, name)
+            is_tamed = isinstance(dino, TamedDino)
+            self.tamed[i] = is_tamed
+            self.cryopodded[i] = is_tamed and dino.cryopod is not None
+            self.baby[i] = isinstance(dino, Baby)
+            if is_tamed and dino.owner is not None and dino.owner.target_team is not None:
+                self.team[i] = dino.owner.target_team
+            try:
+                self.location[i] = _location(dino.location)
+            except Exception:
+                self.location[i] = _location(None)
+
+    @staticmethod
+    def build(dino_api: DinoApi) -> "DinoTable":
+        return DinoTable(dino_api.get_all())
+
+    def __len__(self):
+        return len(self.uuids)
+
+    def stat_values(self, base: bool = False, mutated: bool = False) -> np.ndarray:
+        """
+        Stat points per dino and ArkStat, the same sum as DinoStats.get.
+        """
+        if base and mutated:
+            raise ValueError("Cannot get base and mutated stats at the same time")
+        if base:
+            return self.base
+        if mutated:
+            return self.base + self.mutated
+        return self.base + self.mutated + self.added
+
+    def mask(self, level_lower_bound: int = None, level_upper_bound: int = None, class_names: List[str] = None,
+             tamed: bool = None, include_cryopodded: bool = True, only_cryopodded: bool = False,
+             stat_minimum: int = None, stats: List[ArkStat] = None, baby: bool = None) -> np.ndarray:
+        """
+        Boolean mask of the dinos DinoApi.get_all_filtered would return, baby narrows it down further.
+        """
+        mask = np.ones(len(self), dtype=bool)
+        if level_lower_bound is not None:
+            mask &= self.level >= level_lower_bound
+        if level_upper_bound is not None:
+            mask &= self.level <= level_upper_bound
+        if class_names is not None:
+            mask &= self.classes.mask(class_names)
+        if tamed is not None:
+            mask &= self.tamed if tamed else ~self.tamed
+        if not include_cryopodded:
+            mask &= ~self.cryopodded
+        if only_cryopodded:
+            mask &= self.cryopodded
+        if baby is not None:
+            mask &= self.baby if baby else ~self.baby
+        if stat_minimum is not None:
+            values = self.stat_values(mutated=True)
+            if stats is not None:
+                values = values[:, [stat.value for stat in stats]]
+            mask &= (values >= stat_minimum).any(axis=1)
+        return mask
+
+    def count(self, **filters) -> int:
+        return int(np.count_nonzero(self.mask(**filters)))
+
+    def select(self, mask: np.ndarray) -> Dict[UUID, Dino]:
+        return {self.uuids[i]: self.dinos[self.uuids[i]] for i in np.flatnonzero(mask)}
+
+    def class_counts(self, tamed: bool = None) -> Dict[str, int]:
+        """
+        Number of dinos per blueprint, wild or tamed only if tamed is given. Computed once per table.
+        """
+        counts = self.__class_counts.get(tamed)
+        if counts is None:
+            mask = None if tamed is None else (self.tamed if tamed else ~self.tamed)
+            counts = self.__class_counts.setdefault(tamed, self.classes.counts(mask))
+        return counts
+
+    def count_classes(self, class_names: List[str], tamed: bool = None) -> int:
+        """
+        Same as count(class_names=class_names, tamed=tamed), read from the class counts.
+        """
+        counts = self.class_counts(tamed)
+        return sum(counts.get(name, 0) for name in set(class_names))
+
+    def filtered(self, **filters) -> Dict[UUID, Dino]:
+        return self.select(self.mask(**filters))
+
+    def top_k(self, values: np.ndarray, k: int, mask: np.ndarray = None) -> List[Tuple[Dino, float]]:
+        """
+        The k dinos with the highest values, highest first, ties in table order.
+        """
+        indices = np.arange(len(self)) if mask is None else np.flatnonzero(mask)
+        if len(indices) == 0 or k <= 0:
+            return []
+        selected = values[indices]
+        if k < len(indices):
+            # argpartition picks any of the dinos tied with the k-th value, take the first ones instead
+            kth = -np.partition(-selected, k - 1)[k - 1]
+            above = np.flatnonzero(selected > kth)
+            tied = np.flatnonzero(selected == kth)[:k - len(above)]
+            part = np.sort(np.concatenate((above, tied)))
+        else:
+            part = np.arange(len(indices))
+        order = part[np.argsort(-selected[part], kind="stable")]
+        return [(self.dinos[self.uuids[indices[i]]], selected[i].item()) for i in order]
+
+    def best_for_stat(self, classes: List[str] = None, stat: ArkStat = None, only_tamed: bool = False, only_untamed: bool = False,
+                      base_stat: bool = False, mutated_stat: bool = False, level_upper_bound: int = None) -> Tuple[Dino, int, ArkStat]:
+        """
+        Same result as DinoApi.get_best_dino_for_stat, ties go to the first dino.
+        """
+        if only_tamed and only_untamed:
+            raise ValueError("Cannot specify both only_tamed and only_untamed")
+
+        mask = self.mask(class_names=classes, level_upper_bound=level_upper_bound)
+        if only_tamed:
+            mask &= self.tamed
+        if only_untamed:
+            mask &= ~self.tamed
+        indices = np.flatnonzero(mask)
+        if len(indices) == 0:
+            return None, None, stat
+
+        values = self.stat_values(base_stat, mutated_stat)[indices]
+        if stat is not None:
+            per_dino = values[:, stat.value]
+            stats = None
+        else:
+            # DinoStats.get_highest_stat only counts a stat when it is above 0
+            best_columns = np.argmax(values, axis=1)
+            per_dino = np.maximum(values[np.arange(len(indices)), best_columns], 0)
+            stats = best_columns
+        best = int(np.argmax(per_dino))
+
+        best_stat = stat
+        if stats is not None:
+            best_stat = ArkStat(int(stats[best])) if per_dino[best] > 0 else None
+        return self.dinos[self.uuids[indices[best]]], per_dino[best].item(), best_stat
+
+    def team_counts(self, mask: np.ndarray = None) -> Dict[int, int]:
+        """
+        Number of dinos per owning team, dinos without a team are left out.
+        """
+        teams = self.team if mask is None else self.team[mask]
+        teams = teams[teams != NO_TEAM]
+        ids, counts = np.unique(teams, return_counts=True)
+        return {int(t): int(c) for t, c in zip(ids, counts)}
+
+class StructureTable:
+    """
+    Columnar snapshot of every structure in a save: class, location and owning team.
+    """
+
+    def __init__(self, structures: Dict[UUID, Structure]):
+        self.structures = structures
+        self.uuids: List[UUID] = list(structures.keys())
+        values = list(structures.values())
+        n = len(values)
+
+        self.classes = _ClassColumn([s.object.blueprint for s in values])
+        self.location = np.empty((n, 3), dtype=np.float64)
+        self.team = np.full(n, NO_TEAM, dtype=np.int64)
+        for i, structure in enumerate(values):
+            self.location[i] = _location(structure.location)
+            if structure.owner is not None and structure.owner.tribe_id is not None:
+                self.team[i] = structure.owner.tribe_id
+
+    @staticmethod
+    def build(structure_api: StructureApi) -> "StructureTable":
+        return StructureTable(structure_api.get_all())
+
+    def __len__(self):
+        return len(self.uuids)
+
+    def mask(self, class_names: List[str] = None, team: int = None) -> np.ndarray:
+        mask = np.ones(len(self), dtype=bool)
+        if class_names is not None:
+            mask &= self.classes.mask(class_names)
+        if team is not None:
+            mask &= self.team == team
+        return mask
+
+    def count(self, **filters) -> int:
+        return int(np.count_nonzero(self.mask(**filters)))
+
+    def select(self, mask: np.ndarray) -> Dict[UUID, Structure]:
+        return {self.uuids[i]: self.structures[self.uuids[i]] for i in np.flatnonzero(mask)}
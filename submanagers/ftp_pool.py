@@ -0,0 +1,164 @@
+import ftplib
+import threading
+import time
+from contextlib import contextmanager
+from typing import List
+
+from arkparse.ftp.ark_ftp_client import ArkFtpClient, ArkMap
+
+# Errors after which a connection is no longer trusted and gets replaced
+CONNECTION_ERRORS = ftplib.all_errors
+
+class LatencyStats:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last = 0.0
+
+    def add(self, latency: float):
+        self.count += 1
+        self.total += latency
+        self.last = latency
+        self.max = max(self.max, latency)
+
+    @property
+    def average(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def __str__(self):
+        return f"last={self.last * 1000:.0f}ms avg={self.average * 1000:.0f}ms max={self.max * 1000:.0f}ms n={self.count}"
+
+class _PooledClient:
+    def __init__(self, client: ArkFtpClient):
+        self.client = client
+        self.last_used = time.monotonic()
+
+class FtpPool:
+    """
+    Shares logged-in FTP connections between the managers.
+
+    Connections are reused as long as they work. A connection that was idle for longer than
+    check_after seconds is checked with a NOOP before it is handed out, and a connection that
+    raised an FTP or socket error is closed instead of being put back. keep_alive() sends a
+    NOOP on idle connections so the server does not drop them between save checks.
+    """
+
+    def __init__(self, ftp_config: str, map: ArkMap, max_idle: int = 2, check_after: float = 15, idle_timeout: float = 240):
+        self.ftp_config = ftp_config
+        self.map = map
+        self.max_idle = max_idle
+        self.check_after = check_after
+        self.idle_timeout = idle_timeout
+
+        self.connects = 0
+        self.failures = 0
+        self.connect_latency = LatencyStats()
+        self.noop_latency = LatencyStats()
+
+        self.__idle: List[_PooledClient] = []
+        self.__lock = threading.Lock()
+
+    def _print(self, message):
+        current_time = time.strftime("%H:%M:%S", time.localtime())
+        print(f"[{current_time}][ftp pool] {message}")
+
+    def __connect(self) -> _PooledClient:
+        start = time.monotonic()
+        client = ArkFtpClient.from_config(self.ftp_config, self.map)
+        with self.__lock:
+            self.connects += 1
+            self.connect_latency.add(time.monotonic() - start)
+        return _PooledClient(client)
+
+    def __close(self, pooled: _PooledClient):
+        try:
+            pooled.client.close()
+        except CONNECTION_ERRORS:
+            # Already broken, nothing left to close cleanly
+            pooled.client.connected = False
+
+    def __is_alive(self, pooled: _PooledClient) -> bool:
+        start = time.monotonic()
+        try:
+            pooled.client.ftp.voidcmd("NOOP")
+        except CONNECTION_ERRORS:
+            return False
+        with self.__lock:
+            self.noop_latency.add(time.monotonic() - start)
+        pooled.last_used = time.monotonic()
+        return True
+
+    def __checkout(self) -> _PooledClient:
+        while True:
+            with self.__lock:
+                pooled = self.__idle.pop() if self.__idle else None
+
+            if pooled is None:
+                return self.__connect()
+
+            idle = time.monotonic() - pooled.last_used
+            if idle > self.idle_timeout or (idle > self.check_after and not self.__is_alive(pooled)):
+                self.__close(pooled)
+                continue
+            return pooled
+
+    def __checkin(self, pooled: _PooledClient):
+        pooled.last_used = time.monotonic()
+        with self.__lock:
+            if len(self.__idle) < self.max_idle:
+                self.__idle.append(pooled)
+                return
+        self.__close(pooled)
+
+    @contextmanager
+    def client(self):
+        """
+        Borrow a connected ArkFtpClient for the duration of the with block.
+        The connection is dropped if the block fails with an FTP or socket error.
+        """
+        pooled = self.__checkout()
+        try:
+            yield pooled.client
+        except CONNECTION_ERRORS:
+            with self.__lock:
+                self.failures += 1
+            self.__close(pooled)
+            raise
+        except BaseException:
+            # Not a connection problem, the connection itself is still usable
+            self.__checkin(pooled)
+            raise
+        else:
+            self.__checkin(pooled)
+
+    def keep_alive(self):
+        """
+        NOOP the idle connections that are close to timing out and drop the ones that died.
+        """
+        with self.__lock:
+            idle = self.__idle
+            self.__idle = []
+
+        for pooled in idle:
+            if time.monotonic() - pooled.last_used > self.check_after and not self.__is_alive(pooled):
+                self.__close(pooled)
+                continue
+            self.__checkin(pooled)
+
+    def reset(self):
+        """
+        Close all idle connections, the next client() call logs in again.
+        """
+        with self.__lock:
+            idle = self.__idle
+            self.__idle = []
+        for pooled in idle:
+            self.__close(pooled)
+
+    def close(self):
+        self.reset()
+
+    def report(self) -> str:
+        with self.__lock:
+            return f"connects={self.connects} failures={self.failures} idle={len(self.__idle)} connect: {self.connect_latency} noop: {self.noop_latency}"
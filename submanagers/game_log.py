@@ -0,0 +1,64 @@
+import queue
+import threading
+from typing import Callable, List, Tuple
+
+from arkparse.api.rcon_api import RconApi, GameLogEntry
+
+from .__manager import AsyncManager, Manager
+
+def drain(entries: "queue.Queue[GameLogEntry]") -> List[GameLogEntry]:
+    """
+    Take every entry that is waiting in a subscription queue, without blocking.
+    """
+    drained = []
+    while True:
+        try:
+            drained.append(entries.get_nowait())
+        except queue.Empty:
+            return drained
+
+class GameLogReader(AsyncManager):
+    """
+    Reads the game log for every consumer, one getgamelog round trip per poll.
+
+    Consumers subscribe for a queue that receives every new GameLogEntry in order. A consumer
+    that passes itself to subscribe is submitted to the scheduler as soon as entries were
+    queued for it, so it reacts within one poll instead of waiting for its own interval.
+    """
+
+    latency_sensitive = True
+
+    def __init__(self, rconapi: RconApi, submit: Callable[[Manager], None] = None, interval: float = 0.5):
+        super().__init__(self.__process, "game log reader", interval)
+        self.rcon: RconApi = rconapi
+        self.submit = submit
+        self.log_handle = self.rcon.subscribe()
+        self.__subscribers: List[Tuple[queue.Queue, Manager]] = []
+        self.__lock = threading.Lock()
+
+    def subscribe(self, consumer: Manager = None) -> "queue.Queue[GameLogEntry]":
+        entries = queue.Queue()
+        with self.__lock:
+            self.__subscribers.append((entries, consumer))
+        return entries
+
+    def unsubscribe(self, entries: queue.Queue):
+        with self.__lock:
+            self.__subscribers = [s for s in self.__subscribers if s[0] is not entries]
+
+    async def __process(self, interval: int):
+        """Fetch the new log entries once and hand them to every subscriber."""
+        entries = await self.run_blocking(self.rcon.get_new_entries, self.log_handle)
+        self.dispatch(entries)
+
+    def dispatch(self, entries: List[GameLogEntry]):
+        if not entries:
+            return
+
+        with self.__lock:
+            subscribers = list(self.__subscribers)
+        for queued, consumer in subscribers:
+            for entry in entries:
+                queued.put(entry)
+            if consumer is not None and self.submit is not None:
+                self.submit(consumer)
@@ -0,0 +1,56 @@
+import threading
+import time
+from typing import Callable, Dict
+
+from .__manager import Manager
+from .save_generation import SaveGeneration
+from .save_tracker import SaveTracker
+
+IDLE_INTERVAL = 6 * 60 * 60
+
+class GenerationConsumer:
+    def __init__(self, manager: Manager, min_interval: float):
+        self.manager = manager
+        self.min_interval = min_interval
+        self.generation_id: int = None
+
+class GenerationTrigger:
+    """
+    Runs save consumers once per published save generation instead of on a fixed timer.
+
+    Every time the save tracker publishes a generation the registered managers are submitted to
+    the scheduler. With min_interval a manager runs at most that often, a generation published
+    sooner is picked up once the interval has passed and several generations arriving in the
+    meantime result in a single run on the latest one. Without new saves the managers only run
+    every idle_interval.
+    """
+
+    def __init__(self, save_tracker: SaveTracker, submit: Callable[[Manager, float], None]):
+        self.save_tracker: SaveTracker = save_tracker
+        self.submit = submit
+        self.consumers: Dict[Manager, GenerationConsumer] = {}
+        self.__lock = threading.Lock()
+        save_tracker.subscribe_generations(self.__on_generation)
+
+    def _print(self, message):
+        current_time = time.strftime("%H:%M:%S", time.localtime())
+        print(f"[{current_time}][generation trigger] {message}")
+
+    def register(self, manager: Manager, min_interval: float = 0, idle_interval: float = IDLE_INTERVAL):
+        manager.interval = idle_interval
+        with self.__lock:
+            self.consumers[manager] = GenerationConsumer(manager, min_interval)
+
+    def __on_generation(self, generation: SaveGeneration):
+        now = time.time()
+        with self.__lock:
+            consumers = [c for c in self.consumers.values() if c.generation_id != generation.id]
+            for consumer in consumers:
+                consumer.generation_id = generation.id
+
+        for consumer in consumers:
+            last_run = consumer.manager.last_run
+            at = now if last_run is None else max(now, last_run + consumer.min_interval)
+            if at > now:
+                self._print(f"Save generation {generation.id}: running {consumer.manager.name} in {at - now:.0f}s")
+            self.submit(consumer.manager, at)
@@ -1,37 +1,92 @@
 from pathlib import Path
+import copy
 import json
 import random
-from typing import List
+import threading
+from typing import Dict, List
 
 from arkparse.api import BaseApi
 from arkparse.enums import ArkMap
 from arkparse.parsing.struct import ArkVector
 from arkparse.parsing.struct.actor_transform import MapCoords, ActorTransform
 
+class _LocationEntry:
+    def __init__(self, mtime: float, data: dict):
+        self.mtime = mtime
+        self.data = data
+        uuid = list(data.keys())[0]
+        self.actor_transform = ActorTransform.from_json(data[uuid]['location'])
+        self.map_coords: Dict[ArkMap, MapCoords] = {}
+
 class LocationController:
     _active_location_path: str = Path("D:\\ARK servers\\Ascended\\scripts\\bases\\active_locations.json")
     _locations_folder: str = Path("D:\\ARK servers\\Ascended\\scripts\\bases\\locations\\ragnarok")
 
+    # In-memory catalog of the location files and the active list, reloaded when they change on disk
+    _lock = threading.RLock()
+    _folder_mtime: float = None
+    _names: List[str] = []
+    _entries: Dict[str, _LocationEntry] = {}
+    _active_mtime: float = None
+    _active: list = None
+
+    @staticmethod
+    def _mtime(path: Path) -> float:
+        try:
+            return Path(path).stat().st_mtime
+        except FileNotFoundError:
+            return None
+
+    @staticmethod
+    def _get_entry(location: str) -> _LocationEntry:
+        path = Path(LocationController._locations_folder) / f"{location}"
+        with LocationController._lock:
+            mtime = LocationController._mtime(path)
+            if mtime is None:
+                LocationController._entries.pop(location, None)
+                raise FileNotFoundError(path)
+            entry = LocationController._entries.get(location)
+            if entry is None or entry.mtime != mtime:
+                with open(path, 'r') as file:
+                    entry = _LocationEntry(mtime, json.load(file))
+                LocationController._entries[location] = entry
+            return entry
+
     @staticmethod
     def get_active_locations() -> list:
         """
         Returns a list of active locations from the JSON file.
         """
-        try:
-            with open(LocationController._active_location_path, 'r') as file:
-                locations = json.load(file)
-            return locations
-        except FileNotFoundError:
-            print(f"File not found: {LocationController._active_location_path}")
-            return []
-        except json.JSONDecodeError:
-            print("Error decoding JSON from the file.")
-            return []
+        with LocationController._lock:
+            mtime = LocationController._mtime(LocationController._active_location_path)
+            if LocationController._active is not None and mtime is not None and mtime == LocationController._active_mtime:
+                return list(LocationController._active)
+            try:
+                with open(LocationController._active_location_path, 'r') as file:
+                    locations = json.load(file)
+            except FileNotFoundError:
+                print(f"File not found: {LocationController._active_location_path}")
+                return []
+            except json.JSONDecodeError:
+                print("Error decoding JSON from the file.")
+                return []
+            LocationController._active = locations
+            LocationController._active_mtime = mtime
+            return list(locations)
+
+    @staticmethod
+    def _set_active_locations(locations: list):
+        with LocationController._lock:
+            with open(LocationController._active_location_path, 'w') as file:
+                json.dump(locations, file, indent=4)
+            LocationController._active = list(locations)
+            LocationController._active_mtime = LocationController._mtime(LocationController._active_location_path)
         
     @staticmethod
     def get_available_locations(exclude: List[str]) -> list:
         all = LocationController.get_all_locations()
-        active = LocationController.get_active_locations()
+        active = set(LocationController.get_active_locations())
+        exclude = set(exclude)
         return [loc for loc in all if loc not in active and loc not in exclude]
 
     @staticmethod
@@ -50,10 +105,18 @@ class LocationController:
         """
         Returns the coordinates of a given location from the JSON file.
         """
-        at = LocationController.get_loc_actor_transform(location)
-        if at is None:
+        try:
+            entry = LocationController._get_entry(location)
+        except FileNotFoundError:
+            print(f"Location file not found: {location}")
+            return None
+        except json.JSONDecodeError:
+            print(f"Error decoding JSON for location: {location}")
             return None
-        return at.as_map_coords(map)
+        coords = entry.map_coords.get(map)
+        if coords is None:
+            coords = entry.map_coords[map] = entry.actor_transform.as_map_coords(map)
+        return copy.copy(coords)
         
     @staticmethod
     def get_loc_actor_transform(location: str) -> ActorTransform:
@@ -61,11 +124,7 @@ class LocationController:
         Returns the ActorTransform of a given location from the JSON file.
         """
         try:
-            with open(Path(LocationController._locations_folder) / f"{location}", 'r') as file:
-                data: dict = json.load(file)
-                uuid = list(data.keys())[0]
-                at = ActorTransform.from_json(data[uuid]['location'])
-                return at
+            return copy.copy(LocationController._get_entry(location).actor_transform)
         except FileNotFoundError:
             print(f"Location file not found: {location}")
             return None
@@ -73,24 +132,42 @@ class LocationController:
             print(f"Error decoding JSON for location: {location}")
             return None
 
+    @staticmethod
+    def get_loc_data(location: str) -> dict:
+        """
+        Returns a copy of the contents of a location file.
+        """
+        return copy.deepcopy(LocationController._get_entry(location).data)
         
     @staticmethod
     def get_all_locations() -> list:
         """
         Returns a list of all locations from the JSON file.
         """
-        locations = []
-        try:
-            for loc_file in Path(LocationController._locations_folder).iterdir():
-                if loc_file.is_file() and loc_file.suffix == '.json':
-                    locations.append(loc_file.name)
-        except FileNotFoundError:
-            print(f"File not found in directory: {LocationController._locations_folder}")
-        except json.JSONDecodeError:
-            print("Error decoding JSON from one of the files.")
-        except Exception as e:
-            print(f"Unexpected error: {e}")
-        return locations
+        folder = Path(LocationController._locations_folder)
+        with LocationController._lock:
+            mtime = LocationController._mtime(folder)
+            if mtime is not None and mtime == LocationController._folder_mtime:
+                return list(LocationController._names)
+
+            locations = []
+            try:
+                for loc_file in folder.iterdir():
+                    if loc_file.is_file() and loc_file.suffix == '.json':
+                        locations.append(loc_file.name)
+            except FileNotFoundError:
+                print(f"File not found in directory: {LocationController._locations_folder}")
+                return locations
+            except Exception as e:
+                print(f"Unexpected error: {e}")
+                return locations
+
+            LocationController._names = locations
+            LocationController._folder_mtime = mtime
+            for name in list(LocationController._entries):
+                if name not in locations:
+                    del LocationController._entries[name]
+            return list(locations)
     
     @staticmethod
     def get_random_unblocked_location(base_api: BaseApi, radius: float = 1, owner_tribe_id: int = None, map: ArkMap = ArkMap.RAGNAROK, limit: int = 5):
@@ -110,9 +187,7 @@ class LocationController:
                 filtered = structures
             
             if len(filtered) < limit:
-                with open(LocationController._locations_folder / f"{random_loc}", 'r') as file:
-                    data = json.load(file)
-                    return data, random_loc, coords
+                return LocationController.get_loc_data(random_loc), random_loc, coords
             else:
                 print(f"There are {len(filtered)} other structures around {coords}, cannot spawn here")
 
@@ -124,8 +199,7 @@ class LocationController:
         locations = LocationController.get_active_locations()
         if location not in locations:
             locations.append(location)
-            with open(LocationController._active_location_path, 'w') as file:
-                json.dump(locations, file, indent=4)
+            LocationController._set_active_locations(locations)
             print(f"Location {location} added successfully.")
         else:
             print(f"Location {location} already exists.")
@@ -138,8 +212,7 @@ class LocationController:
         locations = LocationController.get_active_locations()
         if location in locations:
             locations.remove(location)
-            with open(LocationController._active_location_path, 'w') as file:
-                json.dump(locations, file, indent=4)
+            LocationController._set_active_locations(locations)
             print(f"Location {location} removed successfully.")
         else:
             print(f"Location {location} not found.")
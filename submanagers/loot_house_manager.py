@@ -14,6 +14,7 @@ from arkparse.parsing.struct.actor_transform import MapCoords
 
 from submanagers.save_tracker import SaveTracker
 from .__manager import Manager
+from .player_presence import PlayerPresence
 from .locations import LocationController
 from .time_handler import PreviousDate, TimeHandler
 from .loot_configuration import add_loot
@@ -78,13 +79,13 @@ class LootHouseManager(Manager):
     __MAX_TURRETS = 40
     __LOOTHOUSE_PATH = Path(__file__).parent.parent / "loothouse" / "loothouse"
 
-    def __init__(self, save_tracker: SaveTracker, rconapi: RconApi):
+    def __init__(self, save_tracker: SaveTracker, rconapi: RconApi, presence: PlayerPresence = None):
         super().__init__(self.__process, "loot house manager", 2345)
         self.rcon : RconApi = rconapi
+        self.presence: PlayerPresence = presence if presence is not None else PlayerPresence(rconapi)
         self.save_tracker: SaveTracker = save_tracker
         self.time_handler: TimeHandler = TimeHandler()
         self.state = LoothouseState()
-        self.last_timestamp: PreviousDate = None
 
         self.owner: ObjectOwner = ObjectOwner()
 
@@ -96,8 +97,7 @@ class LootHouseManager(Manager):
 
     def _spawn(self):
         self._print("Loothouse is not active, setting up...")
-        self.save_tracker.stop_and_update()
-        
+
         _, location, coords = LocationController.get_random_unblocked_location(self.save_tracker.base_api, radius=1, map=self.save_tracker.map)
         base: Base = self.save_tracker.base_api.import_base(self.__LOOTHOUSE_PATH, LocationController.get_loc_actor_transform(location))
 
@@ -148,25 +148,27 @@ class LootHouseManager(Manager):
         else:
             self._print("Loothouse is not active... No refresh needed.")
 
-    def _update_insertion(self):
-        update = False
+    def needs_maintenance(self) -> bool:
+        needs_removal = not self.state.is_active and not self.state.is_removed
+        needs_spawn = self.time_handler._get_current_day() == "Saturday" and not self.state.is_active
+        return needs_removal or needs_spawn
+
+    def maintain(self):
+        """
+        Cleans up a raided loothouse and spawns a new one on Saturdays. Called from the maintenance window.
+        """
         if not self.state.is_active and not self.state.is_removed:
             self._print("Removing remains of raided loothouse...")
             self.save_tracker.base_api.remove_at_location(self.save_tracker.map, self.state.coordinates, radius=0.1, owner_tribe_name="The administration")
             self.state.set_removed(True)
-            update = True
 
         if not self.time_handler._get_current_day() == "Saturday":
             self._print("It's not Saturday, no update needed.")
         elif not self.state.is_active:
             self._spawn()
-            update = True
-
-        if update:
-            self.save_tracker.put_save()
 
     def _report_status(self):
-        active_players = len(self.rcon.get_active_players())
+        active_players = self.presence.count()
         if active_players >= 3:
             message = f"There is definitely not a vault full of loot at {self.state.coordinates}, no need to go there"
             self._print(message)
@@ -176,11 +178,3 @@ class LootHouseManager(Manager):
 
     def __process(self, interval: int):
         self._refresh_active()
-
-        if time.localtime().tm_hour == 5 and (self.last_timestamp is None or self.last_timestamp.has_been_hour()):
-            self.last_timestamp = PreviousDate()
-            self._print("It's 5 AM, updating loothouse in save...")
-            self._update_insertion()
-
-        if not time.localtime().tm_hour == 5:
-            self._print("It's not 5 AM, no update needed.")
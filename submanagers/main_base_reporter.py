@@ -13,6 +13,7 @@ from arkparse.classes.placed_structures import PlacedStructures
 
 from .__manager import Manager
 from .save_tracker import SaveTracker
+from .save_generation import per_generation
 
 class MainBaseReporter(Manager):
     def __init__(self, save_tracker: SaveTracker, rconapi: RconApi):
@@ -71,6 +72,7 @@ class MainBaseReporter(Manager):
 
         return player_to_tribe
 
+    @per_generation
     def __get_all_signs(self):
         # ArkSaveLogger.enable_debug = True
         signs = {}
@@ -0,0 +1,91 @@
+import time
+from typing import Callable, List
+
+from .__manager import Manager
+from .errorcatch import ErrorCatch
+from .save_tracker import SaveTracker
+from .time_handler import PreviousDate
+
+class MaintenanceMutation:
+    def __init__(self, name: str, apply: Callable[[], None], is_needed: Callable[[], bool]):
+        self.name = name
+        self.apply = apply
+        self.is_needed = is_needed
+
+class MaintenanceWindow(Manager):
+    """
+    Bundles the save changes of all managers into a single daily maintenance window.
+
+    Managers register a mutation (and a check whether it is needed today). Once a day, at
+    the configured hour, the server is stopped and the save downloaded once, all needed
+    mutations are applied to that one save, and it is uploaded and the server started once.
+    """
+
+    def __init__(self, save_tracker: SaveTracker, hour: int = 5):
+        super().__init__(self.__process, "maintenance window", 60)
+        self.save_tracker: SaveTracker = save_tracker
+        self.hour = hour
+        self.mutations: List[MaintenanceMutation] = []
+        self.last_window: PreviousDate = None
+        self.downtimes: List[float] = []
+
+    def register(self, name: str, apply: Callable[[], None], is_needed: Callable[[], bool] = None):
+        """
+        Register a save mutation, apply is called against the freshly downloaded save during the window.
+        """
+        self.mutations.append(MaintenanceMutation(name, apply, is_needed if is_needed is not None else (lambda: True)))
+
+    def __needed_mutations(self) -> List[MaintenanceMutation]:
+        needed = []
+        for mutation in self.mutations:
+            try:
+                if mutation.is_needed():
+                    needed.append(mutation)
+            except Exception as e:
+                self._print(f"Error checking if {mutation.name} needs maintenance: {e}")
+                if not ErrorCatch.CATCH_ERRORS:
+                    raise e
+        return needed
+
+    def run_window(self):
+        needed = self.__needed_mutations()
+        if len(needed) == 0:
+            self._print("No save changes needed, skipping maintenance")
+            return
+
+        self._print(f"Starting maintenance for: {', '.join(m.name for m in needed)}")
+        self.save_tracker.stop_and_update()
+
+        errors = []
+        for mutation in needed:
+            self._print(f"Applying {mutation.name}...")
+            try:
+                mutation.apply()
+            except Exception as e:
+                # Keep going, the server is down and has to come back up with the other changes
+                self._print(f"Error applying {mutation.name}: {e}")
+                errors.append(e)
+
+        if not self.save_tracker.put_save():
+            self._print(f"Maintenance failed, server restarted on the previous save, none of {', '.join(m.name for m in needed)} were applied")
+            return
+
+        downtime = self.save_tracker.last_downtime()
+        if downtime is not None:
+            self.downtimes.append(downtime)
+            self._print(f"Maintenance done, {len(needed) - len(errors)}/{len(needed)} changes applied, total downtime {downtime / 60:.1f} minutes")
+        else:
+            self._print(f"Maintenance done, {len(needed) - len(errors)}/{len(needed)} changes applied, server was not restarted")
+
+        if len(errors) and not ErrorCatch.CATCH_ERRORS:
+            raise errors[0]
+
+    def __process(self, _: int):
+        if time.localtime().tm_hour != self.hour:
+            return
+
+        if self.last_window is not None and not self.last_window.is_new_day():
+            return
+
+        self.last_window = PreviousDate()
+        self.run_window()
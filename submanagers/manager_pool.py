@@ -0,0 +1,108 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+
+from .__manager import Manager
+from .errorcatch import ErrorCatch
+
+class QueueDelay:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last = 0.0
+
+    def add(self, delay: float):
+        self.count += 1
+        self.total += delay
+        self.last = delay
+        self.max = max(self.max, delay)
+
+    @property
+    def average(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def __str__(self):
+        return f"last={self.last:.3f}s avg={self.average:.3f}s max={self.max:.3f}s runs={self.count}"
+
+class ManagerPool:
+    """
+    Runs managers on a bounded pool of worker threads.
+
+    A manager is never queued while a previous run of it is still pending, so a slow
+    manager only ever delays itself. Latency sensitive managers (the RCON pollers and
+    chat handlers) get their own workers so save-heavy jobs cannot starve them.
+    """
+
+    def __init__(self, max_workers: int = 4, fast_workers: int = 2, delay_warning: float = 1.0):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="manager")
+        self.fast_executor = ThreadPoolExecutor(max_workers=fast_workers, thread_name_prefix="fast-manager")
+        self.delay_warning = delay_warning
+        self.queue_delays: Dict[str, QueueDelay] = {}
+        self.errors: List[Exception] = []
+        self.__in_flight = set()
+        self.__lock = threading.Lock()
+
+    def _print(self, message):
+        current_time = time.strftime("%H:%M:%S", time.localtime())
+        print(f"[{current_time}][manager pool] {message}")
+
+    def is_running(self, manager: Manager) -> bool:
+        with self.__lock:
+            return manager in self.__in_flight
+
+    def submit(self, manager: Manager, on_done: Callable[[Manager], None] = None) -> bool:
+        """
+        Queue a run of the manager, returns False if it is already queued or running.
+        on_done is called from the worker once the run finished, also when it failed.
+        """
+        with self.__lock:
+            if manager in self.__in_flight:
+                return False
+            self.__in_flight.add(manager)
+
+        executor = self.fast_executor if manager.latency_sensitive else self.executor
+        executor.submit(self.__run, manager, time.monotonic(), on_done)
+        return True
+
+    def __run(self, manager: Manager, submitted: float, on_done: Callable[[Manager], None]):
+        delay = time.monotonic() - submitted
+        with self.__lock:
+            if manager.name not in self.queue_delays:
+                self.queue_delays[manager.name] = QueueDelay()
+            self.queue_delays[manager.name].add(delay)
+
+        if delay > self.delay_warning:
+            self._print(f"{manager.name} waited {delay:.2f}s in the queue")
+
+        try:
+            manager.process()
+        except Exception as e:
+            self._print(f"Error in {manager.name}: {e}")
+            if not ErrorCatch.CATCH_ERRORS:
+                with self.__lock:
+                    self.errors.append(e)
+        finally:
+            with self.__lock:
+                self.__in_flight.discard(manager)
+            if on_done is not None:
+                on_done(manager)
+
+    def raise_errors(self):
+        """
+        Re-raise the first error a worker ran into, so the scheduler fails like it does in sequential mode.
+        """
+        with self.__lock:
+            if len(self.errors) == 0:
+                return
+            error = self.errors.pop(0)
+        raise error
+
+    def report(self) -> str:
+        with self.__lock:
+            return "\n".join(f"{name}: {delay}" for name, delay in self.queue_delays.items())
+
+    def shutdown(self, wait: bool = True):
+        self.executor.shutdown(wait=wait)
+        self.fast_executor.shutdown(wait=wait)
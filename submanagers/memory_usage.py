@@ -0,0 +1,49 @@
+import os
+from pathlib import Path
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+_STATM = Path("/proc/self/statm")
+
+def current_rss() -> int:
+    """
+    Resident memory of this process in bytes, None if it cannot be determined.
+    Uses psutil when installed and falls back to /proc on Linux.
+    """
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+
+    if _STATM.exists():
+        pages = int(_STATM.read_text().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE")
+
+    return None
+
+def format_bytes(size: int) -> str:
+    if size is None:
+        return "unknown"
+    return f"{size / (1024 * 1024):.0f} MB"
+
+class PeakTracker:
+    """
+    Samples resident memory at the points it is told to and keeps the highest value.
+    """
+
+    def __init__(self):
+        self.start = current_rss()
+        self.peak = self.start
+
+    def sample(self) -> int:
+        rss = current_rss()
+        if rss is not None and (self.peak is None or rss > self.peak):
+            self.peak = rss
+        return rss
+
+    @property
+    def growth(self) -> int:
+        if self.start is None or self.peak is None:
+            return None
+        return self.peak - self.start
@@ -1,10 +1,11 @@
 from arkparse.api.rcon_api import RconApi
 from arkparse.object_model.dinos import TamedDino
-from .__manager import Manager
+from .__manager import AsyncManager
 from .time_handler import TimeHandler
 from .save_tracker import SaveTracker
+from .save_generation import per_generation
 
-class PlatformDinoExposer(Manager):
+class PlatformDinoExposer(AsyncManager):
     ALLOWED_UUIDS = [
         "98b65ea0-4b7f-7249-8b76-082277b260c1"
     ]
@@ -15,10 +16,10 @@ class PlatformDinoExposer(Manager):
         self.save_tracker: SaveTracker = save_tracker
         self.time_handler: TimeHandler = TimeHandler()
 
-    def _process(self, _):
-        tamed = self.save_tracker.dino_api.get_all_tamed()
+    async def _process(self, _):
+        with_saddle_structures = await self.run_cpu(self.__with_saddle_structures)
 
-        for dino in tamed.values():
+        for dino in with_saddle_structures:
             dino: TamedDino
             if len(dino.object.get_property_value("SaddleStructures", [])) > 10:
                 if str(dino.uuid) not in self.ALLOWED_UUIDS:
@@ -38,3 +39,8 @@ class PlatformDinoExposer(Manager):
                 self._print(f"Owner: {dino.owner}")
                 self._print(f"UUID: {dino.uuid}")
                 
+
+    @per_generation
+    def __with_saddle_structures(self):
+        tamed = self.save_tracker.dino_api.get_all_tamed()
+        return [dino for dino in tamed.values() if len(dino.object.get_property_value("SaddleStructures", [])) > 0]
@@ -1,14 +1,19 @@
 from arkparse.api.rcon_api import RconApi, ActivePlayer
 from .__manager import Manager
+from .player_presence import PlayerPresence
 from .time_handler import TimeHandler, PreviousDate
 
 class PlayerActivityManager(Manager):
-    def __init__(self, rconapi: RconApi, time_lock=True):
+    latency_sensitive = True
+
+    def __init__(self, rconapi: RconApi, time_lock=True, presence: PlayerPresence = None):
         super().__init__(self.__process, "player activity manager", 5)
         self.rcon : RconApi = rconapi
+        self.presence: PlayerPresence = presence if presence is not None else PlayerPresence(rconapi)
         self.time_handler: TimeHandler = TimeHandler()
         self.last_active_ts: PreviousDate = None
-        self.prev_players = self.rcon.get_active_players()
+        self.prev_players = self.presence.players()
+        self.presence.subscribe(self.notify_login_logout)
         self.last_print: PreviousDate = None
         self.time_lock = time_lock
 
@@ -19,27 +24,30 @@ class PlayerActivityManager(Manager):
             self.last_print = PreviousDate()
 
         self.expose_players(should_print)
-        current_players = self.rcon.get_active_players()
-        self.notify_login_logout(current_players, self.prev_players)
+        current_players = self.presence.players(max_age=interval)
         self.increase_playtimes(current_players, self.prev_players, interval)
         self.grind_notifier(current_players)
         self.prev_players = current_players
 
     def expose_players(self, p):
-        players = self.rcon.get_active_players(p)
+        players = self.presence.players()
         last : PreviousDate = self.last_active_ts
         
         if players is None:
             return None
         
+        if p:
+            for player in players:
+                print(player)
+
         if last is not None and not last.has_been_quarter_hour():
             return None
         
         message = f"Active players ({self.time_handler.get_hr_min_string()}): "
 
-        for p in players:
-            p : ActivePlayer = p
-            message += p.get_name() + ", "
+        for player in players:
+            player : ActivePlayer = player
+            message += player.get_name() + ", "
 
         self.rcon.send_message(message.strip(" ").strip(","))
         self._print(message)
@@ -47,19 +55,14 @@ class PlayerActivityManager(Manager):
 
         return players
 
-    def notify_login_logout(self, curr_players, prev_players):
-        if curr_players is None or prev_players is None:
-            return
-        
-        for p in curr_players:
+    def notify_login_logout(self, joined, left):
+        for p in joined:
             p : ActivePlayer = p
-            if p not in prev_players:
-                self.rcon.send_message(f"({self.time_handler.get_hr_min_string()}) {p.get_name()} has logged in!")
+            self.rcon.send_message(f"({self.time_handler.get_hr_min_string()}) {p.get_name()} has logged in!")
         
-        for p in prev_players:
+        for p in left:
             p : ActivePlayer = p
-            if p not in curr_players:
-                self.rcon.send_message(f"({self.time_handler.get_hr_min_string()}) {p.get_name()} has logged out!")
+            self.rcon.send_message(f"({self.time_handler.get_hr_min_string()}) {p.get_name()} has logged out!")
 
     def increase_playtimes(self, curr_players, prev_players, add: int):
         if curr_players is None or prev_players is None:
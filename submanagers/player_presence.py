@@ -0,0 +1,85 @@
+import threading
+import time
+from typing import Callable, List
+
+from arkparse.api.rcon_api import RconApi, ActivePlayer
+
+from .__manager import Manager
+
+PLAYER_TTL = 30
+
+class PlayerPresence(Manager):
+    """
+    Shared view of the players online, one listplayers round trip serves every manager.
+
+    When scheduled the players are polled every interval seconds, players() hands out the last
+    snapshot as long as it is at most ttl (or max_age) seconds old and polls RCON otherwise, so
+    it also works without being scheduled. Subscribers are told who joined and who left after
+    every poll, compared on the UE5 id like ActivePlayer does.
+    """
+
+    latency_sensitive = True
+
+    def __init__(self, rconapi: RconApi, interval: int = 5, ttl: float = PLAYER_TTL):
+        super().__init__(self.__process, "player presence", interval)
+        self.rcon: RconApi = rconapi
+        self.ttl = ttl
+        self.__players: List[ActivePlayer] = None
+        self.__polled_at: float = None
+        self.__snapshot_lock = threading.Lock()
+        self.__poll_lock = threading.Lock()
+        self.__subscribers: List[Callable[[List[ActivePlayer], List[ActivePlayer]], None]] = []
+
+    def subscribe(self, callback: Callable[[List[ActivePlayer], List[ActivePlayer]], None]):
+        """
+        Call callback(joined, left) after every poll in which players joined or left.
+        """
+        self.__subscribers.append(callback)
+
+    def __process(self, _: int):
+        self.refresh()
+
+    def __age(self) -> float:
+        return None if self.__polled_at is None else time.monotonic() - self.__polled_at
+
+    def refresh(self) -> List[ActivePlayer]:
+        """
+        Poll RCON now and return the new snapshot.
+        """
+        return self.__poll(None)
+
+    def players(self, max_age: float = None) -> List[ActivePlayer]:
+        """
+        The players online, polled at most max_age (default ttl) seconds ago.
+        """
+        max_age = self.ttl if max_age is None else max_age
+        with self.__snapshot_lock:
+            age = self.__age()
+            if age is not None and age <= max_age:
+                return list(self.__players)
+        return self.__poll(max_age)
+
+    def count(self, max_age: float = None) -> int:
+        return len(self.players(max_age))
+
+    def __poll(self, max_age: float) -> List[ActivePlayer]:
+        with self.__poll_lock:
+            # Another thread may have polled while this one was waiting
+            with self.__snapshot_lock:
+                age = self.__age()
+                if max_age is not None and age is not None and age <= max_age:
+                    return list(self.__players)
+
+            players = self.rcon.get_active_players()
+            with self.__snapshot_lock:
+                previous = self.__players
+                self.__players = players
+                self.__polled_at = time.monotonic()
+
+        if previous is not None:
+            joined = [p for p in players if p not in previous]
+            left = [p for p in previous if p not in players]
+            if joined or left:
+                for callback in self.__subscribers:
+                    callback(joined, left)
+        return list(players)
@@ -13,9 +13,11 @@ from arkparse.object_model.bases.base import Base
 from arkparse.object_model.misc.object_owner import ObjectOwner
 from arkparse.object_model.structures.structure_with_inventory import StructureWithInventory
 from .__manager import Manager
+from .player_presence import PlayerPresence
 from .time_handler import TimeHandler, PreviousDate
 from .loot_configuration import add_loot
 from .save_tracker import SaveTracker
+from .save_diff import DeltaWatch, SaveDelta, STRUCTURE, INVENTORY_CONTENTS, OWNER
 from .locations import LocationController
 from .nitrado_api import NitradoClient
 from arkparse.object_model.ark_game_object import ArkGameObject
@@ -94,9 +96,10 @@ BASE_SIZES = [
 ]
 
 class RaidBaseManager(Manager):
-    def __init__(self, rconapi: RconApi, save_tracker: SaveTracker, base_path: Path):
+    def __init__(self, rconapi: RconApi, save_tracker: SaveTracker, base_path: Path, presence: PlayerPresence = None):
         super().__init__(self.__process, "raid base manager", 450)
         self.rcon: RconApi = rconapi
+        self.presence: PlayerPresence = presence if presence is not None else PlayerPresence(rconapi)
 
         self.save_tracker: SaveTracker = save_tracker
         self.time_handler: TimeHandler = TimeHandler()
@@ -106,9 +109,12 @@ class RaidBaseManager(Manager):
         self.data_ = self.__init_data(self.data_path)
         self.base_path = base_path
         self.config: dict = json.load(open(base_path / "config.json", 'r'))
-        self.last_timestamp: PreviousDate = None
         self.last_message: PreviousDate = None
 
+        # Vaults only change raided state when one is removed, emptied or changes owner
+        self.vault_watch = DeltaWatch(self.__vaults_changed)
+        self.save_tracker.subscribe_deltas(self.vault_watch.on_delta)
+
         self.__save_data(self.data_path)
 
     def get_nr_of_bases(self) -> int:
@@ -139,6 +145,12 @@ class RaidBaseManager(Manager):
                 
         return True
 
+    @staticmethod
+    def __vaults_changed(delta: SaveDelta) -> bool:
+        vault = Classes.structures.placed.utility.vault
+        return any(c.blueprint == vault for c in delta.removed_of(STRUCTURE)) or \
+               any(c.blueprint == vault and (INVENTORY_CONTENTS in c.fields or OWNER in c.fields) for c in delta.changed_of(STRUCTURE))
+
     def __get_main_location(self, loc_file: Path) -> MapCoords:
         jsn = json.load(loc_file.open())
         for loc in jsn.keys():
@@ -306,6 +318,7 @@ class RaidBaseManager(Manager):
 
         self.data_["active_bases"].append(base_status)
         self.__save_data(self.data_path)
+        self.vault_watch.invalidate()
         self._print("[Spawn]Import complete")
 
     def __pad_active_base_generators(self):
@@ -319,6 +332,11 @@ class RaidBaseManager(Manager):
             self._print(f"[Spawn]Fuel added to {nr} generators at {coords}")
 
     def __check_raided(self):
+        generation_id = self.save_tracker.generation_id
+        if not self.vault_watch.needs_check(generation_id):
+            self._print("[Raided]No vault changes since the last check")
+            return
+
         for base in self.data_["active_bases"]:
             file_path = self.base_path / "locations" / \
                 "ragnarok" / base["config"]["location"]
@@ -332,6 +350,7 @@ class RaidBaseManager(Manager):
             else:
                 self._print(f"[Raided]Base at {base['location']} is still raided")
         self.__save_data(self.data_path)
+        self.vault_watch.checked(generation_id)
 
     def __remove_raided(self):
         data_copy = self.data_["active_bases"].copy()
@@ -351,8 +370,23 @@ class RaidBaseManager(Manager):
     def __process(self, interval: int):
         self.main()
 
-    def __put_save(self):
-        self.save_tracker.put_save()
+    def maintain(self):
+        """
+        Removes raided bases, spawns new ones and pads generators. Called from the maintenance window.
+        """
+        self._print("[Main]Spawning and updating bases")
+
+        # remove raided bases
+        self.__remove_raided()
+
+        # spawn up to 5 bases
+        if len(self.data_["active_bases"]) <= 1:
+            for _ in range(5):
+                cfg = self.compose_base()
+                self.spawn_base(cfg)
+
+        # Pad generators
+        self.__pad_active_base_generators()
 
     def _print_tp_command(self, config: dict):
         locations = config["locations"]
@@ -367,27 +401,7 @@ class RaidBaseManager(Manager):
         # check if any bases have been raided
         self.__check_raided()
 
-        if True and (time.localtime().tm_hour == 5 and (self.last_timestamp is None or self.last_timestamp.has_been_hour())):
-            self.save_tracker.stop_and_update()
-
-            self.last_timestamp = PreviousDate()
-            self._print("[Main]Spawning and updating bases")
-            
-            # remove raided bases
-            self.__remove_raided()
-
-            # spawn up to 5 bases
-            if len(self.data_["active_bases"]) <= 1:
-                for _ in range(5):
-                    cfg = self.compose_base()
-                    self.spawn_base(cfg)
-
-            # Pad generators
-            self.__pad_active_base_generators()
-
-            self.__put_save()
-
-        nr_online = len(self.rcon.get_active_players())
+        nr_online = self.presence.count()
 
         # Report active bases
         minutes_since = 150 if self.last_message is None else self.last_message.minutes_since()
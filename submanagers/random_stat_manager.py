@@ -25,6 +25,8 @@ from arkparse.classes.resources import Resources
 from arkparse.classes.placed_structures import PlacedStructures
 import random
 
+import numpy as np
+
 from .__manager import Manager
 from .save_tracker import SaveTracker
 
@@ -40,6 +42,13 @@ class RandomStat(ABC):
         self.value = None
         self.save_tracker = save_tracker
 
+    @property
+    def summary(self) -> "SaveSummary":
+        """
+        Values of all stats for the current save generation, computed on first use.
+        """
+        return self.save_tracker.memo(("SaveSummary",), lambda: SaveSummary(self.save_tracker))
+
     @abstractmethod
     def _get_value(self) -> str:
         pass
@@ -74,7 +83,7 @@ class RandomResourceAmount(RandomStat):
 
     def _get_value(self):
         self.resource_name = list(self.RESOURCES.keys())[random.randint(0, len(self.RESOURCES.keys()) - 1)]
-        self.value = self.save_tracker.get_api(StackableApi).get_count(self.save_tracker.get_api(StackableApi).get_by_class(StackableApi.Classes.RESOURCE, [self.RESOURCES[self.resource_name]]))
+        self.value = self.summary.resources[self.resource_name]
 
     def get_message(self) -> str:
         self._get_value()
@@ -82,7 +91,7 @@ class RandomResourceAmount(RandomStat):
 
 class NumberOfDinos(RandomStat):
     def _get_value(self):
-        self.value = len(self.save_tracker.get_api(DinoApi).get_all_wild())
+        self.value = self.summary.wild_dinos
     
     def get_message(self) -> str:
         self._get_value()
@@ -90,7 +99,7 @@ class NumberOfDinos(RandomStat):
 
 class NumberOfAlphas(RandomStat):
     def _get_value(self):
-        self.value = len(self.save_tracker.get_api(DinoApi).get_all_wild_by_class(Dinos.non_tameable.alpha.all_bps))
+        self.value = self.summary.wild_alphas
     
     def get_message(self) -> str:
         self._get_value()
@@ -119,7 +128,7 @@ class NumberOfDinosOfType(RandomStat):
             self.dino_type = forced_type
         else:
             self.dino_type = list(self.DINO_BPS.keys())[random.randint(0, len(self.DINO_BPS.keys()) - 1)]
-        self.value = len(self.save_tracker.get_api(DinoApi).get_all_wild_by_class(self.DINO_BPS[self.dino_type]))
+        self.value = self.summary.wild_dinos_of_type[self.dino_type]
 
     def get_message(self, forced_type: str = None) -> str:
         self._get_value(forced_type)
@@ -168,7 +177,7 @@ class NumberOfDinosOfType(RandomStat):
 
 class NumberOfLv150WildDinos(RandomStat):
     def _get_value(self):
-        self.value = len(self.save_tracker.get_api(DinoApi).get_all_filtered(150, 150, None, tamed=False, include_cryopodded=False))
+        self.value = self.summary.wild_lv150_dinos
     
     def get_message(self) -> str:
         self._get_value()
@@ -176,7 +185,7 @@ class NumberOfLv150WildDinos(RandomStat):
 
 class NumberOfDeaths(RandomStat):
     def _get_value(self):
-        self.value = self.save_tracker.get_api(PlayerApi).get_deaths()
+        self.value = self.summary.deaths
     
     def get_message(self) -> str:
         self._get_value()
@@ -184,7 +193,7 @@ class NumberOfDeaths(RandomStat):
     
 class CombinedLevel(RandomStat):
     def _get_value(self):
-        self.value = self.save_tracker.get_api(PlayerApi).get_level()
+        self.value = self.summary.combined_level
     
     def get_message(self) -> str:
         self._get_value()
@@ -192,7 +201,7 @@ class CombinedLevel(RandomStat):
 
 class NumberOfTamedDinos(RandomStat):
     def _get_value(self):
-        self.value = len(self.save_tracker.get_api(DinoApi).get_all_tamed(include_cryopodded=False))
+        self.value = self.summary.tamed_dinos
     
     def get_message(self) -> str:
         self._get_value()
@@ -200,7 +209,7 @@ class NumberOfTamedDinos(RandomStat):
     
 class NumberOfCryopoddedDinos(RandomStat):
     def _get_value(self):
-        self.value = len(self.save_tracker.get_api(DinoApi).get_all_in_cryopod())
+        self.value = self.summary.cryopodded_dinos
     
     def get_message(self) -> str:
         self._get_value()
@@ -208,7 +217,7 @@ class NumberOfCryopoddedDinos(RandomStat):
     
 class MostDeaths(RandomStat):
     def _get_value(self):
-        self.value = self.save_tracker.get_api(PlayerApi).get_player_with(PlayerApi.Stat.DEATHS, PlayerApi.StatType.HIGHEST)
+        self.value = self.summary.most_deaths
     
     def get_message(self) -> str:
         self._get_value()
@@ -219,7 +228,7 @@ class MostDeaths(RandomStat):
         
 class HighestLevel(RandomStat):
     def _get_value(self):
-        self.value = self.save_tracker.get_api(PlayerApi).get_player_with(PlayerApi.Stat.LEVEL, PlayerApi.StatType.HIGHEST)
+        self.value = self.summary.highest_level
     
     def get_message(self) -> str:
         self._get_value()
@@ -230,7 +239,7 @@ class HighestLevel(RandomStat):
         
 class TotalNumberOfStructures(RandomStat):
     def _get_value(self):
-        self.value = len(self.save_tracker.get_api(StructureApi).get_all())
+        self.value = self.summary.structures
     
     def get_message(self) -> str:
         self._get_value()
@@ -247,7 +256,7 @@ class NumberOfStructuresOfType(RandomStat):
 
     def _get_value(self):
         self.structure_type = list(self.STRUCTURE_BPS.keys())[random.randint(0, len(self.STRUCTURE_BPS.keys()) - 1)]
-        self.value = len(self.save_tracker.get_api(StructureApi).get_by_class(self.STRUCTURE_BPS[self.structure_type]))
+        self.value = self.summary.structures_of_type[self.structure_type]
 
     def get_message(self) -> str:
         self._get_value()
@@ -269,7 +278,7 @@ class NumberOfStructuresOfType(RandomStat):
 
 class NumberOfTurrets(RandomStat):
     def _get_value(self):
-        self.value = len(self.save_tracker.structure_api.get_by_class(Classes.structures.placed.turrets.all_bps))
+        self.value = self.summary.turrets
     
     def get_message(self) -> str:
         self._get_value()
@@ -286,7 +295,7 @@ class DinoWithStatOver(RandomStat):
 
     def _get_value(self):
         self.selected_level = self.LEVELS[random.randint(0, len(self.LEVELS) - 1)]
-        self.value = len(self.save_tracker.dino_api.get_all_filtered(tamed=False, stat_minimum=self.selected_level, level_upper_bound=150))
+        self.value = self.summary.wild_with_stat_over[self.selected_level]
 
     def get_message(self) -> str:
         self._get_value()
@@ -300,7 +309,7 @@ class TamedDinoWithStatOver(RandomStat):
 
     def _get_value(self):
         self.selected_level = self.LEVELS[random.randint(0, len(self.LEVELS) - 1)]
-        self.value = len(self.save_tracker.dino_api.get_all_filtered(tamed=True, stat_minimum=self.selected_level, level_upper_bound=1000))
+        self.value = self.summary.tamed_with_stat_over[self.selected_level]
     
     def get_message(self) -> str:
         self._get_value()
@@ -312,7 +321,7 @@ class WildDinoWithHighestStat(RandomStat):
 
     def _get_value(self):
         self.selected_stat = self.STATS[random.randint(0, len(self.STATS) - 1)]
-        best_dino, best_value, _ = self.save_tracker.dino_api.get_best_dino_for_stat(stat=self.selected_stat, only_untamed=True, level_upper_bound=150)
+        best_dino, best_value, _ = self.summary.wild_best_for_stat[self.selected_stat]
         self.value = best_value if best_dino else 0
 
     def get_message(self) -> str:
@@ -326,7 +335,7 @@ class TamedDinoWithHighestStat(RandomStat):
 
     def _get_value(self):
         self.selected_stat = self.STATS[random.randint(0, len(self.STATS) - 1)]
-        best_dino, best_value, _ = self.save_tracker.dino_api.get_best_dino_for_stat(stat=self.selected_stat, only_tamed=True, mutated_stat=True, level_upper_bound=1000)
+        best_dino, best_value, _ = self.summary.tamed_best_for_stat[self.selected_stat]
         self.value = best_value if best_dino else 0
 
     def get_message(self) -> str:
@@ -336,7 +345,7 @@ class TamedDinoWithHighestStat(RandomStat):
 
 class HighestStatOnWildDino(RandomStat):
     def _get_value(self):
-        best_dino, best_value, best_stat = self.save_tracker.dino_api.get_best_dino_for_stat(only_untamed=True, level_upper_bound=150)
+        best_dino, best_value, best_stat = self.summary.wild_highest_stat
         self.value = (best_dino, best_value, best_stat) if best_dino else (None, 0, None)
 
     def get_message(self) -> str:
@@ -348,7 +357,7 @@ class HighestStatOnWildDino(RandomStat):
     
 class HighestStatOnTamedDino(RandomStat):
     def _get_value(self):
-        best_dino, best_value, best_stat = self.save_tracker.dino_api.get_best_dino_for_stat(only_tamed=True, mutated_stat=True, level_upper_bound=1000)
+        best_dino, best_value, best_stat = self.summary.tamed_highest_stat
         self.value = (best_dino, best_value, best_stat) if best_dino else (None, 0, None)
 
     def get_message(self) -> str:
@@ -360,18 +369,7 @@ class HighestStatOnTamedDino(RandomStat):
 
 class MostMutations(RandomStat):
     def _get_value(self):
-        dinos = self.save_tracker.dino_api.get_all_tamed() 
-        most_mutations: TamedDino = None
-        for dino in dinos.values():
-            dino: TamedDino = dino
-            curr = 0 if most_mutations is None else most_mutations.stats.get_total_mutations()
-            if most_mutations is None or (dino.stats.get_total_mutations() > curr):
-                most_mutations = dino
-
-        if most_mutations is None:
-            self.value = (None, 0)
-        else:
-            self.value = (most_mutations, most_mutations.stats.get_total_mutations())
+        self.value = self.summary.most_mutations
 
     def get_message(self) -> str:
         self._get_value()
@@ -383,19 +381,10 @@ class MostMutations(RandomStat):
 
 class HighestStatEquipment(RandomStat):
     def _get_value(self):
-        p_api = self.save_tracker.get_api(PlayerApi)
-        e_api = self.save_tracker.get_api(EquipmentApi)
-
-        saddles: Dict[UUID, Saddle] = e_api.get_filtered(EquipmentApi.Classes.SADDLE)
-        weapons: Dict[UUID, Weapon] = e_api.get_filtered(EquipmentApi.Classes.WEAPON)
-        armor: Dict[UUID, Armor] = e_api.get_filtered(EquipmentApi.Classes.ARMOR)
-        highest_armor = max(saddles.values(), key=lambda x: x.armor).armor if len(saddles) > 0 else 0
-        highest_damage = max(weapons.values(), key=lambda x: x.damage).damage if len(weapons) > 0 else 0
-        highest_durability = max(armor.values(), key=lambda x: x.durability).durability if len(armor) > 0 else 0
-
-        self.value = (highest_armor, highest_damage, highest_durability)
+        self.value = self.summary.highest_equipment
 
     def get_message(self) -> str:
+        self._get_value()
         selection = random.randint(0, 2)
         if selection == 0:
             return f"The highest armor on a saddle is {self.value[0]}"
@@ -406,7 +395,7 @@ class HighestStatEquipment(RandomStat):
 
 class NumberOfSleepingBags(RandomStat):
     def _get_value(self):
-        self.value = len(self.save_tracker.get_api(StructureApi).get_by_class([PlacedStructures.utility.sleeping_bag]))
+        self.value = self.summary.sleeping_bags
     
     def get_message(self) -> str:
         self._get_value()
@@ -414,7 +403,7 @@ class NumberOfSleepingBags(RandomStat):
 
 class NrOfBabiesWildDinos(RandomStat):
     def _get_value(self):
-        self.value = len(self.save_tracker.dino_api.get_all_babies(include_tamed=False, include_wild=True))
+        self.value = self.summary.wild_babies
     
     def get_message(self) -> str:
         self._get_value()
@@ -422,7 +411,7 @@ class NrOfBabiesWildDinos(RandomStat):
 
 class NrOfBabiesTamedDinos(RandomStat):
     def _get_value(self):
-        self.value = len(self.save_tracker.dino_api.get_all_babies(include_tamed=True, include_wild=False, include_cryopodded=False))
+        self.value = self.summary.tamed_babies
 
     def get_message(self) -> str:
         self._get_value()
@@ -437,31 +426,9 @@ class GetTamedMostByType(RandomStat):
     }
     selected_dino: str
 
-    def sort_by_owner_tribe(self, dinos: List[TamedDino]) -> tuple:
-        tribes: Dict[int, List[TamedDino]] = {}
-        for dino in dinos:
-            if dino.owner and dino.owner.target_team is not None:
-                if dino.owner.target_team not in tribes:
-                    tribes[dino.owner.target_team] = []
-                tribes[dino.owner.target_team].append(dino)
-
-        most_dinos = 0
-        tribe_id = None
-        for tribe, dino_list in tribes.items():
-            if len(dino_list) > most_dinos:
-                most_dinos = len(dino_list)
-                tribe_id = tribe
-        
-        tribe: ArkTribe = self.save_tracker.get_api(PlayerApi).get_tribe(tribe_id)
-
-        return (tribe, most_dinos)
-        
-
     def _get_value(self):
         self.selected_dino = list(self.DINOS.keys())[random.randint(0, len(self.DINOS.keys()) - 1)]
-        dinos = self.save_tracker.dino_api.get_all_tamed_by_class(self.DINOS[self.selected_dino])
-        tribe, count = self.sort_by_owner_tribe(list(dinos.values()))
-        self.value = (tribe, count)
+        self.value = self.summary.tamed_most_by_type[self.selected_dino]
     
     def get_message(self) -> str:
         self._get_value()
@@ -494,7 +461,7 @@ class NumberOfBpsPerType(RandomStat):
 
     def _get_value(self):
         self.selected_type = self.TYPES[random.randint(0, len(self.TYPES) - 1)]
-        self.value = len(self.save_tracker.equipment_api.get_filtered(cls=self.selected_type, only_blueprints=True, minimum_quality=ArkItemQuality.ASCENDANT))
+        self.value = self.summary.ascendant_bps[self.selected_type]
 
     def get_message(self) -> str:
         self._get_value()
@@ -523,13 +490,115 @@ class NumberOfSpecificBpsPerType(RandomStat):
 
     def _get_value(self):
         self.selected_type = list(self.TPYES.keys())[random.randint(0, len(self.TPYES) - 1)]
-        cls, bps = self.TPYES[self.selected_type]
-        self.value = len(self.save_tracker.equipment_api.get_filtered(cls=cls, only_blueprints=True, minimum_quality=ArkItemQuality.ASCENDANT, classes=bps))
+        self.value = self.summary.ascendant_specific_bps[self.selected_type]
 
     def get_message(self) -> str:
         self._get_value()
         return f"There are {self.value} ascendant {self.selected_type} blueprints on the map"
 
+class SaveSummary:
+    """
+    The values of every random stat, for each of their possible selections, computed together
+    for one save generation. Dino and structure values come from one pass over the columnar
+    tables, resources and equipment are each read from the save once.
+    """
+
+    def __init__(self, save_tracker: SaveTracker):
+        self.__summarize_dinos(save_tracker)
+        self.__summarize_structures(save_tracker)
+        self.__summarize_players(save_tracker)
+        self.__summarize_resources(save_tracker)
+        self.__summarize_equipment(save_tracker)
+
+    @staticmethod
+    def __sum_classes(counts: Dict[str, int], class_names: List[str]) -> int:
+        return sum(counts.get(name, 0) for name in set(class_names))
+
+    @staticmethod
+    def __count_at_least(values: np.ndarray, thresholds: List[int]) -> Dict[int, int]:
+        values = np.sort(values)
+        return {t: int(len(values) - np.searchsorted(values, t, side="left")) for t in thresholds}
+
+    def __summarize_dinos(self, save_tracker: SaveTracker):
+        table = save_tracker.dino_table
+        wild, tamed = ~table.tamed, table.tamed
+
+        self.wild_dinos = int(np.count_nonzero(wild))
+        self.wild_alphas = table.count_classes(Dinos.non_tameable.alpha.all_bps, tamed=False)
+        self.wild_dinos_of_type = {name: table.count_classes(bps, tamed=False) for name, bps in NumberOfDinosOfType.DINO_BPS.items()}
+        self.wild_lv150_dinos = table.count(level_lower_bound=150, level_upper_bound=150, tamed=False, include_cryopodded=False)
+        self.tamed_dinos = table.count(tamed=True, include_cryopodded=False)
+        self.cryopodded_dinos = int(np.count_nonzero(table.cryopodded))
+        self.wild_babies = int(np.count_nonzero(wild & table.baby))
+        self.tamed_babies = table.count(baby=True, tamed=True, include_cryopodded=False)
+
+        # Highest base + mutated stat of every dino, as used by the stat_minimum filter
+        highest = table.stat_values(mutated=True).max(axis=1) if len(table) > 0 else np.zeros(0, dtype=np.int32)
+        self.wild_with_stat_over = self.__count_at_least(highest[wild & (table.level <= 150)], DinoWithStatOver.LEVELS)
+        self.tamed_with_stat_over = self.__count_at_least(highest[tamed & (table.level <= 1000)], TamedDinoWithStatOver.LEVELS)
+
+        self.wild_best_for_stat = {stat: table.best_for_stat(stat=stat, only_untamed=True, level_upper_bound=150) for stat in WildDinoWithHighestStat.STATS}
+        self.tamed_best_for_stat = {stat: table.best_for_stat(stat=stat, only_tamed=True, mutated_stat=True, level_upper_bound=1000) for stat in TamedDinoWithHighestStat.STATS}
+        self.wild_highest_stat = table.best_for_stat(only_untamed=True, level_upper_bound=150)
+        self.tamed_highest_stat = table.best_for_stat(only_tamed=True, mutated_stat=True, level_upper_bound=1000)
+
+        best = table.top_k(table.mutated.sum(axis=1) / 2, 1, tamed)
+        self.most_mutations = best[0] if len(best) > 0 else (None, 0)
+
+        p_api = save_tracker.get_api(PlayerApi)
+        self.tamed_most_by_type = {}
+        for name, bps in GetTamedMostByType.DINOS.items():
+            counts = table.team_counts(tamed & table.classes.mask(bps))
+            if len(counts) == 0:
+                self.tamed_most_by_type[name] = (None, 0)
+                continue
+            tribe_id, most_dinos = max(counts.items(), key=lambda c: c[1])
+            self.tamed_most_by_type[name] = (p_api.get_tribe(tribe_id), most_dinos)
+
+    def __summarize_structures(self, save_tracker: SaveTracker):
+        table = save_tracker.structure_table
+        counts = table.classes.counts()
+
+        self.structures = len(table)
+        self.structures_of_type = {name: self.__sum_classes(counts, bps) for name, bps in NumberOfStructuresOfType.STRUCTURE_BPS.items()}
+        self.turrets = self.__sum_classes(counts, Classes.structures.placed.turrets.all_bps)
+        self.sleeping_bags = self.__sum_classes(counts, [PlacedStructures.utility.sleeping_bag])
+
+    def __summarize_players(self, save_tracker: SaveTracker):
+        p_api = save_tracker.get_api(PlayerApi)
+
+        self.deaths = p_api.get_deaths()
+        self.combined_level = p_api.get_level()
+        self.most_deaths = p_api.get_player_with(PlayerApi.Stat.DEATHS, PlayerApi.StatType.HIGHEST)
+        self.highest_level = p_api.get_player_with(PlayerApi.Stat.LEVEL, PlayerApi.StatType.HIGHEST)
+
+    def __summarize_resources(self, save_tracker: SaveTracker):
+        # All resources in one read, summed per class
+        s_api = save_tracker.get_api(StackableApi)
+        quantities: Dict[str, int] = {}
+        for item in s_api.get_by_class(StackableApi.Classes.RESOURCE, list(set(RandomResourceAmount.RESOURCES.values()))).values():
+            quantities[item.object.blueprint] = quantities.get(item.object.blueprint, 0) + item.quantity
+
+        self.resources = {name: quantities.get(bp, 0) for name, bp in RandomResourceAmount.RESOURCES.items()}
+
+    def __summarize_equipment(self, save_tracker: SaveTracker):
+        e_api = save_tracker.get_api(EquipmentApi)
+        equipment = {cls: e_api.get_filtered(cls) for cls in NumberOfBpsPerType.TYPES}
+
+        saddles: Dict[UUID, Saddle] = equipment[EquipmentApi.Classes.SADDLE]
+        weapons: Dict[UUID, Weapon] = equipment[EquipmentApi.Classes.WEAPON]
+        armor: Dict[UUID, Armor] = equipment[EquipmentApi.Classes.ARMOR]
+        highest_armor = max(saddles.values(), key=lambda x: x.armor).armor if len(saddles) > 0 else 0
+        highest_damage = max(weapons.values(), key=lambda x: x.damage).damage if len(weapons) > 0 else 0
+        highest_durability = max(armor.values(), key=lambda x: x.durability).durability if len(armor) > 0 else 0
+        self.highest_equipment = (highest_armor, highest_damage, highest_durability)
+
+        ascendant_bps = {cls: [item for item in items.values() if item.is_bp and item.quality >= ArkItemQuality.ASCENDANT.value]
+                         for cls, items in equipment.items()}
+        self.ascendant_bps = {cls: len(items) for cls, items in ascendant_bps.items()}
+        self.ascendant_specific_bps = {name: len([item for item in ascendant_bps[cls] if item.object.blueprint in bps])
+                                       for name, (cls, bps) in NumberOfSpecificBpsPerType.TPYES.items()}
+
 class RandomStatManager(Manager):
     def __init__(self, save_tracker: SaveTracker, rconapi: RconApi):
         super().__init__(self.__process, "random stat manager", 1033)
@@ -572,7 +641,6 @@ class RandomStatManager(Manager):
 
         # Test
         for stat in self.stats:
-            stat._get_value()
             self._print(stat.get_message())
 
 
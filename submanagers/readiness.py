@@ -0,0 +1,89 @@
+import time
+from typing import Callable, Tuple
+
+from arkparse.api.rcon_api import RconApi
+from arkparse.ftp.ark_ftp_client import ArkMap
+
+from .ftp_pool import FtpPool
+from .nitrado_api import NitradoClient
+from .save_transfer import SaveTransfer
+
+class Readiness:
+    """
+    Waits for the server to reach a state instead of sleeping a fixed amount of time.
+
+    Every wait polls until its condition holds and gives up after the given upper bound, so
+    it is never slower than the sleep it replaces. Whether the condition was met is returned
+    and logged, callers continue either way like they did after the sleep.
+    """
+
+    def __init__(self, ftp_pool: FtpPool, map: ArkMap, rcon: RconApi = None, interval: float = 5, stable_for: float = 30):
+        self.ftp_pool = ftp_pool
+        self.map = map
+        self.rcon = rcon
+        self.interval = interval
+        self.stable_for = stable_for
+
+    def _print(self, message):
+        current_time = time.strftime("%H:%M:%S", time.localtime())
+        print(f"[{current_time}][readiness] {message}")
+
+    def wait_until(self, description: str, check: Callable[[], bool], timeout: float) -> bool:
+        start = time.monotonic()
+        while True:
+            try:
+                if check():
+                    self._print(f"{description} after {time.monotonic() - start:.0f}s")
+                    return True
+            except Exception as e:
+                self._print(f"Error checking if {description.lower()}: {e}")
+
+            if time.monotonic() - start + self.interval > timeout:
+                self._print(f"Gave up waiting until {description.lower()} after {timeout:.0f}s")
+                return False
+            time.sleep(self.interval)
+
+    def server_status(self) -> str:
+        return NitradoClient().get_status()
+
+    def save_file_state(self) -> Tuple[str, int]:
+        with self.ftp_pool.client() as ftp_client:
+            SaveTransfer.nav_to_save_files(ftp_client, self.map)
+            file_name = SaveTransfer.save_file_name(ftp_client, self.map)
+            ftp_client.ftp.voidcmd("TYPE I")
+            return ftp_client.ftp.sendcmd(f"MDTM {file_name}"), ftp_client.ftp.size(file_name)
+
+    def rcon_reachable(self) -> bool:
+        return self.rcon is not None and self.rcon.send_cmd("listplayers") is not None
+
+    def wait_for_save_released(self, timeout: float = 60 * 4) -> bool:
+        """
+        Wait until the server is stopped and the save file stopped changing for stable_for seconds,
+        meaning the shutdown save is written and the file lock is gone.
+        """
+        observed = {"state": None, "since": None}
+
+        def is_released():
+            if self.server_status() != "stopped":
+                observed["state"] = None
+                return False
+
+            state = self.save_file_state()
+            now = time.monotonic()
+            if state != observed["state"]:
+                observed["state"], observed["since"] = state, now
+                return False
+            return now - observed["since"] >= self.stable_for
+
+        return self.wait_until("Save file released", is_released, timeout)
+
+    def wait_for_started(self, timeout: float = 60 * 2) -> bool:
+        """
+        Wait until Nitrado reports the server as started and it answers on RCON.
+        Without an RCON connection there is nothing to probe and the full timeout is waited.
+        """
+        if self.rcon is None:
+            time.sleep(timeout)
+            return False
+
+        return self.wait_until("Server reachable over RCON", lambda: self.server_status() == "started" and self.rcon_reachable(), timeout)
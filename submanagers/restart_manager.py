@@ -2,11 +2,13 @@ import json
 import time
 
 from arkparse.api.rcon_api import RconApi
-from arkparse.ftp.ark_ftp_client import ArkFtpClient, INI, ArkMap
+from arkparse.ftp.ark_ftp_client import INI, ArkMap
 
 from .time_handler import TimeHandler, PreviousDate
 from .__manager import Manager
+from .ftp_pool import FtpPool
 from .nitrado_api import NitradoClient
+from .readiness import Readiness
 
 passwords = None
 with open("passwords.json", 'r') as pass_file:
@@ -32,12 +34,12 @@ RESTARTS = {
 }
 
 class RestartManager(Manager):
-    def __init__(self, rconapi: RconApi, ftp_config: dict):
+    def __init__(self, rconapi: RconApi, ftp_config: dict, ftp_pool: FtpPool = None, readiness: Readiness = None):
         super().__init__(self.__process, "restart manager", 10)
         self.time_handler: TimeHandler = TimeHandler(RESTARTS["weekStartup"], RESTARTS["weekShutdown"], RESTARTS["weekendStartup"], RESTARTS["weekendShutdown"])
         self.rcon : RconApi = rconapi
-        self.ftp : ArkFtpClient = ArkFtpClient.from_config(ftp_config, ArkMap.RAGNAROK)
-        self.ftp.close()
+        self.ftp_pool: FtpPool = ftp_pool if ftp_pool is not None else FtpPool(ftp_config, ArkMap.RAGNAROK)
+        self.readiness: Readiness = readiness if readiness is not None else Readiness(self.ftp_pool, ArkMap.RAGNAROK, rconapi)
         self.wipe_on = ["Monday", "Wednesday", "Friday"]  # Days to wipe dinos
         self.restarts = RESTARTS.copy()
         self.last_timestamps = LAST_TIMESTAMPS.copy()
@@ -76,13 +78,13 @@ class RestartManager(Manager):
             NitradoClient().stop_server()
             self._print(f"Server status: {NitradoClient().get_status()}")
 
-            time.sleep(60 * 10) # wait 10 minutes to ensure the server has fully stopped and released the file lock
+            # Wait (at most 10 minutes) until the server has fully stopped and released the file lock
+            self.readiness.wait_for_save_released(timeout=60 * 10)
 
             self._print("Changing server password")
             new_pass = self.open_password if time.localtime().tm_hour >= 4 and time.localtime().tm_hour < 10 else self.secret_password
-            self.ftp.connect()
-            self.ftp.change_ini_setting("ServerPassword", new_pass, INI.GAME_USER_SETTINGS)
-            self.ftp.close()
+            with self.ftp_pool.client() as ftp:
+                ftp.change_ini_setting("ServerPassword", new_pass, INI.GAME_USER_SETTINGS)
             self._print(f"Server password changed to {new_pass}")
             self.password_changed = True
             self.in_countdown = False
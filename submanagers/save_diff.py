@@ -0,0 +1,223 @@
+import threading
+from typing import Callable, Dict, Iterable, List, Set
+from uuid import UUID
+
+from arkparse import AsaSave
+from arkparse.api import DinoApi
+from arkparse.object_model.ark_game_object import ArkGameObject
+from arkparse.parsing import ArkBinaryParser
+from arkparse.saves.save_connection import SaveConnection
+
+from .save_generation import SaveGeneration
+
+DINO = "dino"
+STRUCTURE = "structure"
+ITEM = "item"
+INVENTORY = "inventory"
+OTHER = "other"
+
+LOCATION = "location"
+OWNER = "owner"
+INVENTORY_CONTENTS = "inventory"
+DATA = "data"
+
+OWNER_PROPERTIES = ("TargetingTeam", "OwningPlayerID", "OwnerName", "TamerString", "TribeName")
+CONTAINER_PROPERTIES = ("MyInventoryComponent", "CurrentItemCount")
+ITEM_PROPERTIES = ("OwnerInventory",)
+
+def object_kind(blueprint: str) -> str:
+    if blueprint is None:
+        return OTHER
+    if "PrimalInventory" in blueprint:
+        return INVENTORY
+    if "PrimalItem" in blueprint:
+        return ITEM
+    if DinoApi.is_applicable_bp(blueprint):
+        return DINO
+    if "Structures" in blueprint:
+        return STRUCTURE
+    return OTHER
+
+def fingerprint(save: AsaSave) -> Dict[bytes, int]:
+    """
+    Hash of the stored record of every object in the save, keyed on the raw UUID bytes.
+    Read straight from the database, nothing is parsed.
+    """
+    connection = save.save_connection
+    with connection._db_lock:
+        cursor = connection.connection.cursor()
+        cursor.execute("SELECT key, value FROM game")
+        return {key: hash(value) for key, value in cursor}
+
+def generation_fingerprint(generation: SaveGeneration) -> Dict[bytes, int]:
+    return generation.memo(("save_diff", "fingerprint"), lambda: fingerprint(generation.save))
+
+class ObjectChange:
+    def __init__(self, uuid: UUID, kind: str, blueprint: str, fields: Set[str] = None):
+        self.uuid = uuid
+        self.kind = kind
+        self.blueprint = blueprint
+        self.fields: Set[str] = fields if fields is not None else set()
+
+    def __repr__(self):
+        fields = f" ({', '.join(sorted(self.fields))})" if self.fields else ""
+        return f"{self.kind} {self.uuid} {self.blueprint}{fields}"
+
+class SaveDelta:
+    """
+    What changed between two consecutive save generations.
+
+    Objects are matched on UUID. Changed objects list which fields changed: location (actor
+    transform), owner (team, player or tribe name), inventory (item count, or items added to or
+    removed from its inventory) and data for any other change of the stored record.
+    inventories holds the UUIDs of every inventory component whose items changed.
+    """
+
+    def __init__(self, previous_id: int, generation_id: int = None):
+        self.previous_id = previous_id
+        self.generation_id = generation_id
+        self.added: Dict[UUID, ObjectChange] = {}
+        self.removed: Dict[UUID, ObjectChange] = {}
+        self.changed: Dict[UUID, ObjectChange] = {}
+        self.inventories: Set[UUID] = set()
+
+    def added_of(self, kind: str) -> List[ObjectChange]:
+        return [c for c in self.added.values() if c.kind == kind]
+
+    def removed_of(self, kind: str) -> List[ObjectChange]:
+        return [c for c in self.removed.values() if c.kind == kind]
+
+    def changed_of(self, kind: str, field: str = None) -> List[ObjectChange]:
+        return [c for c in self.changed.values() if c.kind == kind and (field is None or field in c.fields)]
+
+    def touches(self, uuids: Iterable[UUID]) -> bool:
+        return any(u in self.added or u in self.removed or u in self.changed or u in self.inventories for u in uuids)
+
+    def is_empty(self) -> bool:
+        return not (self.added or self.removed or self.changed)
+
+    def __str__(self):
+        def count(changes: Dict[UUID, ObjectChange]) -> str:
+            kinds = {}
+            for change in changes.values():
+                kinds[change.kind] = kinds.get(change.kind, 0) + 1
+            return f"{len(changes)} ({', '.join(f'{n} {k}' for k, n in sorted(kinds.items()))})" if kinds else "0"
+        return f"generation {self.previous_id} -> {self.generation_id}: added {count(self.added)}, removed {count(self.removed)}, changed {count(self.changed)}"
+
+def _read_properties(save: AsaSave, uuid: UUID, blueprint: str, names: Iterable[str]) -> Dict[str, object]:
+    """
+    Parse only the given properties of an object, without adding it to the save's cache.
+    """
+    try:
+        binary = save.save_connection.get_game_obj_binary(uuid)
+        obj = ArkGameObject(uuid, blueprint, ArkBinaryParser(binary, save.save_context), selected_property_names=frozenset(names))
+    except Exception:
+        return {}
+
+    values = {}
+    for name in names:
+        value = obj.get_property_value(name, None)
+        # Object references compare on the referenced UUID
+        values[name] = getattr(value, "value", value)
+    return values
+
+def _as_uuid(value) -> UUID:
+    try:
+        return UUID(str(value)) if value is not None else None
+    except ValueError:
+        return None
+
+def diff(previous: SaveGeneration, current: SaveGeneration) -> SaveDelta:
+    """
+    Compare two generations. Only the objects whose record or location differ are parsed,
+    and only for the properties needed to tell which fields changed.
+    """
+    old_save, new_save = previous.save, current.save
+    old_records, new_records = generation_fingerprint(previous), generation_fingerprint(current)
+    delta = SaveDelta(previous.id, current.id)
+
+    def change(save: AsaSave, key: UUID) -> ObjectChange:
+        blueprint = save.save_connection.get_class_of_uuid(key)
+        return ObjectChange(key, object_kind(blueprint), blueprint)
+
+    for key in new_records.keys() - old_records.keys():
+        uuid = SaveConnection.byte_array_to_uuid(key)
+        delta.added[uuid] = change(new_save, uuid)
+    for key in old_records.keys() - new_records.keys():
+        uuid = SaveConnection.byte_array_to_uuid(key)
+        delta.removed[uuid] = change(old_save, uuid)
+    for key, record in new_records.items():
+        if key in old_records and old_records[key] != record:
+            uuid = SaveConnection.byte_array_to_uuid(key)
+            delta.changed[uuid] = change(new_save, uuid)
+            delta.changed[uuid].fields.add(DATA)
+
+    old_transforms = old_save.save_context.actor_transforms or {}
+    for uuid, transform in (new_save.save_context.actor_transforms or {}).items():
+        old = old_transforms.get(uuid)
+        if old is None or (old.x, old.y, old.z) == (transform.x, transform.y, transform.z):
+            continue
+        if uuid not in delta.changed:
+            if uuid in delta.added:
+                continue
+            delta.changed[uuid] = change(new_save, uuid)
+        delta.changed[uuid].fields.add(LOCATION)
+
+    # Items moving in or out of an inventory, the inventory component itself changes as well
+    for save, changes in ((new_save, delta.added), (old_save, delta.removed)):
+        for item in changes.values():
+            if item.kind == ITEM:
+                inventory = _as_uuid(_read_properties(save, item.uuid, item.blueprint, ITEM_PROPERTIES).get("OwnerInventory"))
+                if inventory is not None:
+                    delta.inventories.add(inventory)
+    delta.inventories.update(c.uuid for c in delta.changed.values() if c.kind == INVENTORY and DATA in c.fields)
+
+    for item in delta.changed.values():
+        if item.kind not in (DINO, STRUCTURE) or DATA not in item.fields:
+            continue
+        names = OWNER_PROPERTIES + CONTAINER_PROPERTIES
+        old = _read_properties(old_save, item.uuid, item.blueprint, names)
+        new = _read_properties(new_save, item.uuid, item.blueprint, names)
+        if any(old.get(name) != new.get(name) for name in OWNER_PROPERTIES):
+            item.fields.add(OWNER)
+        if old.get("CurrentItemCount") != new.get("CurrentItemCount") or _as_uuid(new.get("MyInventoryComponent")) in delta.inventories:
+            item.fields.add(INVENTORY_CONTENTS)
+
+    return delta
+
+class DeltaWatch:
+    """
+    Tells a manager whether anything it cares about changed since its last full check.
+
+    relevant(delta) decides for every published delta. A generation that was published without
+    a delta (the first download, a save set by hand, a failed diff) counts as a change, as does
+    anything before the first check.
+    """
+
+    def __init__(self, relevant: Callable[[SaveDelta], bool]):
+        self.__relevant = relevant
+        self.__lock = threading.Lock()
+        self.__changed = True
+        self.__seen: int = None
+
+    def on_delta(self, delta: SaveDelta):
+        with self.__lock:
+            if self.__seen != delta.previous_id or self.__relevant(delta):
+                self.__changed = True
+            self.__seen = delta.generation_id
+
+    def needs_check(self, generation_id: int) -> bool:
+        with self.__lock:
+            return self.__changed or self.__seen != generation_id
+
+    def checked(self, generation_id: int):
+        """
+        Record a full check against generation_id, started before any delta that arrived during it.
+        """
+        with self.__lock:
+            self.__changed = False
+            self.__seen = generation_id
+
+    def invalidate(self):
+        with self.__lock:
+            self.__changed = True
@@ -0,0 +1,161 @@
+import functools
+import hashlib
+import threading
+from typing import Any, Callable, Dict, Hashable
+
+from arkparse import AsaSave
+from arkparse.api import DinoApi, EquipmentApi, StackableApi, StructureApi, PlayerApi, BaseApi
+from arkparse.ftp.ark_ftp_client import ArkFile, ArkMap
+
+from .entity_tables import DinoTable, StructureTable
+from .structure_grid import GridBaseApi, GridStructureApi
+
+def content_hash(contents: bytes) -> str:
+    if contents is None:
+        return None
+    return hashlib.blake2b(contents, digest_size=16).hexdigest()
+
+_PLAIN_TYPES = (type(None), bool, int, float, complex, str, bytes)
+
+def _is_plain(value) -> bool:
+    """
+    Whether value only consists of builtin scalars and containers of them.
+    """
+    if isinstance(value, _PLAIN_TYPES):
+        return True
+    if isinstance(value, dict):
+        return all(_is_plain(k) and _is_plain(v) for k, v in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return all(_is_plain(v) for v in value)
+    return False
+
+class ApiBuildError(Exception):
+    """
+    An API could not be built on the save of a generation, the cause is chained.
+    """
+
+class SaveGeneration:
+    """
+    A parsed save together with the APIs built on it.
+
+    A generation is built completely before the save tracker publishes it and is not swapped
+    piecemeal afterwards, so everything read from one generation belongs to the same save.
+    The APIs, and the columnar dino and structure tables built on them, are only created the
+    first time they are asked for and go away with the generation. The structure and base APIs
+    answer location queries from a grid over their structures, see StructureGrid.
+
+    The save tracker numbers generations in the order they are published (id) and results
+    computed from a generation can be memoized on it, see per_generation.
+    """
+
+    def __init__(self, save: AsaSave, map: ArkMap, info: ArkFile = None, content_hash: str = None):
+        self.save: AsaSave = save
+        self.map: ArkMap = map
+        self.info: ArkFile = info
+        self.id: int = None
+        self.content_hash: str = content_hash
+        self.__memo: Dict[Hashable, Any] = {}
+
+        self.__factories: Dict[type, Callable[[], object]] = {
+            DinoApi: lambda: DinoApi(save),
+            EquipmentApi: lambda: EquipmentApi(save),
+            StackableApi: lambda: StackableApi(save),
+            StructureApi: lambda: GridStructureApi(save),
+            PlayerApi: lambda: PlayerApi(save),
+            BaseApi: lambda: GridBaseApi(save, map),
+            DinoTable: lambda: DinoTable.build(self.get_api(DinoApi)),
+            StructureTable: lambda: StructureTable.build(self.get_api(StructureApi)),
+        }
+        self.__apis: Dict[type, object] = {}
+        # One lock per API so building a slow one (PlayerApi) does not hold up the others
+        self.__locks: Dict[type, threading.Lock] = {type: threading.Lock() for type in self.__factories}
+
+    @property
+    def dino_api(self) -> DinoApi:
+        return self.get_api(DinoApi)
+
+    @property
+    def equipment_api(self) -> EquipmentApi:
+        return self.get_api(EquipmentApi)
+
+    @property
+    def stackable_api(self) -> StackableApi:
+        return self.get_api(StackableApi)
+
+    @property
+    def structure_api(self) -> StructureApi:
+        return self.get_api(StructureApi)
+
+    @property
+    def player_api(self) -> PlayerApi:
+        return self.get_api(PlayerApi)
+
+    @property
+    def base_api(self) -> BaseApi:
+        return self.get_api(BaseApi)
+
+    @property
+    def dino_table(self) -> DinoTable:
+        return self.get_api(DinoTable)
+
+    @property
+    def structure_table(self) -> StructureTable:
+        return self.get_api(StructureTable)
+
+    def get_api(self, type: type):
+        if type not in self.__factories:
+            raise ValueError(f"Unknown API type: {type}")
+
+        with self.__locks[type]:
+            api = self.__apis.get(type)
+            if api is None:
+                try:
+                    api = self.__factories[type]()
+                except ApiBuildError:
+                    raise
+                except Exception as e:
+                    raise ApiBuildError(f"Could not build {type.__name__} on save generation {self.id}: {e}") from e
+                self.__apis[type] = api
+            return api
+
+    def memo(self, key: Hashable, compute: Callable[[], Any]):
+        """
+        Return the result stored under key for this generation, computing and storing it on first use.
+        """
+        try:
+            return self.__memo[key]
+        except KeyError:
+            pass
+        # Computed outside of any lock, two concurrent callers may both compute it, the first result is kept
+        return self.__memo.setdefault(key, compute())
+
+    def adopt_memo(self, other: "SaveGeneration"):
+        """
+        Take over the memoized results of a generation with the same content. Only plain values
+        are taken over, results holding objects parsed from the other save would keep its whole
+        object graph alive after the swap and are computed again on this generation instead.
+        """
+        if other is not None and self.content_hash is not None and self.content_hash == other.content_hash:
+            self.__memo.update({key: value for key, value in other.__memo.items() if _is_plain(value)})
+
+    def created_apis(self):
+        return list(self.__apis.keys())
+
+    def release_caches(self):
+        """
+        Drop the APIs and the objects parsed from this save, they are created again when needed.
+        """
+        self.__apis.clear()
+        self.save.reset_caching()
+
+def per_generation(method):
+    """
+    Memoize a method on the current save generation of self.save_tracker, keyed on the arguments.
+    The result is recomputed once a new save is published.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        generation: SaveGeneration = self.save_tracker.generation
+        key = (method.__qualname__, self, args, tuple(sorted(kwargs.items())))
+        return generation.memo(key, lambda: method(self, *args, **kwargs))
+    return wrapper
@@ -0,0 +1,227 @@
+import math
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import List
+
+from arkparse.api import PlayerApi
+from arkparse.object_model.ark_game_object import ArkGameObject
+from arkparse.parsing import ArkBinaryParser
+from arkparse.saves.save_connection import SaveConnection
+
+from .__manager import Manager
+from .entity_tables import DinoTable, StructureTable, NO_TEAM
+from .save_diff import ITEM, object_kind
+from .save_generation import SaveGeneration
+from .save_tracker import SaveTracker
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS generations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    content_hash TEXT,
+    game_time REAL,
+    exported REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS dinos (
+    generation INTEGER NOT NULL, uuid TEXT NOT NULL, class TEXT NOT NULL,
+    tamed INTEGER, cryopodded INTEGER, baby INTEGER, level INTEGER, team INTEGER,
+    x REAL, y REAL, z REAL, cell_x INTEGER, cell_y INTEGER
+);
+CREATE TABLE IF NOT EXISTS structures (
+    generation INTEGER NOT NULL, uuid TEXT NOT NULL, class TEXT NOT NULL, team INTEGER,
+    x REAL, y REAL, z REAL, cell_x INTEGER, cell_y INTEGER
+);
+CREATE TABLE IF NOT EXISTS items (
+    generation INTEGER NOT NULL, uuid TEXT NOT NULL, class TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS players (
+    generation INTEGER NOT NULL, player_id INTEGER, unique_id TEXT, name TEXT, char_name TEXT,
+    tribe_id INTEGER, level INTEGER, deaths INTEGER
+);
+CREATE TABLE IF NOT EXISTS tribes (
+    generation INTEGER NOT NULL, tribe_id INTEGER, name TEXT, owner_id INTEGER, members INTEGER
+);
+CREATE INDEX IF NOT EXISTS dinos_class ON dinos (generation, class);
+CREATE INDEX IF NOT EXISTS dinos_team ON dinos (generation, team);
+CREATE INDEX IF NOT EXISTS dinos_cell ON dinos (generation, cell_x, cell_y);
+CREATE INDEX IF NOT EXISTS structures_class ON structures (generation, class);
+CREATE INDEX IF NOT EXISTS structures_team ON structures (generation, team);
+CREATE INDEX IF NOT EXISTS structures_cell ON structures (generation, cell_x, cell_y);
+CREATE INDEX IF NOT EXISTS items_class ON items (generation, class);
+CREATE INDEX IF NOT EXISTS players_name ON players (name, generation);
+CREATE INDEX IF NOT EXISTS players_tribe ON players (generation, tribe_id);
+CREATE INDEX IF NOT EXISTS tribes_id ON tribes (generation, tribe_id);
+"""
+
+ENTITY_TABLES = ("dinos", "structures", "items", "players", "tribes")
+
+class SaveIndex:
+    """
+    Local SQLite database with the dinos, structures, items, players and tribes of every exported
+    save generation, indexed on class, owner team, tribe and location grid cell.
+
+    Generations are numbered by the index itself so the history survives restarts, a save with a
+    content hash that was already exported is not written again. Only the last keep_generations
+    generations are kept. Offline tools can query the history without parsing a save.
+    """
+
+    def __init__(self, path: Path = None, cell_size: float = 10000, keep_generations: int = 48):
+        self.path = path if path is not None else Path.cwd() / "save_index.db"
+        self.cell_size = cell_size
+        self.keep_generations = keep_generations
+        self.__lock = threading.Lock()
+        self.connection = sqlite3.connect(self.path, check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.executescript(SCHEMA)
+
+    def _print(self, message):
+        current_time = time.strftime("%H:%M:%S", time.localtime())
+        print(f"[{current_time}][save index] {message}")
+
+    def close(self):
+        with self.__lock:
+            self.connection.close()
+
+    def __cell(self, value: float) -> int:
+        return None if math.isnan(value) else int(value // self.cell_size)
+
+    def __located(self, location) -> tuple:
+        x, y, z = (float(v) for v in location)
+        return (None if math.isnan(x) else x, None if math.isnan(y) else y, None if math.isnan(z) else z,
+                self.__cell(x), self.__cell(y))
+
+    def is_exported(self, content_hash: str) -> bool:
+        if content_hash is None:
+            return False
+        with self.__lock:
+            return self.connection.execute("SELECT 1 FROM generations WHERE content_hash = ?", (content_hash,)).fetchone() is not None
+
+    def export(self, generation: SaveGeneration) -> int:
+        """
+        Write a generation to the index, returns its id in the index or None if it was exported before.
+        """
+        if self.is_exported(generation.content_hash):
+            return None
+
+        start = time.monotonic()
+        dinos: DinoTable = generation.dino_table
+        structures: StructureTable = generation.structure_table
+        player_api: PlayerApi = generation.player_api
+        items = self.__item_classes(generation)
+
+        with self.__lock, self.connection:
+            cursor = self.connection.execute(
+                "INSERT INTO generations (content_hash, game_time, exported) VALUES (?, ?, ?)",
+                (generation.content_hash, generation.save.save_context.game_time, time.time()))
+            gen = cursor.lastrowid
+
+            self.connection.executemany("INSERT INTO dinos VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", (
+                (gen, str(dinos.uuids[i]), dinos.classes.classes[dinos.classes.column[i]],
+                 bool(dinos.tamed[i]), bool(dinos.cryopodded[i]), bool(dinos.baby[i]), int(dinos.level[i]),
+                 None if dinos.team[i] == NO_TEAM else int(dinos.team[i])) + self.__located(dinos.location[i])
+                for i in range(len(dinos))))
+            self.connection.executemany("INSERT INTO structures VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", (
+                (gen, str(structures.uuids[i]), structures.classes.classes[structures.classes.column[i]],
+                 None if structures.team[i] == NO_TEAM else int(structures.team[i])) + self.__located(structures.location[i])
+                for i in range(len(structures))))
+            self.connection.executemany("INSERT INTO items VALUES (?, ?, ?)", ((gen, uuid, blueprint) for uuid, blueprint in items))
+            self.connection.executemany("INSERT INTO players VALUES (?, ?, ?, ?, ?, ?, ?, ?)", (
+                (gen, p.id_, None if p.unique_id is None else str(p.unique_id), p.name, p.char_name, p.tribe,
+                 p.stats.level if p.stats is not None else None, p.nr_of_deaths)
+                for p in player_api.players))
+            self.connection.executemany("INSERT INTO tribes VALUES (?, ?, ?, ?, ?)", (
+                (gen, t.tribe_id, t.name, t.owner_id, len(t.members)) for t in player_api.tribes))
+            self.__prune(gen)
+
+        self._print(f"Exported save generation {generation.id} as {gen}: {len(dinos)} dinos, {len(structures)} structures, "
+                    f"{len(items)} items, {len(player_api.players)} players in {time.monotonic() - start:.1f}s")
+        return gen
+
+    def __item_classes(self, generation: SaveGeneration) -> List[tuple]:
+        # Only the class is needed, read it from the object header instead of parsing the items
+        connection = generation.save.save_connection
+        context = generation.save.save_context
+        items = []
+        # Iterate the cursor so only one object record is held at a time, like fingerprint in save_diff
+        with connection._db_lock:
+            cursor = connection.connection.cursor()
+            cursor.execute("SELECT key, value FROM game")
+            for key, value in cursor:
+                uuid = SaveConnection.byte_array_to_uuid(key)
+                try:
+                    blueprint = ArkGameObject.read_name(uuid, ArkBinaryParser(value, context))[0]
+                except Exception:
+                    continue
+                if object_kind(blueprint) == ITEM:
+                    items.append((str(uuid), blueprint))
+        return items
+
+    def __prune(self, latest: int):
+        oldest = latest - self.keep_generations + 1
+        for table in ENTITY_TABLES:
+            self.connection.execute(f"DELETE FROM {table} WHERE generation < ?", (oldest,))
+        self.connection.execute("DELETE FROM generations WHERE id < ?", (oldest,))
+
+    def latest_generation(self) -> int:
+        with self.__lock:
+            row = self.connection.execute("SELECT MAX(id) FROM generations").fetchone()
+        return row[0]
+
+    def query(self, sql: str, parameters: tuple = ()) -> List[sqlite3.Row]:
+        with self.__lock:
+            return self.connection.execute(sql, parameters).fetchall()
+
+    def structures_by_class(self, classes: List[str], generation: int = None) -> List[sqlite3.Row]:
+        generation = generation if generation is not None else self.latest_generation()
+        marks = ", ".join("?" for _ in classes)
+        return self.query(f"SELECT * FROM structures WHERE generation = ? AND class IN ({marks})", (generation, *classes))
+
+    def count_dinos(self, classes: List[str], tamed: bool = None, generation: int = None) -> int:
+        generation = generation if generation is not None else self.latest_generation()
+        marks = ", ".join("?" for _ in classes)
+        sql = f"SELECT COUNT(*) FROM dinos WHERE generation = ? AND class IN ({marks})"
+        parameters = (generation, *classes)
+        if tamed is not None:
+            sql += " AND tamed = ?"
+            parameters += (tamed,)
+        return self.query(sql, parameters)[0][0]
+
+    def in_cells(self, table: str, x: float, y: float, radius: float, generation: int = None) -> List[sqlite3.Row]:
+        """
+        Rows of dinos or structures within radius of (x, y), only the grid cells that overlap the circle are read.
+        """
+        if table not in ("dinos", "structures"):
+            raise ValueError(f"No locations in table {table}")
+        generation = generation if generation is not None else self.latest_generation()
+        rows = self.query(
+            f"SELECT * FROM {table} WHERE generation = ? AND cell_x BETWEEN ? AND ? AND cell_y BETWEEN ? AND ?",
+            (generation, self.__cell(x - radius), self.__cell(x + radius), self.__cell(y - radius), self.__cell(y + radius)))
+        return [r for r in rows if (r["x"] - x) ** 2 + (r["y"] - y) ** 2 <= radius ** 2]
+
+    def player_by_platform_name(self, name: str, generation: int = None) -> sqlite3.Row:
+        generation = generation if generation is not None else self.latest_generation()
+        rows = self.query("SELECT * FROM players WHERE name = ? AND generation = ?", (name, generation))
+        return rows[0] if rows else None
+
+    def player_history(self, name: str) -> List[sqlite3.Row]:
+        return self.query(
+            "SELECT p.*, g.exported, g.game_time FROM players p JOIN generations g ON g.id = p.generation WHERE p.name = ? ORDER BY p.generation",
+            (name,))
+
+class SaveIndexExporter(Manager):
+    """
+    Exports every new save generation to a SaveIndex, run it once per generation through the generation trigger.
+    """
+
+    def __init__(self, save_tracker: SaveTracker, index: SaveIndex):
+        super().__init__(self.__process, "save index exporter", 60 * 60)
+        self.save_tracker: SaveTracker = save_tracker
+        self.index: SaveIndex = index
+
+    def __process(self, _: int):
+        generation = self.save_tracker.generation
+        if generation is None:
+            return
+        if self.index.export(generation) is None:
+            self._print(f"Save generation {generation.id} is already in the index")
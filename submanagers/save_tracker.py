@@ -1,89 +1,162 @@
 from pathlib import Path
 from arkparse import AsaSave
 from uuid import uuid4
+import gc
+import threading
 import time
+from typing import Callable, List
 from .__manager import Manager
-from arkparse.ftp.ark_ftp_client import ArkFtpClient, ArkFile, ArkMap
+from arkparse.ftp.ark_ftp_client import ArkFile, ArkMap
 from arkparse.api import DinoApi, EquipmentApi, StackableApi, StructureApi, PlayerApi, BaseApi
+from .entity_tables import DinoTable, StructureTable
+from .errorcatch import ErrorCatch
+from .ftp_pool import FtpPool
+from .memory_usage import PeakTracker, current_rss, format_bytes
 from .nitrado_api import NitradoClient
+from .readiness import Readiness
+from .save_diff import SaveDelta, diff
+from .save_generation import SaveGeneration, content_hash
+from .save_transfer import SaveTransfer
+from .snapshot_store import SnapshotStore
 
 class SaveTracker(Manager):
-    def __init__(self, ftp_config: str, map: ArkMap):
+    """
+    Keeps a parsed copy of the latest save on the FTP server.
+
+    New saves are downloaded and parsed on a background thread while the current generation
+    stays in use, the finished generation is then swapped in as a whole. When memory_limit
+    (bytes) is set and holding two generations would exceed it, the cached objects of the
+    current generation are released before the new one is parsed.
+
+    Managers can subscribe to every published generation, and to the delta between consecutive
+    downloaded generations, which is only computed while there are subscribers.
+    """
+
+    def __init__(self, ftp_config: str, map: ArkMap, memory_limit: int = None, ftp_pool: FtpPool = None, download_segments: int = 1, readiness: Readiness = None, snapshot_store: SnapshotStore = None):
         super().__init__(self.__process, "Save tracker", 60)
         self.ftp_config = ftp_config
-        self._save: AsaSave = None
         self.map = map
+        self.memory_limit = memory_limit
         self._save_is_manually_set: bool = False
-
-        # APIs
-        self._dino_api: DinoApi = None
-        self._equipment_api: EquipmentApi = None
-        self._stackable_api: StackableApi = None
-        self._structure_api: StructureApi = None
-        self._player_api: PlayerApi = None
-        self._base_api: BaseApi = None
-        self.ftp_client: ArkFtpClient = None
+        self._generation: SaveGeneration = None
+        self.ftp_pool: FtpPool = ftp_pool if ftp_pool is not None else FtpPool(ftp_config, map)
+        self.transfer: SaveTransfer = SaveTransfer(self.ftp_pool, map, segments=download_segments)
+        self.readiness: Readiness = readiness if readiness is not None else Readiness(self.ftp_pool, map)
+        self.snapshots: SnapshotStore = snapshot_store if snapshot_store is not None else SnapshotStore()
 
         self._prev_save_info: ArkFile = None
-        self.reconnect()
+        self.last_stop_time: float = None
+        self.last_start_time: float = None
+
+        self.__refresh_thread: threading.Thread = None
+        self.__swap_lock = threading.Lock()
+        self.__epoch = 0
+        self.__generation_ids = 0
+        self.__generation_memory: int = None
+        self.peak_memory: int = None
+        self.__generation_subscribers: List[Callable[[SaveGeneration], None]] = []
+        self.__delta_subscribers: List[Callable[[SaveDelta], None]] = []
+
         self.get_save()
 
+    @property
+    def generation(self) -> SaveGeneration:
+        """
+        The current generation, read it once and use it throughout to see a single consistent save.
+        """
+        return self._generation
+
+    @property
+    def generation_id(self) -> int:
+        """
+        Increases by one every time a save is published, 0 before the first one.
+        """
+        return self._generation.id if self._generation is not None else 0
+
+    @property
+    def content_hash(self) -> str:
+        return self._generation.content_hash if self._generation is not None else None
+
+    def memo(self, key, compute):
+        """
+        Memoize compute() on the current save generation, see SaveGeneration.memo.
+        """
+        return self._generation.memo(key, compute)
+
+    @property
+    def _save(self) -> AsaSave:
+        return self._generation.save if self._generation is not None else None
+
     @property
     def save(self) -> AsaSave:
         return self._save
 
     @property
     def dino_api(self) -> DinoApi:
-        return self._dino_api
+        return self.get_api(DinoApi)
     
     @property
     def equipment_api(self) -> EquipmentApi:
-        return self._equipment_api
+        return self.get_api(EquipmentApi)
     
     @property
     def stackable_api(self) -> StackableApi:
-        return self._stackable_api
+        return self.get_api(StackableApi)
     
     @property
     def structure_api(self) -> StructureApi:
-        return self._structure_api
+        return self.get_api(StructureApi)
     
     @property
     def player_api(self) -> PlayerApi:
-        return self._player_api
+        return self.get_api(PlayerApi)
     
     @property
     def base_api(self) -> BaseApi:
-        return self._base_api
+        return self.get_api(BaseApi)
+
+    @property
+    def dino_table(self) -> DinoTable:
+        return self.get_api(DinoTable)
+
+    @property
+    def structure_table(self) -> StructureTable:
+        return self.get_api(StructureTable)
+
+    def subscribe_generations(self, callback: Callable[[SaveGeneration], None]):
+        """
+        Call callback with every generation once it is published, downloaded or set by hand.
+        Callbacks run on the thread that published the save and should return quickly.
+        """
+        self.__generation_subscribers.append(callback)
+
+    def subscribe_deltas(self, callback: Callable[[SaveDelta], None]):
+        """
+        Call callback with the SaveDelta of every downloaded generation once it is published.
+        Callbacks run on the thread that published the save and should only record what changed.
+        """
+        self.__delta_subscribers.append(callback)
+
+    def is_refreshing(self) -> bool:
+        return self.__refresh_thread is not None and self.__refresh_thread.is_alive()
 
     def stop(self):
-        if self.ftp_client:
-            self.ftp_client.close()
-            self.ftp_client = None
+        self.ftp_pool.close()
 
     def disconnect(self):
-        if self.ftp_client:
-            self.ftp_client.close()
-            self.ftp_client = None
+        self.ftp_pool.reset()
 
     def connect(self):
-        self.ftp_client: ArkFtpClient = ArkFtpClient.from_config(self.ftp_config, self.map)
-        self.ftp_client.connect()
+        with self.ftp_pool.client():
+            pass
 
     def reconnect(self):
-        if self.ftp_client:
-            self.disconnect()
+        self.disconnect()
         self.connect()
 
     def set_save(self, save: AsaSave):
-        self._save = save
         self._save_is_manually_set = True
-        self._dino_api = DinoApi(save)
-        self._equipment_api = EquipmentApi(save)
-        self._stackable_api = StackableApi(save)
-        self._structure_api = StructureApi(save)
-        self._player_api = PlayerApi(save)
-        self._base_api = BaseApi(save, self.map)
+        self.__publish(SaveGeneration(save, self.map, content_hash=content_hash(save.get_bytes())))
 
     def get_save(self):
         if self._save is None:
@@ -93,10 +166,12 @@ class SaveTracker(Manager):
     
     def stop_and_update(self):
         self._print("Stopping server")
+        self.last_stop_time = time.time()
         NitradoClient().stop_server()
         self._print(f"Server status: {NitradoClient().get_status()}")
 
-        time.sleep(60 * 4) # wait 10 minutes to ensure the server has fully stopped and released the file lock
+        # Wait (at most 4 minutes) until the server has fully stopped and released the file lock
+        self.readiness.wait_for_save_released(timeout=60 * 4)
 
         #re-download
         self._print("Re-downloading save file from FTP...")
@@ -104,131 +179,201 @@ class SaveTracker(Manager):
         self._print("Save file re-downloaded.")
         
     
-    def put_save(self):
+    def put_save(self) -> bool:
+        """
+        Upload the current save and start the server again. The server is started even if the
+        upload fails, it then comes back up on the previous save. Returns whether the upload succeeded.
+        """
         uuid = uuid4()
+        local_file = self.transfer.work_dir / f"Ragnarok_{uuid}.ark"
+        uploaded = False
 
-        if self.ftp_client is None:
-            raise ValueError("FTP client is not connected. Call connect() before uploading the save file.")
-        
-        self._save.store_db(Path.cwd() / f"Ragnarok_{uuid}.ark")
-        
-        done = False
-        attempts = 0
+        try:
+            self.transfer.work_dir.mkdir(parents=True, exist_ok=True)
+            self._save.store_db(local_file)
 
-        while not done and attempts < 10:
-            try:
-                self.reconnect()
-                self._print(f"Removing old save file from FTP... (attempt {attempts}/10)")
-                self.ftp_client.remove_save_file(self.map)
-                done = True
-            except Exception as e:
-                attempts += 1
-                self._print(f"Error removing old save file: {e}, retrying in 10 seconds...")
-                time.sleep(10)
+            self._print("Uploading new save file to FTP...")
+            self.transfer.upload(local_file)
+            uploaded = True
+        except Exception as e:
+            self._print(f"Failed to upload new save file: {e}, starting the server on the previous save.")
+        finally:
+            if local_file.exists():
+                self.__archive(local_file, kind="upload")
+
+            self._print("Starting server")
+            NitradoClient().start_server()
+            self.last_start_time = time.time()
+            self._print(f"Server status: {NitradoClient().get_status()}")
+
+            self.readiness.wait_for_started(timeout=60 * 2)
+
+        if uploaded:
+            self._print("Save file uploaded successfully.")
+        return uploaded
+
+    def last_downtime(self) -> float:
+        """
+        Seconds between the last server stop and the start that followed it, None if it was not started again.
+        """
+        if self.last_stop_time is None or self.last_start_time is None or self.last_start_time < self.last_stop_time:
+            return None
+        return self.last_start_time - self.last_stop_time
 
-        if not done:
-            self._print("Failed to remove old save file after 10 attempts, aborting upload.")
-            return
+    def get_api(self, type: type):
+        """
+        The API of the current generation, None while no save has been loaded yet.
+        Raises ApiBuildError when the API cannot be built on the current save.
+        """
+        generation = self._generation
+        if generation is None:
+            return None
+        return generation.get_api(type)
 
-        done = False
-        attempts = 0
+        
+    def test_process(self):
+        self.__process()
 
-        while not done and attempts < 10:
+    def refresh_apis(self):
+        # The save may have been changed in place, so its hash is unknown and nothing memoized is carried over
+        self.__publish(SaveGeneration(self._save, self.map, self._prev_save_info))
+
+    def __publish(self, generation: SaveGeneration, epoch: int = None) -> bool:
+        """
+        Swap in a complete generation. A background build passes the epoch it started in and is
+        dropped if the save was replaced in the meantime (e.g. re-downloaded while the server was stopped).
+        """
+        with self.__swap_lock:
+            if epoch is not None and epoch != self.__epoch:
+                return False
+            self.__epoch += 1
+            self.__generation_ids += 1
+            generation.id = self.__generation_ids
+            generation.adopt_memo(self._generation)
+            self._generation = generation
+            if generation.info is not None:
+                self._prev_save_info = generation.info
+
+        for callback in list(self.__generation_subscribers):
             try:
-                self.reconnect()
-                self._print(f"Uploading new save file to FTP... (attempt {attempts}/10)")
-                self.ftp_client.upload_save_file(Path.cwd() / f"Ragnarok_{uuid}.ark", map=self.map)
-                done = True
+                callback(generation)
             except Exception as e:
-                attempts += 1
-                self._print(f"Error uploading new save file: {e}, retrying in 10 seconds...")
-                time.sleep(10)
-
-        if not done:
-            self._print("Failed to upload new save file after 10 attempts, aborting.")
-            return
-
-        self._print("Starting server")
-        NitradoClient().start_server()
-        self._print(f"Server status: {NitradoClient().get_status()}")
-
-        time.sleep(60 * 2)
-
-        # # Delete local copy
-        # Path.cwd().joinpath(f"Ragnarok_{uuid}.ark").unlink(missing_ok=True)
-
-        self._print("Save file uploaded successfully.")
+                self._print(f"Error in save generation subscriber: {e}")
+        return True
 
-    def get_api(self, type: type):
+    def __diff(self, previous: SaveGeneration, generation: SaveGeneration) -> SaveDelta:
+        if not self.__delta_subscribers or previous is None or previous.save is generation.save:
+            return None
         try:
-            if type == DinoApi:
-                return self._dino_api
-            elif type == EquipmentApi:
-                return self._equipment_api
-            elif type == StackableApi:
-                return self._stackable_api
-            elif type == StructureApi:
-                return self._structure_api
-            elif type == PlayerApi:
-                return self._player_api
-            elif type == BaseApi:
-                return self._base_api
-            else:
-                raise ValueError(f"Unknown API type: {type}")
+            start = time.monotonic()
+            delta = diff(previous, generation)
+            self._print(f"Compared save generations in {time.monotonic() - start:.1f}s")
+            return delta
         except Exception as e:
-            if not "Unknown API type" in str(e):
-                self.__reconfigure()
-                return self.get_api(type)
-            else:
-                raise e
+            self._print(f"Error comparing save generations: {e}")
+            return None
 
-        
-    def test_process(self):
-        self.__process()
+    def __notify(self, generation: SaveGeneration, delta: SaveDelta):
+        if delta is None:
+            return
+        delta.generation_id = generation.id
+        self._print(f"Save delta {delta}")
+        for callback in list(self.__delta_subscribers):
+            try:
+                callback(delta)
+            except Exception as e:
+                self._print(f"Error in save delta subscriber: {e}")
 
-    def __init_apis(self, save: AsaSave):
-        self._dino_api = DinoApi(save)
-        self._equipment_api = EquipmentApi(save)
-        self._stackable_api = StackableApi(save)
-        self._structure_api = StructureApi(save)
-        self._player_api = PlayerApi(save)
-        self._base_api = BaseApi(save, self.map)
+    def __download(self, info: ArkFile, memory: PeakTracker) -> SaveGeneration:
+        local_file, digest = self.transfer.download()
+        memory.sample()
+        try:
+            save = self.transfer.open(local_file, delete=False)
+        except Exception:
+            local_file.unlink(missing_ok=True)
+            raise
+        self.__archive(local_file, digest)
+        memory.sample()
+        return SaveGeneration(save, self.map, info, digest)
+
+    def __archive(self, local_file: Path, digest: str = None, kind: str = "download"):
+        """
+        Compress the save into the snapshot store on a separate thread and remove the local file.
+        """
+        def archive():
+            try:
+                self.snapshots.put(local_file, digest, kind)
+            except Exception as e:
+                self._print(f"Error storing save snapshot: {e}")
+            finally:
+                local_file.unlink(missing_ok=True)
 
-    def refresh_apis(self):
-        self.__init_apis(self._save)
+        threading.Thread(target=archive, name="save-snapshot", daemon=True).start()
 
     def __reconfigure(self):
-        self.ftp_client = ArkFtpClient.from_config(self.ftp_config, self.map)
-        self.ftp_client.connect()
-        info = self.ftp_client.check_save_file(self.map)
+        with self.ftp_pool.client() as ftp_client:
+            info = ftp_client.check_save_file(self.map)
         if len(info) == 0:
             self._print("No save file found on FTP, skipping reconfiguration.")
             return
-        self._prev_save_info = self.ftp_client.check_save_file(self.map)[0]
-        self._save = AsaSave(contents=self.ftp_client.download_save_file(map=self.map), read_only=False)
-        self.__init_apis(self._save)
+        previous = self._generation
+        generation = self.__download(info[0], PeakTracker())
+        delta = self.__diff(previous, generation)
+        self.__publish(generation)
+        self.__notify(generation, delta)
+
+    def __fits_memory_limit(self) -> bool:
+        if self.memory_limit is None or self.__generation_memory is None:
+            return True
+        rss = current_rss()
+        return rss is None or rss + self.__generation_memory <= self.memory_limit
+
+    def __refresh(self, info: ArkFile, epoch: int):
+        memory = PeakTracker()
+        try:
+            if not self.__fits_memory_limit():
+                self._print(f"Second save would exceed the memory limit of {format_bytes(self.memory_limit)}, releasing cached objects of the current save")
+                self._generation.release_caches()
+                gc.collect()
+                memory = PeakTracker()
+
+            generation = self.__download(info, memory)
+            self.__generation_memory = memory.growth
+            delta = self.__diff(self._generation, generation)
+
+            if not self.__publish(generation, epoch):
+                self._print("Save was replaced while refreshing, discarding background download")
+                return
+            self.__notify(generation, delta)
+
+            self._print(f"Save generation {generation.id} downloaded and swapped in (save game time={generation.save.save_context.game_time})")
+            generation = None
+            gc.collect()
+            memory.sample()
+            self.peak_memory = memory.peak
+            self._print(f"Memory: peak {format_bytes(memory.peak)} during refresh, {format_bytes(memory.growth)} for the new save")
+        except Exception as e:
+            self._print(f"Error refreshing save in the background: {e}")
+            if not ErrorCatch.CATCH_ERRORS:
+                raise e
 
     def __process(self, _: int = 0):
         if self._save_is_manually_set:
             self._print("Save is manually set, skipping FTP check")
             return
+
+        if self.is_refreshing():
+            return
         
         try:
-            if self.ftp_client is None:
-                self.reconnect()
-
-            save_file_info : ArkFile = self.ftp_client.check_save_file(self.map)[0]
+            with self.ftp_pool.client() as ftp_client:
+                save_file_info : ArkFile = ftp_client.check_save_file(self.map)[0]
             if self._prev_save_info is None or save_file_info.is_newer_than(self._prev_save_info):
-                self._print("New save file detected, downloading...")
-                self._prev_save_info = save_file_info
-
-                self._save = AsaSave(contents=self.ftp_client.download_save_file(map=self.map), read_only=False)
-
-                self._print("Save file downloaded, reinitializing APIs... (save game time=" + str(self._save.save_context.game_time) + ")")
-
-                self.__init_apis(self._save)
+                self._print("New save file detected, downloading in the background...")
+                self.__refresh_thread = threading.Thread(target=self.__refresh, args=(save_file_info, self.__epoch), name="save-refresh", daemon=True)
+                self.__refresh_thread.start()
 
-            self.reconnect()
+            self.ftp_pool.keep_alive()
         except Exception as e:
             self._print(f"Error during save tracking, redownloading save: {e}")
             self.__reconfigure()
@@ -0,0 +1,299 @@
+import ftplib
+import hashlib
+import sqlite3
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Tuple
+from uuid import uuid4
+
+from arkparse import AsaSave
+from arkparse.ftp.ark_ftp_client import ArkFtpClient, ArkMap, SAVE_FILES_LOCATION, SAVE_FOLDER_EXTENSION, SAVE_FILE_EXTENSION
+
+from .ftp_pool import FtpPool
+
+SQLITE_HEADER = b"SQLite format 3\x00"
+
+class SaveTransfer:
+    """
+    Moves save files between the FTP server and local disk without holding them in memory.
+
+    Downloads are streamed into a file in work_dir while being hashed, the save is then opened
+    from that file with SQLite memory-mapping the database instead of reading it into its cache.
+
+    With segments > 1 the file is split in byte ranges that are fetched over separate FTP
+    connections (RETR with a REST offset) and written into place. The reassembled file is checked
+    to be an intact SQLite database before it is used. If the server refuses REST, or the segments
+    do not add up to the save, the download falls back to a single stream.
+
+    Uploads go to a temporary name next to the live save, are checked on size and only then
+    renamed over the live save, so the server never sees a missing or partial save.
+    """
+
+    MIN_SEGMENT_SIZE = 8 * 1024 * 1024
+
+    def __init__(self, ftp_pool: FtpPool, map: ArkMap, work_dir: Path = None, mmap_size: int = 1024 * 1024 * 1024, progress_interval: float = 10, segments: int = 1):
+        self.ftp_pool = ftp_pool
+        self.map = map
+        self.work_dir = work_dir if work_dir is not None else Path(tempfile.gettempdir()) / "ark_save_transfer"
+        self.mmap_size = mmap_size
+        self.progress_interval = progress_interval
+        self.segments = segments
+
+    def _print(self, message):
+        current_time = time.strftime("%H:%M:%S", time.localtime())
+        print(f"[{current_time}][save transfer] {message}")
+
+    @staticmethod
+    def save_file_name(ftp_client: ArkFtpClient, map: ArkMap) -> str:
+        return ftp_client._check_map(map)["folder"] + SAVE_FOLDER_EXTENSION + SAVE_FILE_EXTENSION
+
+    @staticmethod
+    def nav_to_save_files(ftp_client: ArkFtpClient, map: ArkMap):
+        ftp_client.ftp.cwd("/")
+        for location in SAVE_FILES_LOCATION:
+            ftp_client.ftp.cwd(location)
+        ftp_client.ftp.cwd(ftp_client._check_map(map)["folder"] + SAVE_FOLDER_EXTENSION)
+
+    def download(self, segments: int = None) -> Tuple[Path, str]:
+        """
+        Download the save file to a new local file, returns its path and content hash.
+        """
+        segments = self.segments if segments is None else segments
+        self.work_dir.mkdir(parents=True, exist_ok=True)
+        local_file = self.work_dir / f"{uuid4()}{SAVE_FILE_EXTENSION}"
+        progress = _Progress(self, time.monotonic())
+
+        try:
+            with self.ftp_pool.client() as ftp_client:
+                self.nav_to_save_files(ftp_client, self.map)
+                file_name = self.save_file_name(ftp_client, self.map)
+                ftp_client.ftp.voidcmd("TYPE I")
+                progress.size = ftp_client.ftp.size(file_name)
+
+            segments = min(segments, (progress.size or 0) // self.MIN_SEGMENT_SIZE)
+            if segments > 1:
+                try:
+                    digest = self.__download_segmented(local_file, file_name, progress, segments)
+                except (ftplib.error_perm, ftplib.error_reply, _SegmentError) as e:
+                    self._print(f"Segmented download failed ({e}), falling back to a single stream")
+                    segments = 1
+                    progress = _Progress(self, time.monotonic(), progress.size)
+                    digest = self.__download_stream(local_file, file_name, progress)
+            else:
+                digest = self.__download_stream(local_file, file_name, progress)
+
+            # The segmented download pre-sizes the file, only a stream can come up short on disk
+            if segments <= 1 and progress.size is not None and local_file.stat().st_size != progress.size:
+                raise IOError(f"Downloaded save is {local_file.stat().st_size} bytes, expected {progress.size}")
+        except BaseException:
+            local_file.unlink(missing_ok=True)
+            raise
+
+        elapsed = time.monotonic() - progress.start
+        self._print(f"Downloaded save ({progress.received / (1024 * 1024):.1f} MB, {max(segments, 1)} connection(s)) in {elapsed:.1f}s at {_throughput(progress.received, elapsed)}")
+        return local_file, digest
+
+    def __download_stream(self, local_file: Path, file_name: str, progress: "_Progress") -> str:
+        digest = hashlib.blake2b(digest_size=16)
+
+        with self.ftp_pool.client() as ftp_client, open(local_file, "wb") as f:
+            self.nav_to_save_files(ftp_client, self.map)
+
+            def write(block: bytes):
+                f.write(block)
+                digest.update(block)
+                progress.add(len(block))
+
+            ftp_client.ftp.retrbinary(f"RETR {file_name}", write, blocksize=1024 * 1024)
+
+        return digest.hexdigest()
+
+    def __download_segmented(self, local_file: Path, file_name: str, progress: "_Progress", segments: int) -> str:
+        size = progress.size
+        with open(local_file, "wb") as f:
+            f.truncate(size)
+
+        bounds = [size * i // segments for i in range(segments + 1)]
+        ranges = [(bounds[i], bounds[i + 1] - bounds[i]) for i in range(segments)]
+        with ThreadPoolExecutor(max_workers=segments, thread_name_prefix="save-segment") as executor:
+            # list() re-raises the first failed segment
+            list(executor.map(lambda r: self.__download_range(local_file, file_name, r[0], r[1], progress), ranges))
+
+        if progress.received != size:
+            raise _SegmentError(f"Segments returned {progress.received} bytes, expected {size}")
+        self.__verify_segments(local_file, [offset for offset, _ in ranges])
+
+        # Segments arrive out of order, hash the reassembled file in one pass
+        digest = hashlib.blake2b(digest_size=16)
+        with open(local_file, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def __verify_segments(self, local_file: Path, offsets: List[int]):
+        # A server that accepts REST but still sends the file from the start fills every segment
+        # with the first bytes of the save, which repeats the SQLite header at the segment offsets
+        with open(local_file, "rb") as f:
+            for offset in offsets:
+                f.seek(offset)
+                header = f.read(len(SQLITE_HEADER))
+                if (header == SQLITE_HEADER) != (offset == 0):
+                    raise _SegmentError(f"Segment at {offset} does not continue the save, the server ignored REST")
+
+        connection = sqlite3.connect(f"{local_file.resolve().as_uri()}?mode=ro", uri=True)
+        try:
+            result = connection.execute("PRAGMA quick_check").fetchall()
+        except sqlite3.DatabaseError as e:
+            raise _SegmentError(f"Reassembled save is not a valid database: {e}")
+        finally:
+            connection.close()
+        if result != [("ok",)]:
+            raise _SegmentError(f"Reassembled save failed the integrity check: {result[0][0]}")
+
+    def __download_range(self, local_file: Path, file_name: str, offset: int, length: int, progress: "_Progress"):
+        with self.ftp_pool.client() as ftp_client, open(local_file, "r+b") as f:
+            self.nav_to_save_files(ftp_client, self.map)
+            ftp = ftp_client.ftp
+            ftp.voidcmd("TYPE I")
+            f.seek(offset)
+
+            remaining = length
+            with ftp.transfercmd(f"RETR {file_name}", rest=offset) as conn:
+                while remaining > 0:
+                    block = conn.recv(min(1024 * 1024, remaining))
+                    if not block:
+                        break
+                    f.write(block)
+                    remaining -= len(block)
+                    progress.add(len(block))
+
+            if remaining > 0:
+                raise IOError(f"Segment at {offset} ended {remaining} bytes early")
+
+            # Closing the data connection before the end of the file makes the server answer 426
+            try:
+                ftp.voidresp()
+            except ftplib.error_temp:
+                pass
+
+    def __retry(self, phase: str, action, attempts: int, backoff: float):
+        for attempt in range(1, attempts + 1):
+            try:
+                return action()
+            except Exception as e:
+                if attempt == attempts:
+                    raise
+                delay = backoff * attempt
+                self._print(f"{phase} failed ({e}), retrying in {delay:.0f}s (attempt {attempt}/{attempts})")
+                time.sleep(delay)
+
+    def __upload_temporary(self, local_file: Path, temp_name: str):
+        size = local_file.stat().st_size
+        start = time.monotonic()
+        with self.ftp_pool.client() as ftp_client, open(local_file, "rb") as f:
+            self.nav_to_save_files(ftp_client, self.map)
+            ftp = ftp_client.ftp
+            ftp.storbinary(f"STOR {temp_name}", f, blocksize=1024 * 1024)
+            ftp.voidcmd("TYPE I")
+            remote_size = ftp.size(temp_name)
+
+        if remote_size != size:
+            raise IOError(f"Uploaded save is {remote_size} bytes, expected {size}")
+
+        elapsed = time.monotonic() - start
+        self._print(f"Uploaded save ({size / (1024 * 1024):.1f} MB) in {elapsed:.1f}s at {_throughput(size, elapsed)}")
+
+    def __swap(self, temp_name: str):
+        with self.ftp_pool.client() as ftp_client:
+            self.nav_to_save_files(ftp_client, self.map)
+            ftp = ftp_client.ftp
+            file_name = self.save_file_name(ftp_client, self.map)
+            try:
+                ftp.rename(temp_name, file_name)
+            except ftplib.error_perm:
+                # Some servers do not rename over an existing file, remove it right before the rename
+                if file_name in ftp.nlst():
+                    ftp.delete(file_name)
+                ftp.rename(temp_name, file_name)
+
+    def __remove_temporary(self, temp_name: str):
+        try:
+            with self.ftp_pool.client() as ftp_client:
+                self.nav_to_save_files(ftp_client, self.map)
+                ftp_client.ftp.delete(temp_name)
+        except Exception as e:
+            self._print(f"Could not remove temporary upload {temp_name}: {e}")
+
+    def upload(self, local_file: Path, attempts: int = 5, backoff: float = 2):
+        """
+        Replace the live save with local_file. The upload and the rename are retried separately,
+        if either keeps failing the live save is left untouched and the error is raised.
+        """
+        with self.ftp_pool.client() as ftp_client:
+            temp_name = f"{self.save_file_name(ftp_client, self.map)}.{uuid4().hex[:8]}.uploading"
+
+        try:
+            self.__retry("Upload", lambda: self.__upload_temporary(local_file, temp_name), attempts, backoff)
+        except Exception:
+            self.__remove_temporary(temp_name)
+            raise
+
+        try:
+            self.__retry("Rename", lambda: self.__swap(temp_name), attempts, backoff)
+        except Exception:
+            # Kept on purpose, the live save may already be gone if the rename failed after removing it
+            self._print(f"Rename failed, the new save is still on the server as {temp_name}")
+            raise
+
+    def open(self, local_file: Path, delete: bool = True) -> AsaSave:
+        """
+        Open a downloaded save, the local file is removed afterwards since the save works on its own copy.
+        """
+        try:
+            save = AsaSave(path=local_file, read_only=False)
+        finally:
+            if delete:
+                local_file.unlink(missing_ok=True)
+
+        # The download directory holds no profile or tribe files, same as a save opened from memory
+        save.save_dir = None
+        if self.mmap_size:
+            save.save_connection.connection.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+        return save
+
+def _throughput(received: int, elapsed: float) -> str:
+    if elapsed <= 0:
+        return "- MB/s"
+    return f"{received / (1024 * 1024) / elapsed:.1f} MB/s"
+
+class _SegmentError(IOError):
+    """
+    The segments of a download did not reassemble into the save.
+    """
+
+class _Progress:
+    def __init__(self, transfer: SaveTransfer, start: float, size: int = None):
+        self.transfer = transfer
+        self.start = start
+        self.size = size
+        self.received = 0
+        self.last_report = start
+        self.lock = threading.Lock()
+
+    def add(self, count: int):
+        with self.lock:
+            self.received += count
+            now = time.monotonic()
+            if now - self.last_report < self.transfer.progress_interval:
+                return
+            self.last_report = now
+            received = self.received
+
+        if self.size:
+            done = f"{received / (1024 * 1024):.1f}/{self.size / (1024 * 1024):.1f} MB ({received / self.size * 100:.0f}%)"
+        else:
+            done = f"{received / (1024 * 1024):.1f} MB"
+        self.transfer._print(f"Downloading save: {done} at {_throughput(received, now - self.start)}")
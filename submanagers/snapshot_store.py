@@ -0,0 +1,162 @@
+import gzip
+import hashlib
+import json
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List
+from uuid import uuid4
+
+from arkparse import AsaSave
+
+class Snapshot:
+    def __init__(self, digest: str, file: str, size: int, stored_size: int, kind: str, created: float, last_used: float):
+        self.digest = digest
+        self.file = file
+        self.size = size
+        self.stored_size = stored_size
+        self.kind = kind
+        self.created = created
+        self.last_used = last_used
+
+    def to_json(self) -> dict:
+        return dict(self.__dict__)
+
+    @staticmethod
+    def from_json(data: dict) -> "Snapshot":
+        return Snapshot(**data)
+
+    def __str__(self):
+        created = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.created))
+        return f"{self.digest} ({self.kind}, {created}, {self.size / (1024 * 1024):.1f} MB -> {self.stored_size / (1024 * 1024):.1f} MB)"
+
+class SnapshotStore:
+    """
+    Local gzip-compressed copies of downloaded and uploaded saves, keyed on their content hash.
+
+    Keeps at most max_snapshots and, when max_bytes is set, at most that many compressed bytes.
+    The least recently used snapshots are evicted first. The index is kept in index.json next
+    to the snapshots so it survives restarts.
+    """
+
+    def __init__(self, directory: Path = None, max_snapshots: int = 10, max_bytes: int = None, compresslevel: int = 3):
+        self.directory = directory if directory is not None else Path.cwd() / "snapshots"
+        self.max_snapshots = max_snapshots
+        self.max_bytes = max_bytes
+        self.compresslevel = compresslevel
+        self.__lock = threading.Lock()
+        self.__snapshots: Dict[str, Snapshot] = {}
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.__load_index()
+
+    def _print(self, message):
+        current_time = time.strftime("%H:%M:%S", time.localtime())
+        print(f"[{current_time}][snapshot store] {message}")
+
+    @property
+    def __index_file(self) -> Path:
+        return self.directory / "index.json"
+
+    def __load_index(self):
+        if not self.__index_file.exists():
+            return
+        with open(self.__index_file, "r") as f:
+            for data in json.load(f):
+                snapshot = Snapshot.from_json(data)
+                if (self.directory / snapshot.file).exists():
+                    self.__snapshots[snapshot.digest] = snapshot
+
+    def __save_index(self):
+        temp = self.__index_file.with_suffix(".tmp")
+        with open(temp, "w") as f:
+            json.dump([s.to_json() for s in self.__snapshots.values()], f, indent=4)
+        temp.replace(self.__index_file)
+
+    def __contains__(self, digest: str) -> bool:
+        with self.__lock:
+            return digest in self.__snapshots
+
+    def list(self) -> List[Snapshot]:
+        """
+        All snapshots, newest first.
+        """
+        with self.__lock:
+            return sorted(self.__snapshots.values(), key=lambda s: s.created, reverse=True)
+
+    def put(self, path: Path, digest: str = None, kind: str = "download") -> str:
+        """
+        Store a compressed copy of the save at path, returns its content hash.
+        The hash is computed while compressing when it is not given.
+        """
+        with self.__lock:
+            if digest is not None and digest in self.__snapshots:
+                self.__snapshots[digest].last_used = time.time()
+                self.__save_index()
+                return digest
+
+        temp = self.directory / f"{uuid4()}.tmp"
+        hasher = hashlib.blake2b(digest_size=16)
+        size = 0
+        with open(path, "rb") as source, gzip.open(temp, "wb", compresslevel=self.compresslevel) as target:
+            for block in iter(lambda: source.read(1024 * 1024), b""):
+                hasher.update(block)
+                target.write(block)
+                size += len(block)
+        digest = digest if digest is not None else hasher.hexdigest()
+
+        file = f"{digest}.ark.gz"
+        temp.replace(self.directory / file)
+        now = time.time()
+        snapshot = Snapshot(digest, file, size, (self.directory / file).stat().st_size, kind, now, now)
+
+        with self.__lock:
+            self.__snapshots[digest] = snapshot
+            self.__evict()
+            self.__save_index()
+
+        self._print(f"Stored {snapshot}")
+        return digest
+
+    def __evict(self):
+        by_use = sorted(self.__snapshots.values(), key=lambda s: s.last_used)
+        total = sum(s.stored_size for s in by_use)
+        while by_use and (len(by_use) > self.max_snapshots or (self.max_bytes is not None and total > self.max_bytes)):
+            # Never evict the snapshot that was just stored
+            if len(by_use) == 1:
+                break
+            snapshot = by_use.pop(0)
+            total -= snapshot.stored_size
+            del self.__snapshots[snapshot.digest]
+            (self.directory / snapshot.file).unlink(missing_ok=True)
+            self._print(f"Evicted {snapshot}")
+
+    def extract(self, digest: str, destination: Path) -> Path:
+        """
+        Decompress a snapshot to destination.
+        """
+        with self.__lock:
+            snapshot = self.__snapshots.get(digest)
+            if snapshot is None:
+                raise KeyError(f"No snapshot with hash {digest}")
+            snapshot.last_used = time.time()
+            self.__save_index()
+
+        with gzip.open(self.directory / snapshot.file, "rb") as source, open(destination, "wb") as target:
+            shutil.copyfileobj(source, target, 1024 * 1024)
+        return destination
+
+    def open(self, digest: str, read_only: bool = True) -> AsaSave:
+        """
+        Open a stored save, the save works on its own copy so the snapshot is not changed.
+        """
+        temp = Path(tempfile.gettempdir()) / f"{uuid4()}.ark"
+        try:
+            self.extract(digest, temp)
+            save = AsaSave(path=temp, read_only=read_only)
+        finally:
+            temp.unlink(missing_ok=True)
+        save.save_dir = None
+        return save
@@ -0,0 +1,92 @@
+import threading
+from typing import Dict, List, Tuple, Union
+from uuid import UUID
+
+from arkparse.api import BaseApi, StructureApi
+from arkparse.enums import ArkMap
+from arkparse.object_model.structures import Structure, StructureWithInventory
+from arkparse.parsing.struct.actor_transform import MapCoords
+
+Cell = Tuple[str, int, int]
+
+def _sub_map(name: str) -> str:
+    return name.casefold() if name is not None else None
+
+class StructureGrid:
+    """
+    Uniform grid over the map coordinates of a set of structures.
+
+    The map coordinates of every structure are computed once when the grid is built, a radius
+    query only visits the cells overlapping its square and applies the same test as
+    ActorTransform.is_at_map_coordinate to the structures in them.
+    """
+
+    def __init__(self, structures: Dict[UUID, Structure], map: ArkMap, cell_size: float = 1.0):
+        self.structures = structures
+        self.size = len(structures)
+        self.map = map
+        self.cell_size = cell_size
+        self.cells: Dict[Cell, List[Tuple[UUID, float, float]]] = {}
+
+        for uuid, structure in structures.items():
+            location = structure.location
+            if location is None or location.in_cryopod:
+                continue
+            coords = location.as_map_coords(map)
+            cell = (_sub_map(coords.sub_map_name), self.__index(coords.lat), self.__index(coords.long))
+            self.cells.setdefault(cell, []).append((uuid, coords.lat, coords.long))
+
+    def __index(self, value: float) -> int:
+        return int(value // self.cell_size)
+
+    def __matches(self, coords: MapCoords, radius: float) -> List[UUID]:
+        sub_map = _sub_map(coords.sub_map_name)
+        matches = []
+        for i in range(self.__index(coords.lat - radius), self.__index(coords.lat + radius) + 1):
+            for j in range(self.__index(coords.long - radius), self.__index(coords.long + radius) + 1):
+                for uuid, lat, long in self.cells.get((sub_map, i, j), ()):
+                    if abs(lat - coords.lat) <= radius and abs(long - coords.long) <= radius:
+                        matches.append(uuid)
+        return matches
+
+    def get_at_location(self, coords: MapCoords, radius: float = 0.3) -> Dict[UUID, Union[Structure, StructureWithInventory]]:
+        return {uuid: self.structures[uuid] for uuid in self.__matches(coords, radius)}
+
+    def count_at_location(self, coords: MapCoords, radius: float = 0.3) -> int:
+        return len(self.__matches(coords, radius))
+
+class _GridLocations:
+    """
+    Answers get_at_location from a StructureGrid over the structures the API has parsed.
+    The grid is built on the first query and again when structures were removed through the API.
+    """
+
+    def _init_grid(self):
+        self.__grid: StructureGrid = None
+        self.__grid_lock = threading.Lock()
+
+    def structure_grid(self, map: ArkMap) -> StructureGrid:
+        structures = self.get_all()
+        with self.__grid_lock:
+            grid = self.__grid
+            if grid is None or grid.map != map or grid.structures is not structures or grid.size != len(structures):
+                grid = self.__grid = StructureGrid(structures, map)
+            return grid
+
+    def get_at_location(self, map: ArkMap, coords: MapCoords, radius: float = 0.3, classes: List[str] = None) -> Dict[UUID, Union[Structure, StructureWithInventory]]:
+        if classes is not None:
+            return super().get_at_location(map, coords, radius, classes)
+        return self.structure_grid(map).get_at_location(coords, radius)
+
+    def count_at_location(self, map: ArkMap, coords: MapCoords, radius: float = 0.3) -> int:
+        return self.structure_grid(map).count_at_location(coords, radius)
+
+class GridStructureApi(_GridLocations, StructureApi):
+    def __init__(self, save):
+        super().__init__(save)
+        self._init_grid()
+
+class GridBaseApi(_GridLocations, BaseApi):
+    def __init__(self, save, map: ArkMap = None):
+        super().__init__(save, map)
+        self._init_grid()
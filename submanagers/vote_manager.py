@@ -6,17 +6,19 @@ from arkparse.enums import ArkMap
 from arkparse.ftp.ark_ftp_client import ArkFtpClient
 from arkparse.api.rcon_api import RconApi, GameLogEntry
 from .__manager import Manager
+from .game_log import GameLogReader, drain
 
 VOTE_MESSAGES = {
     "Test": "test of the voting system"
 }
 
 class VoteManager(Manager):
+    latency_sensitive = True
 
-    def __init__(self, rconapi: RconApi, ftp_config: dict):
+    def __init__(self, rconapi: RconApi, ftp_config: dict, game_log: GameLogReader):
         super().__init__(self.__process, "vote manager")
         self.rcon : RconApi = rconapi
-        self.log_handle = self.rcon.subscribe()
+        self.log_entries = game_log.subscribe(self)
 
         self.current_votes = {}
         self.vote_type = None
@@ -32,9 +34,6 @@ class VoteManager(Manager):
         self.vote_count_down_thread = threading.Thread(target=self.__vote_count_down_thread)
         self.vote_count_down_thread.start()
 
-        # Re-subscribe in case we want a new handle (unlikely needed but left in place)
-        self.log_handle = self.rcon.subscribe()
-
         # FTP client
         self.ftp = ArkFtpClient.from_config(ftp_config, ArkMap.RAGNAROK)
 
@@ -90,8 +89,8 @@ class VoteManager(Manager):
                             self.tribe_votes[tribe_id] = 0
 
     def __process(self, interval: int):
-        """Periodically fetch new log entries and process them."""
-        response = self.rcon.get_new_entries(self.log_handle)
+        """Process the log entries the game log reader queued."""
+        response = drain(self.log_entries)
 
         if response and len(response):
             self._print("New log messages:")
@@ -0,0 +1,195 @@
+import os
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Dict, List
+from uuid import UUID, uuid4
+
+import numpy as np
+import pytest
+from arkparse.api import DinoApi
+from arkparse.enums import ArkStat
+from arkparse.object_model.dinos.dino import Dino
+from arkparse.object_model.dinos.stats import DinoStats, StatPoints, STAT_POSITION_MAP
+from arkparse.object_model.dinos.tamed_baby import TamedBaby
+from arkparse.object_model.dinos.tamed_dino import TamedDino
+
+from submanagers.entity_tables import DinoTable
+
+REX = "/Game/PrimalEarth/Dinos/Rex/Rex_Character_BP.Rex_Character_BP_C"
+RAPTOR = "/Game/PrimalEarth/Dinos/Raptor/Raptor_Character_BP.Raptor_Character_BP_C"
+DODO = "/Game/PrimalEarth/Dinos/Dodo/Dodo_Character_BP.Dodo_Character_BP_C"
+
+# Equivalence against a real save as well when one is available, like test_rbm.py reads it from the working directory
+FIXTURE_SAVE = Path(os.environ.get("ARK_FIXTURE_SAVE", Path(__file__).resolve().parent / "Ragnarok_WP.ark"))
+
+def points(type: str, values: Dict[ArkStat, int]) -> StatPoints:
+    stat_points = StatPoints(type=type)
+    for stat, value in values.items():
+        setattr(stat_points, STAT_POSITION_MAP[stat.value], value)
+    return stat_points
+
+def make_dino(cls: type, blueprint: str, base: Dict[ArkStat, int] = None, mutated: Dict[ArkStat, int] = None,
+              added: Dict[ArkStat, int] = None, cryopodded: bool = False) -> Dino:
+    dino = cls.__new__(cls)
+    dino.object = SimpleNamespace(blueprint=blueprint, uuid=uuid4())
+    stats = DinoStats.__new__(DinoStats)
+    stats.base_stat_points = points("NumberOfLevelUpPointsApplied", base or {})
+    stats.mutated_stat_points = points("NumberOfMutationsAppliedTamed", mutated or {})
+    stats.added_stat_points = points("NumberOfLevelUpPointsAppliedTamed", added or {})
+    stats.current_level = stats.base_stat_points.get_level() + stats.mutated_stat_points.get_level() + stats.added_stat_points.get_level()
+    dino.stats = stats
+    # Location is not part of the comparison, a set rotation keeps the property from reading the save
+    dino._location = None
+    dino._rotation = object()
+    if issubclass(cls, TamedDino):
+        dino.cryopod = object() if cryopodded else None
+        dino.owner = None
+    return dino
+
+class FixtureDinoApi(DinoApi):
+    """
+    DinoApi over a fixed set of parsed dinos. get_all returns the dinos on the field first and the
+    cryopodded ones after them, in the order the real get_all parses them.
+    """
+
+    def __init__(self, dinos: List[Dino]):
+        super().__init__(None)
+        on_field = [d for d in dinos if not self.__in_cryopod(d)]
+        in_cryopod = [d for d in dinos if self.__in_cryopod(d)]
+        self.dinos: Dict[UUID, Dino] = {d.object.uuid: d for d in on_field + in_cryopod}
+
+    @staticmethod
+    def __in_cryopod(dino: Dino) -> bool:
+        return isinstance(dino, TamedDino) and dino.cryopod is not None
+
+    def get_all(self, config=None, **kwargs) -> Dict[UUID, Dino]:
+        if config is None:
+            return dict(self.dinos)
+        # Only get_all_filtered passes a class name filter, the cryopods themselves never match it
+        return {k: d for k, d in self.dinos.items() if not self.__in_cryopod(d) and config.blueprint_name_filter(d.object.blueprint)}
+
+    def get_all_tamed(self, include_cryopodded=True, only_cryopodded=False) -> Dict[UUID, TamedDino]:
+        tamed = {k: d for k, d in self.dinos.items() if isinstance(d, TamedDino)}
+        if only_cryopodded:
+            return {k: d for k, d in tamed.items() if d.cryopod is not None}
+        if not include_cryopodded:
+            return {k: d for k, d in tamed.items() if d.cryopod is None}
+        return tamed
+
+def fixture_dinos() -> List[Dino]:
+    return [
+        make_dino(Dino, REX, base={ArkStat.HEALTH: 40, ArkStat.MELEE_DAMAGE: 40}),
+        make_dino(Dino, RAPTOR, base={ArkStat.HEALTH: 10}),
+        # Ties with the wild rex on health and melee
+        make_dino(TamedDino, REX, base={ArkStat.HEALTH: 30, ArkStat.MELEE_DAMAGE: 40}, mutated={ArkStat.HEALTH: 10}, added={ArkStat.HEALTH: 20}),
+        make_dino(TamedDino, REX, base={ArkStat.HEALTH: 45}, mutated={ArkStat.MELEE_DAMAGE: 4}, cryopodded=True),
+        make_dino(TamedDino, RAPTOR, base={ArkStat.STAMINA: 45}, cryopodded=True),
+        make_dino(TamedBaby, RAPTOR, base={ArkStat.HEALTH: 5, ArkStat.STAMINA: 5}),
+        make_dino(TamedBaby, REX, base={ArkStat.WEIGHT: 50}, cryopodded=True),
+        # Only zero or negative stats
+        make_dino(Dino, DODO),
+        make_dino(TamedDino, DODO, base={ArkStat.HEALTH: -2}, mutated={ArkStat.STAMINA: -4}),
+    ]
+
+FILTERS = [
+    {},
+    {"level_lower_bound": 40},
+    {"level_upper_bound": 50},
+    {"class_names": [REX]},
+    {"class_names": [REX, DODO], "include_cryopodded": False},
+    {"class_names": [RAPTOR], "only_cryopodded": True},
+    {"tamed": True},
+    {"tamed": False},
+    {"tamed": True, "include_cryopodded": False},
+    {"only_cryopodded": True},
+    {"stat_minimum": 45},
+    {"stat_minimum": 40, "stats": [ArkStat.MELEE_DAMAGE]},
+    {"stat_minimum": 0, "stats": [ArkStat.HEALTH]},
+    {"class_names": [REX], "tamed": True, "stat_minimum": 44, "stats": [ArkStat.MELEE_DAMAGE, ArkStat.HEALTH]},
+]
+
+BEST_QUERIES = [
+    {},
+    {"stat": ArkStat.HEALTH},
+    {"stat": ArkStat.MELEE_DAMAGE},
+    {"stat": ArkStat.HEALTH, "mutated_stat": True},
+    {"stat": ArkStat.HEALTH, "base_stat": True},
+    {"classes": [REX]},
+    {"classes": [REX], "only_tamed": True},
+    {"classes": [RAPTOR], "only_untamed": True},
+    {"classes": [DODO]},
+    {"classes": [DODO], "stat": ArkStat.STAMINA, "mutated_stat": True},
+    {"classes": [DODO], "only_tamed": True},
+    {"level_upper_bound": 20},
+    {"only_tamed": True, "base_stat": True},
+]
+
+def check_filters(api: DinoApi, table: DinoTable, filters: List[dict]):
+    for query in filters:
+        assert set(table.filtered(**query)) == set(api.get_all_filtered(**query)), query
+
+def check_best(api: DinoApi, table: DinoTable, queries: List[dict]):
+    for query in queries:
+        dino, value, stat = api.get_best_dino_for_stat(**query)
+        table_dino, table_value, table_stat = table.best_for_stat(**query)
+        assert table_dino is dino, query
+        assert (table_value, table_stat) == (value, stat), query
+
+def check_top_k(api: DinoApi, table: DinoTable, stat: ArkStat, k: int, **query):
+    dinos = api.get_all_filtered(**query)
+    # The same order as the API's get_all, highest first and ties in that order
+    expected = sorted(((d, d.stats.get(stat)) for d in dinos.values()), key=lambda pair: pair[1], reverse=True)[:k]
+    result = table.top_k(table.stat_values()[:, stat.value], k, table.mask(**query))
+    assert [(id(d), v) for d, v in result] == [(id(d), v) for d, v in expected], (stat, k, query)
+
+@pytest.fixture
+def dinos() -> FixtureDinoApi:
+    return FixtureDinoApi(fixture_dinos())
+
+def test_mask_matches_get_all_filtered(dinos: FixtureDinoApi):
+    check_filters(dinos, DinoTable.build(dinos), FILTERS)
+
+def test_best_for_stat_matches_get_best_dino_for_stat(dinos: FixtureDinoApi):
+    check_best(dinos, DinoTable.build(dinos), BEST_QUERIES)
+
+def test_best_for_stat_without_positive_stats(dinos: FixtureDinoApi):
+    table = DinoTable.build(dinos)
+    dino, value, stat = table.best_for_stat(classes=[DODO])
+    # Like DinoStats.get_highest_stat, nothing above 0 means no stat and the first dino
+    assert (value, stat) == (0, None)
+    assert dino is next(d for d in dinos.dinos.values() if d.object.blueprint == DODO)
+
+def test_best_for_stat_without_dinos(dinos: FixtureDinoApi):
+    table = DinoTable.build(dinos)
+    assert table.best_for_stat(classes=["/Game/Unknown.Unknown_C"], stat=ArkStat.HEALTH) == (None, None, ArkStat.HEALTH)
+
+def test_top_k_matches_sorted_api_results(dinos: FixtureDinoApi):
+    table = DinoTable.build(dinos)
+    for stat in (ArkStat.HEALTH, ArkStat.MELEE_DAMAGE, ArkStat.STAMINA, ArkStat.OXYGEN):
+        for k in range(1, len(dinos.dinos) + 2):
+            check_top_k(dinos, table, stat, k)
+            check_top_k(dinos, table, stat, k, class_names=[REX, DODO])
+            check_top_k(dinos, table, stat, k, tamed=True, include_cryopodded=False)
+
+def test_top_k_ties_keep_table_order():
+    values = np.array([5, 7, 5, 7, 5, 1])
+    table = DinoTable.build(FixtureDinoApi([make_dino(Dino, REX) for _ in values]))
+    for k in range(1, len(values) + 1):
+        expected = sorted(range(len(values)), key=lambda i: values[i], reverse=True)[:k]
+        assert [d for d, _ in table.top_k(values, k)] == [table.dinos[table.uuids[i]] for i in expected], k
+
+@pytest.mark.skipif(not FIXTURE_SAVE.exists(), reason=f"no fixture save at {FIXTURE_SAVE}")
+def test_table_matches_dino_api_on_fixture_save():
+    from arkparse import AsaSave
+
+    save = AsaSave(FIXTURE_SAVE)
+    api = DinoApi(save)
+    table = DinoTable.build(api)
+    classes = sorted(table.class_counts(), key=table.class_counts().get, reverse=True)[:3]
+    check_filters(api, table, [
+        {"class_names": classes}, {"class_names": classes, "include_cryopodded": False}, {"only_cryopodded": True},
+        {"tamed": True}, {"tamed": False}, {"level_lower_bound": 150}, {"stat_minimum": 40},
+    ])
+    check_best(api, table, [
+        {}, {"classes": classes}, {"classes": classes, "only_tamed": True}, {"stat": ArkStat.HEALTH, "mutated_stat": True},
+    ])
@@ -0,0 +1,87 @@
+import asyncio
+import queue
+from typing import List
+
+from submanagers.__manager import Manager
+from submanagers.game_log import GameLogReader, drain
+
+class StubRcon:
+    """
+    Hands out prepared getgamelog batches, one per get_new_entries call.
+    """
+
+    def __init__(self, batches: List[list] = None):
+        self.batches = list(batches or [])
+        self.subscriptions = 0
+        self.polls = 0
+
+    def subscribe(self):
+        self.subscriptions += 1
+        return "handle"
+
+    def get_new_entries(self, handle):
+        assert handle == "handle"
+        self.polls += 1
+        return self.batches.pop(0) if self.batches else []
+
+def make_consumer(name: str) -> Manager:
+    return Manager(lambda _: None, name, 60)
+
+def test_every_queue_gets_every_entry_in_order():
+    submitted = []
+    reader = GameLogReader(StubRcon(), submitted.append)
+    chat, commands = make_consumer("chat"), make_consumer("commands")
+    chat_entries = reader.subscribe(chat)
+    command_entries = reader.subscribe(commands)
+    anonymous = reader.subscribe()
+
+    reader.dispatch(["a", "b"])
+    reader.dispatch([])
+    reader.dispatch(["c"])
+
+    for entries in (chat_entries, command_entries, anonymous):
+        assert drain(entries) == ["a", "b", "c"]
+        assert drain(entries) == []
+    # Once per consumer for every batch that had entries, a subscription without a consumer is not submitted
+    assert submitted == [chat, commands, chat, commands]
+
+def test_unsubscribe_stops_delivery():
+    submitted = []
+    reader = GameLogReader(StubRcon(), submitted.append)
+    chat, commands = make_consumer("chat"), make_consumer("commands")
+    chat_entries = reader.subscribe(chat)
+    command_entries = reader.subscribe(commands)
+
+    reader.dispatch(["a"])
+    reader.unsubscribe(chat_entries)
+    reader.dispatch(["b"])
+
+    assert drain(chat_entries) == ["a"]
+    assert drain(command_entries) == ["a", "b"]
+    assert submitted == [chat, commands, commands]
+
+def test_process_polls_once_for_all_subscribers():
+    rcon = StubRcon([["a", "b"], [], ["c"]])
+    reader = GameLogReader(rcon, interval=0)
+    entries = [reader.subscribe(), reader.subscribe()]
+
+    for _ in range(3):
+        reader.run_now()
+        asyncio.run(reader.process_async())
+
+    assert rcon.subscriptions == 1
+    assert rcon.polls == 3
+    for queued in entries:
+        assert drain(queued) == ["a", "b", "c"]
+
+def test_drain_does_not_block():
+    assert drain(queue.Queue()) == []
+
+def test_game_log_consumers_run_on_the_fast_workers():
+    from submanagers.chat_logger import ChatLogger
+    from submanagers.command_manager import CommandManager
+    from submanagers.vote_manager import VoteManager
+
+    # Their interval is only a fallback now that the reader wakes them, it must not decide the executor
+    for manager in (GameLogReader, ChatLogger, CommandManager, VoteManager):
+        assert manager.latency_sensitive, manager.__name__
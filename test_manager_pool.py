@@ -0,0 +1,161 @@
+import asyncio
+import threading
+import time
+
+from submanagers.__manager import AsyncManager, Manager
+from submanagers.deadline_queue import DeadlineQueue
+from submanagers.manager_pool import ManagerPool
+
+def make_manager(name: str, interval: int = 60, process=None) -> Manager:
+    return Manager(process if process is not None else (lambda _: None), name, interval)
+
+def test_pop_due_returns_due_managers_in_deadline_order():
+    queue = DeadlineQueue()
+    now = time.time()
+    late, early, future = make_manager("late"), make_manager("early"), make_manager("future")
+    queue.push(late, now - 1)
+    queue.push(early, now - 5)
+    queue.push(future, now + 60)
+
+    assert queue.pop_due(until=now) == [early, late]
+    assert len(queue) == 1
+    assert queue.next_deadline() == now + 60
+
+def test_push_keeps_the_earliest_deadline():
+    queue = DeadlineQueue()
+    manager = make_manager("manager")
+    now = time.time()
+    queue.push(manager, now + 60)
+    queue.push(manager, now - 1)
+    queue.push(manager, now + 30)
+
+    assert len(queue) == 1
+    assert queue.next_deadline() == now - 1
+    assert queue.pop_due(until=now) == [manager]
+    assert queue.pop_due(until=time.time()) == []
+
+def test_pop_due_returns_empty_when_until_passes():
+    queue = DeadlineQueue()
+    queue.push(make_manager("future"), time.time() + 60)
+
+    start = time.monotonic()
+    assert queue.pop_due(until=time.time() + 0.05) == []
+    assert time.monotonic() - start < 1
+
+def test_submit_wakes_a_sleeping_pop_due():
+    queue = DeadlineQueue()
+    manager = make_manager("manager")
+    manager.set_interval(3600)
+    queue.push(manager)
+    popped = []
+
+    def wait():
+        popped.extend(queue.pop_due(until=time.time() + 5))
+
+    waiter = threading.Thread(target=wait)
+    waiter.start()
+    time.sleep(0.05)
+    queue.submit(manager)
+    waiter.join(timeout=2)
+
+    assert not waiter.is_alive()
+    assert popped == [manager]
+
+def test_pool_does_not_queue_a_manager_that_is_in_flight():
+    release = threading.Event()
+    runs = []
+
+    def process(_):
+        runs.append(threading.current_thread().name)
+        release.wait(2)
+
+    pool = ManagerPool(max_workers=2)
+    manager = make_manager("slow", process=process)
+    try:
+        assert pool.submit(manager)
+        assert not pool.submit(manager)
+        assert pool.is_running(manager)
+        release.set()
+    finally:
+        pool.shutdown()
+
+    assert len(runs) == 1
+    assert not pool.is_running(manager)
+
+def test_pool_calls_on_done_after_the_run_and_after_a_failure():
+    queue = DeadlineQueue()
+    done = threading.Event()
+
+    def fail(_):
+        raise RuntimeError("save job failed")
+
+    def on_done(manager):
+        queue.push(manager)
+        done.set()
+
+    pool = ManagerPool(max_workers=1)
+    manager = make_manager("failing", process=fail)
+    try:
+        pool.submit(manager, on_done=on_done)
+        assert done.wait(2)
+    finally:
+        pool.shutdown()
+
+    # The manager is back on the queue and can be submitted again
+    assert len(queue) == 1
+    assert not pool.is_running(manager)
+    assert "failing" in pool.report()
+
+def test_pool_routes_on_the_latency_flag():
+    threads = {}
+
+    def record(name):
+        def process(_):
+            threads[name] = threading.current_thread().name
+        return process
+
+    class Chat(Manager):
+        latency_sensitive = True
+
+    fast = Chat(record("chat"), "chat", 60)
+    slow = make_manager("save job", interval=1, process=record("save job"))
+
+    pool = ManagerPool(max_workers=1, fast_workers=1)
+    try:
+        pool.submit(fast)
+        pool.submit(slow)
+    finally:
+        pool.shutdown()
+
+    assert threads["chat"].startswith("fast-manager")
+    assert threads["save job"].startswith("manager")
+
+def test_async_manager_runs_from_the_sync_process():
+    calls = []
+
+    async def process(interval):
+        calls.append(await manager.run_blocking(threading.current_thread) is not threading.current_thread())
+        calls.append(await manager.run_cpu(sum, [1, 2, 3]))
+
+    manager = AsyncManager(process, "async", 60)
+    manager.process()
+    # Not due anymore, the second call is skipped
+    manager.process()
+
+    assert calls == [True, 6]
+    assert manager.last_run is not None
+
+def test_async_manager_runs_on_a_running_loop():
+    calls = []
+
+    async def process(interval):
+        calls.append(interval)
+
+    manager = AsyncManager(process, "async", 30)
+
+    async def run_twice():
+        await asyncio.gather(manager.process_async(), manager.process_async())
+
+    asyncio.run(run_twice())
+
+    assert calls == [30]
@@ -0,0 +1,123 @@
+import threading
+import time
+from typing import List
+
+import pytest
+from arkparse.api.rcon_api import ActivePlayer, PlayerDataFiles
+
+from submanagers.player_presence import PlayerPresence
+
+def player(name: str, ue_5_id: str) -> ActivePlayer:
+    return ActivePlayer(f"0. {name}, {ue_5_id}")
+
+class StubRcon:
+    """
+    Answers listplayers from a list the test changes, optionally holding every poll until released.
+    """
+
+    def __init__(self, players: List[ActivePlayer] = None):
+        self.players = list(players or [])
+        self.polls = 0
+        self.polling = threading.Event()
+        self.release = threading.Event()
+        self.release.set()
+
+    def get_active_players(self, p=False) -> List[ActivePlayer]:
+        self.polls += 1
+        self.polling.set()
+        self.release.wait(5)
+        return list(self.players)
+
+@pytest.fixture(autouse=True)
+def no_player_files(monkeypatch):
+    # test_rbm.py points this at a players.json when it is collected, the stub players have no playtime
+    monkeypatch.setattr(PlayerDataFiles, "players_files_path", None)
+
+def test_joined_and_left_are_reported_after_a_poll():
+    alice, bob, carol = player("Alice", "0002a"), player("Bob", "0002b"), player("Carol", "0002c")
+    rcon = StubRcon([alice, bob])
+    presence = PlayerPresence(rcon)
+    events = []
+    presence.subscribe(lambda joined, left: events.append(([p.name for p in joined], [p.name for p in left])))
+
+    # The first snapshot has nothing to compare with
+    assert [p.name for p in presence.refresh()] == ["Alice", "Bob"]
+    assert events == []
+
+    rcon.players = [bob, carol]
+    presence.refresh()
+    assert events == [(["Carol"], ["Alice"])]
+
+    # Compared on the UE5 id, a renamed player did not leave
+    rcon.players = [player("Bobby", "0002b"), carol]
+    presence.refresh()
+    assert len(events) == 1
+
+    rcon.players = []
+    presence.refresh()
+    assert events[-1] == ([], ["Bobby", "Carol"])
+
+def test_snapshot_is_reused_within_the_ttl():
+    rcon = StubRcon([player("Alice", "0002a")])
+    presence = PlayerPresence(rcon, ttl=0.2)
+
+    assert presence.count() == 1
+    rcon.players = []
+    assert presence.count() == 1
+    assert presence.count(max_age=10) == 1
+    assert rcon.polls == 1
+
+    time.sleep(0.3)
+    assert presence.count() == 0
+    assert rcon.polls == 2
+
+def test_scheduled_runs_poll_every_time():
+    rcon = StubRcon([player("Alice", "0002a")])
+    presence = PlayerPresence(rcon, interval=0)
+
+    presence.process()
+    presence.process()
+    assert rcon.polls == 2
+    # A read right after a scheduled poll uses its snapshot
+    assert presence.count() == 1
+    assert rcon.polls == 2
+
+def test_concurrent_stale_reads_share_one_poll():
+    rcon = StubRcon([player("Alice", "0002a")])
+    presence = PlayerPresence(rcon)
+    rcon.release.clear()
+    results = []
+
+    readers = [threading.Thread(target=lambda: results.append(presence.players())) for _ in range(8)]
+    for reader in readers:
+        reader.start()
+    assert rcon.polling.wait(2)
+    # Let every reader find the snapshot stale and queue up behind the running poll
+    time.sleep(0.1)
+    rcon.release.set()
+    for reader in readers:
+        reader.join(2)
+
+    assert rcon.polls == 1
+    assert len(results) == 8
+    assert all([p.name for p in players] == ["Alice"] for players in results)
+
+def test_returned_lists_are_copies():
+    presence = PlayerPresence(StubRcon([player("Alice", "0002a")]))
+    presence.players().clear()
+    assert presence.count() == 1
+
+def test_activity_manager_announces_logins_and_logouts():
+    from submanagers.player_activity_manager import PlayerActivityManager
+
+    alice, bob = player("Alice", "0002a"), player("Bob", "0002b")
+    rcon = StubRcon([alice])
+    rcon.messages = []
+    rcon.send_message = rcon.messages.append
+    presence = PlayerPresence(rcon)
+    PlayerActivityManager(rcon, presence=presence)
+
+    rcon.players = [bob]
+    presence.refresh()
+
+    assert [m.split(") ", 1)[1] for m in rcon.messages] == ["Bob(steam name) has logged in!", "Alice(steam name) has logged out!"]
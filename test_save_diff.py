@@ -0,0 +1,160 @@
+import sqlite3
+import threading
+from types import SimpleNamespace
+from typing import Dict, Tuple
+from uuid import UUID, uuid4
+
+import pytest
+from arkparse import Classes
+
+from submanagers import save_diff
+from submanagers.dino_boss_manager import DinoBossManager
+from submanagers.raid_base_manager import RaidBaseManager
+from submanagers.save_diff import DATA, DINO, INVENTORY, INVENTORY_CONTENTS, ITEM, LOCATION, OWNER, STRUCTURE, DeltaWatch, SaveDelta, diff
+from submanagers.save_generation import SaveGeneration
+
+VAULT = Classes.structures.placed.utility.vault
+WALL = "/Game/PrimalEarth/Structures/Wooden/Wall_Wood.Wall_Wood_C"
+REX = "/Game/PrimalEarth/Dinos/Rex/Rex_Character_BP.Rex_Character_BP_C"
+RAPTOR = "/Game/PrimalEarth/Dinos/Raptor/Raptor_Character_BP.Raptor_Character_BP_C"
+INVENTORY_BP = "/Game/PrimalEarth/CoreBlueprints/Inventories/PrimalInventoryBP_StorageBox_Huge.PrimalInventoryBP_StorageBox_Huge_C"
+METAL = "/Game/PrimalEarth/CoreBlueprints/Resources/PrimalItemResource_MetalIngot.PrimalItemResource_MetalIngot_C"
+
+class FakeConnection:
+    """
+    The part of SaveConnection the diff reads: the game table and the class of an object.
+    """
+
+    def __init__(self, records: Dict[UUID, Tuple[str, bytes]]):
+        self._db_lock = threading.Lock()
+        self.connection = sqlite3.connect(":memory:", check_same_thread=False)
+        self.connection.execute("CREATE TABLE game (key BLOB PRIMARY KEY, value BLOB)")
+        self.connection.executemany("INSERT INTO game VALUES (?, ?)", ((uuid.bytes, record) for uuid, (_, record) in records.items()))
+        self.classes = {uuid: blueprint for uuid, (blueprint, _) in records.items()}
+
+    def get_class_of_uuid(self, uuid: UUID) -> str:
+        return self.classes[uuid]
+
+def make_generation(id_: int, records: Dict[UUID, Tuple[str, bytes]], transforms: Dict[UUID, tuple] = None, properties: Dict[UUID, dict] = None) -> SaveGeneration:
+    save = SimpleNamespace(
+        save_connection=FakeConnection(records),
+        save_context=SimpleNamespace(actor_transforms={uuid: SimpleNamespace(x=x, y=y, z=z) for uuid, (x, y, z) in (transforms or {}).items()}),
+        properties=properties or {},
+    )
+    generation = SaveGeneration(save, None, content_hash=str(id_))
+    generation.id = id_
+    return generation
+
+@pytest.fixture(autouse=True)
+def fake_properties(monkeypatch):
+    # The fake records are not ArkGameObjects, serve the parsed properties from the fake save
+    monkeypatch.setattr(save_diff, "_read_properties", lambda save, uuid, blueprint, names: {n: v for n, v in save.properties.get(uuid, {}).items() if n in names})
+
+@pytest.fixture
+def delta() -> SaveDelta:
+    vault, vault_inventory, wall, rex, raptor, ingot, new_ingot, new_wall = (uuid4() for _ in range(8))
+    ids = SimpleNamespace(vault=vault, vault_inventory=vault_inventory, wall=wall, rex=rex, raptor=raptor, ingot=ingot, new_ingot=new_ingot, new_wall=new_wall)
+
+    previous = make_generation(1, {
+        vault: (VAULT, b"vault"),
+        vault_inventory: (INVENTORY_BP, b"vault inventory"),
+        wall: (WALL, b"wall team 1"),
+        rex: (REX, b"rex"),
+        raptor: (RAPTOR, b"raptor"),
+        ingot: (METAL, b"ingot"),
+    }, transforms={
+        vault: (0, 0, 0), wall: (10, 0, 0), rex: (100, 100, 0), raptor: (200, 0, 0),
+    }, properties={
+        vault: {"TargetingTeam": 1, "MyInventoryComponent": vault_inventory, "CurrentItemCount": 0},
+        wall: {"TargetingTeam": 1},
+    })
+    current = make_generation(2, {
+        vault: (VAULT, b"vault with an item"),
+        vault_inventory: (INVENTORY_BP, b"vault inventory with an item"),
+        wall: (WALL, b"wall team 2"),
+        rex: (REX, b"rex"),
+        ingot: (METAL, b"ingot"),
+        new_ingot: (METAL, b"new ingot"),
+        new_wall: (WALL, b"new wall"),
+    }, transforms={
+        vault: (0, 0, 0), wall: (10, 0, 0), rex: (150, 100, 0), new_wall: (20, 0, 0),
+    }, properties={
+        # The item count is not updated, the vault still changed through the item in its inventory
+        vault: {"TargetingTeam": 1, "MyInventoryComponent": vault_inventory, "CurrentItemCount": 0},
+        wall: {"TargetingTeam": 2},
+        new_ingot: {"OwnerInventory": vault_inventory},
+    })
+
+    delta = diff(previous, current)
+    delta.ids = ids
+    return delta
+
+def test_added_and_removed(delta: SaveDelta):
+    ids = delta.ids
+    assert {uuid: change.kind for uuid, change in delta.added.items()} == {ids.new_ingot: ITEM, ids.new_wall: STRUCTURE}
+    assert {uuid: change.kind for uuid, change in delta.removed.items()} == {ids.raptor: DINO}
+    assert delta.removed[ids.raptor].blueprint == RAPTOR
+    assert (delta.previous_id, delta.generation_id) == (1, 2)
+
+def test_changed_fields(delta: SaveDelta):
+    ids = delta.ids
+    assert {uuid: change.fields for uuid, change in delta.changed.items()} == {
+        ids.vault: {DATA, INVENTORY_CONTENTS},
+        ids.vault_inventory: {DATA},
+        ids.wall: {DATA, OWNER},
+        ids.rex: {LOCATION},
+    }
+    assert delta.changed[ids.vault_inventory].kind == INVENTORY
+    assert delta.inventories == {ids.vault_inventory}
+    assert [c.uuid for c in delta.changed_of(STRUCTURE, OWNER)] == [ids.wall]
+    assert ids.ingot not in delta.changed
+    assert delta.touches([ids.vault_inventory]) and not delta.touches([ids.ingot])
+
+def test_identical_generations_give_an_empty_delta():
+    records = {uuid4(): (REX, b"rex"), uuid4(): (VAULT, b"vault")}
+    transforms = {uuid: (1, 2, 3) for uuid in records}
+    delta = diff(make_generation(1, records, transforms), make_generation(2, records, transforms))
+    assert delta.is_empty()
+    assert delta.inventories == set()
+
+def test_raid_base_manager_sees_vault_changes(delta: SaveDelta):
+    vaults_changed = RaidBaseManager._RaidBaseManager__vaults_changed
+    assert vaults_changed(delta)
+
+    del delta.changed[delta.ids.vault]
+    assert not vaults_changed(delta)
+
+def test_dino_boss_manager_sees_member_changes(delta: SaveDelta):
+    members_changed = DinoBossManager._DinoBossManager__members_changed
+    def manager(*blueprints):
+        return SimpleNamespace(menagerie_state=SimpleNamespace(members=[SimpleNamespace(blueprint=b) for b in blueprints]))
+
+    assert members_changed(manager(REX), delta)
+    assert members_changed(manager(RAPTOR), delta)
+    assert not members_changed(manager("/Game/PrimalEarth/Dinos/Dodo/Dodo_Character_BP.Dodo_Character_BP_C"), delta)
+
+def test_delta_watch():
+    watch = DeltaWatch(lambda delta: bool(delta.removed_of(DINO)))
+    assert watch.needs_check(1)
+
+    watch.checked(1)
+    assert not watch.needs_check(1)
+
+    # A delta nothing relevant changed in moves the watch along without a check
+    watch.on_delta(SaveDelta(1, 2))
+    assert not watch.needs_check(2)
+    assert watch.needs_check(3)
+
+    relevant = SaveDelta(2, 3)
+    relevant.removed[uuid4()] = save_diff.ObjectChange(uuid4(), DINO, REX)
+    watch.on_delta(relevant)
+    assert watch.needs_check(3)
+
+    # A generation published without a delta in between counts as a change
+    watch.checked(3)
+    watch.on_delta(SaveDelta(4, 5))
+    assert watch.needs_check(5)
+
+    watch.checked(5)
+    watch.invalidate()
+    assert watch.needs_check(5)